@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cálculos/segundo de /calculate/batch (NumPy) frente al cálculo escalar
+
+Uso: python benchmarks/bench_batch.py [filas]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # main.py monta frontend/ con rutas relativas
+
+import hydraulics
+import operating_point
+from main import PumpingStationInput, calculate_pumping_station
+
+
+def random_inputs(n, seed=42):
+    """Generar n entradas aleatorias con unidades y materiales variados"""
+    rng = np.random.default_rng(seed)
+    materials = ["pvc", "steel", "copper", "concrete", "ductile_iron", "hdpe"]
+    return [
+        PumpingStationInput(
+            geometric_height=float(rng.uniform(5, 80)),
+            geometric_height_unit=str(rng.choice(["m", "ft"])),
+            flow_rate=float(rng.uniform(1, 300)),
+            flow_rate_unit=str(rng.choice(["l/s", "m3/h", "gpm"])),
+            pipe_length=float(rng.uniform(0.05, 5)),
+            pipe_length_unit=str(rng.choice(["km", "mi"])),
+            pipe_diameter=float(rng.uniform(50, 600)),
+            pipe_diameter_unit="mm",
+            pipe_material=str(rng.choice(materials)),
+            pump_efficiency=float(rng.uniform(0.5, 0.9)),
+            valve_gate=int(rng.integers(0, 4)),
+            valve_check=int(rng.integers(0, 2)),
+            elbow_90=int(rng.integers(0, 8)),
+            elbow_45=int(rng.integers(0, 4)),
+        )
+        for _ in range(n)
+    ]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    items = random_inputs(n)
+    print(f"Filas: {n}")
+
+    # Ruta escalar (se silencian los print de calculate_pumping_station)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scalar = [calculate_pumping_station(item) for item in items]
+    scalar_time = time.perf_counter() - start
+
+    # Ruta vectorizada desde modelos (misma carga que 'items' en /calculate/batch)
+    start = time.perf_counter()
+    columns = hydraulics.columns_from_items(items)
+    formatted, bad = hydraulics.format_results(operating_point.with_design_points(hydraulics.calculate_batch(columns)))
+    records = hydraulics.to_records(formatted, bad)
+    batch_time = time.perf_counter() - start
+
+    # Solo el cálculo columnar (carga 'columns', sin construir registros)
+    start = time.perf_counter()
+    hydraulics.format_results(operating_point.with_design_points(hydraulics.calculate_batch(columns)))
+    columnar_time = time.perf_counter() - start
+
+    # Solo el núcleo NumPy (sin redondeo ni conversión a listas JSON)
+    start = time.perf_counter()
+    hydraulics.calculate_batch(columns)
+    core_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(scalar, records) if a != b)
+
+    print(f"{'Ruta':<28}{'Tiempo (s)':>12}{'Cálculos/s':>14}")
+    print(f"{'Escalar (math)':<28}{scalar_time:>12.4f}{n / scalar_time:>14,.0f}")
+    print(f"{'Lote, registros':<28}{batch_time:>12.4f}{n / batch_time:>14,.0f}")
+    print(f"{'Lote, columnar':<28}{columnar_time:>12.4f}{n / columnar_time:>14,.0f}")
+    print(f"{'Núcleo NumPy':<28}{core_time:>12.4f}{n / core_time:>14,.0f}")
+    print(f"Aceleración columnar: {scalar_time / columnar_time:.1f}x")
+    print(f"Filas distintas a la ruta escalar: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: paquete de reportes (PDF combinado o ZIP) frente a reportes uno a uno
+
+Genera N escenarios y compara renderizar sus reportes en serie, como N llamadas
+a /generate-report, con el paquete en streaming sobre el pool de reportes.
+Mide el tiempo hasta el primer byte y el total, y verifica el número de
+páginas del PDF combinado y las entradas del ZIP. La caché de PDFs se vacía
+antes de cada corrida.
+Uso: python benchmarks/bench_bundle.py [escenarios ...]
+"""
+import asyncio
+import io
+import os
+import re
+import sys
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # main monta frontend/ con rutas relativas
+
+import contextlib
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+
+
+def scenarios(n):
+    return [main.PumpingStationInput(
+        project_name=f"Escenario {i + 1}", project_location="Licitación de prueba",
+        geometric_height=20 + i % 30, geometric_height_unit="m",
+        flow_rate=20 + 3 * (i % 40), flow_rate_unit="l/s",
+        pipe_length=1 + i % 5, pipe_length_unit="km",
+        pipe_diameter=[160, 200, 250, 315][i % 4], pipe_diameter_unit="mm",
+        pipe_material=["pvc", "steel", "ductile_iron"][i % 3], pump_efficiency=0.72, elbow_90=4, valve_gate=2,
+    ) for i in range(n)]
+
+
+def fresh_cache():
+    main.pdf_cache = main.cache.LRUCache("pdf", 64 * 1024 * 1024)
+
+
+async def stream_bundle(items, format):
+    response = await main.report_bundle(main.BundleInput(items=items, title="Benchmark"), format=format)
+    start = time.perf_counter()
+    first, parts = None, []
+    async for chunk in response.body_iterator:
+        # Primer reporte entregado (la cabecera del PDF sale al instante)
+        if first is None and len(chunk) > 1024:
+            first = time.perf_counter() - start
+        parts.append(chunk)
+    return first, time.perf_counter() - start, b"".join(parts)
+
+
+async def run(counts):
+    print(f"Pool de reportes: {main.report_pool.max_workers} procesos")
+    print(f"{'Escenarios':>11}{'Modo':>10}{'1er reporte (s)':>16}{'Total (s)':>11}{'MB':>7}{'Verificación':>16}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.build_report_pdf(scenarios(1)[0])  # Calentar estilos y gráfico en este proceso
+    for n in counts:
+        items = scenarios(n)
+        fresh_cache()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            serial = [main.build_report_pdf(item) for item in items]
+        elapsed = time.perf_counter() - start
+        print(f"{n:>11,}{'serie':>10}{elapsed / n:>16.2f}{elapsed:>11.2f}"
+              f"{sum(map(len, serial)) / 1e6:>7.1f}{'':>16}")
+
+        for format in ("pdf", "zip"):
+            fresh_cache()
+            with contextlib.redirect_stdout(io.StringIO()):
+                first, total, content = await stream_bundle(items, format)
+            if format == "pdf":
+                check = f"{len(re.findall(rb'/Type /Page[^s]', content))} páginas"
+            else:
+                check = f"{len(zipfile.ZipFile(io.BytesIO(content)).namelist())} archivos"
+            print(f"{n:>11,}{format:>10}{first:>16.2f}{total:>11.2f}{len(content) / 1e6:>7.1f}{check:>16}")
+    main.report_pool.shutdown()
+
+
+if __name__ == "__main__":
+    # Un solo bucle de eventos, como en el servidor: el pool guarda su Condition
+    asyncio.run(run([int(a) for a in sys.argv[1:]] or [50, 200]))
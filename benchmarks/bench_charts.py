@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: gráficos/segundo del renderizador de curva de bomba
+
+Compara la versión anterior basada en pyplot (reproducida abajo como referencia)
+con charts.render_pump_curve_png, en un hilo y con 8 hilos.
+Uso: python benchmarks/bench_charts.py [gráficos]
+"""
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import charts
+import hydraulics
+import operating_point
+
+
+def legacy_pump_curve_png(results):
+    """Implementación anterior con la máquina de estados global de pyplot"""
+    fig, ax1 = plt.subplots(figsize=(12, 8))
+    flow_design = results.get('flow_rate_m3s', 0.05)
+    flow_range = np.linspace(0, flow_design * 1.5, 100)
+    total_head = results.get('total_head', 20)
+    a = -0.4 * total_head / (flow_design * 1.5)**2
+    c = 1.2 * total_head
+    head_values = a * flow_range**2 + c
+    ax1.plot(flow_range, head_values, 'b-', linewidth=3, label='Curva de Bomba', zorder=3)
+    ax1.plot(flow_design, total_head, 'ro', markersize=10, label='Punto de Operación', zorder=4)
+    system_head = results.get('geometric_height', 17) + (flow_range / flow_design)**2 * results.get('friction_head_loss', 3)
+    ax1.plot(flow_range, system_head, 'g--', linewidth=2.5, label='Curva del Sistema', zorder=2)
+    ax1.set_xlabel('Caudal (m³/s)', fontsize=12, fontweight='bold', color='#1B2951')
+    ax1.set_ylabel('Altura (m)', fontsize=12, fontweight='bold', color='#1B2951')
+    ax1.tick_params(axis='x', colors='#1B2951', labelsize=10)
+    ax1.tick_params(axis='y', colors='#1B2951', labelsize=10)
+    ax2 = ax1.twiny()
+    ax2.set_xlim(ax1.get_xlim())
+    ax2_ticks = ax1.get_xticks()
+    ax2.set_xticks(ax2_ticks)
+    ax2.set_xticklabels([f'{tick*1000:.1f}' for tick in ax2_ticks])
+    ax2.set_xlabel('Caudal (l/s)', fontsize=12, fontweight='bold', color='#00BFFF')
+    ax2.tick_params(axis='x', colors='#00BFFF', labelsize=10)
+    ax3 = ax1.twiny()
+    ax3.spines['top'].set_position(('outward', 40))
+    ax3.set_xlim(ax1.get_xlim())
+    ax3_ticks = ax1.get_xticks()
+    ax3.set_xticks(ax3_ticks)
+    ax3.set_xticklabels([f'{tick*15850.3:.0f}' for tick in ax3_ticks])
+    ax3.set_xlabel('Caudal (GPM)', fontsize=12, fontweight='bold', color='#FF6B35')
+    ax3.tick_params(axis='x', colors='#FF6B35', labelsize=10)
+    ax1.grid(True, alpha=0.4, linestyle='--', color='gray')
+    ax1.set_facecolor('#FAFBFC')
+    ax1.legend(loc='lower right', frameon=True, fancybox=True, shadow=True,
+               fontsize=11, bbox_to_anchor=(0.98, 0.02))
+    annotation_text = (f'Punto de Operación\nQ = {flow_design:.4f} m³/s\nQ = {flow_design * 1000:.1f} l/s\n'
+                       f'Q = {flow_design * 15850.3:.0f} GPM\nH = {total_head:.1f} m')
+    ax1.annotate(annotation_text, xy=(flow_design, total_head),
+                 xytext=(flow_design * 0.15, total_head * 0.7),
+                 arrowprops=dict(arrowstyle='->', color='red', lw=2),
+                 fontsize=9, ha='left', va='center',
+                 bbox=dict(boxstyle='round,pad=0.4', facecolor='yellow',
+                           edgecolor='red', alpha=0.9, linewidth=1.5))
+    ax1.set_xlim(0, flow_design * 1.6)
+    ax1.set_ylim(0, max(head_values) * 1.2)
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def sample_results(n, seed=3):
+    """Resultados completos de /calculate (curvas y punto de operación) para n estaciones"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'geometric_height': rng.uniform(5, 80, n).tolist(), 'geometric_height_unit': 'm',
+        'flow_rate': rng.uniform(5, 500, n).tolist(), 'flow_rate_unit': 'l/s',
+        'pipe_length': rng.uniform(20, 2000, n).tolist(), 'pipe_length_unit': 'm',
+        'pipe_diameter': rng.uniform(100, 600, n).tolist(), 'pipe_diameter_unit': 'mm',
+        'pipe_material': 'pvc', 'pump_efficiency': 0.75, 'elbow_90': 4,
+    }
+    results = operating_point.with_design_points(hydraulics.calculate_batch(columns))
+    return hydraulics.to_records(*hydraulics.format_results(results))
+
+
+def rate(render, inputs, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        sizes = [len(render(r)) for r in inputs]
+    else:
+        with ThreadPoolExecutor(threads) as executor:
+            sizes = list(executor.map(lambda r: len(render(r)), inputs))
+    assert all(sizes)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    inputs = sample_results(n)
+    charts.render_pump_curve_png(inputs[0])  # Construir el esqueleto del hilo principal
+
+    print(f"Gráficos: {n} (12x8 in, 150 dpi)")
+    print(f"{'Renderizador':<26}{'1 hilo':>12}{'8 hilos':>12}")
+    legacy_1 = rate(legacy_pump_curve_png, inputs, 1)
+    # pyplot no es seguro entre hilos: la referencia con 8 hilos solo se mide, no se garantiza
+    try:
+        legacy_8 = f"{rate(legacy_pump_curve_png, inputs, 8):.2f}"
+    except Exception as e:
+        legacy_8 = f"error ({type(e).__name__})"
+    print(f"{'pyplot (anterior)':<26}{legacy_1:>12.2f}{legacy_8:>12}")
+    new_1 = rate(charts.render_pump_curve_png, inputs, 1)
+    new_8 = rate(charts.render_pump_curve_png, inputs, 8)
+    print(f"{'Figure + plantilla':<26}{new_1:>12.2f}{new_8:>12.2f}")
+    print("(gráficos/segundo)")
+
+
+if __name__ == "__main__":
+    main()
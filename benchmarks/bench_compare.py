@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: comparación de alternativas frente a la base
+
+Arma N variantes (material, diámetro, válvulas check y codos) y las compara con
+la base de tres maneras: una llamada a /calculate por alternativa, /compare en
+un solo lote y /compare incremental. En el modo incremental se mide la primera
+petición (caché de fricción vacía) y una segunda en la que sólo cambian los
+accesorios, que reutiliza la etapa de fricción y sólo recalcula total_k·v²/2g.
+Verifica que los tres caminos den la misma potencia.
+Uso: python benchmarks/bench_compare.py [variantes ...]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # main.py monta frontend/ con rutas relativas
+
+import cache
+import comparison
+from main import PumpingStationInput, calculate_pumping_station
+
+BASE = PumpingStationInput(
+    geometric_height=30.0, geometric_height_unit="m",
+    flow_rate=50.0, flow_rate_unit="l/s",
+    pipe_length=2.0, pipe_length_unit="km",
+    pipe_diameter=250.0, pipe_diameter_unit="mm",
+    pipe_material="steel", pump_efficiency=0.75,
+    elbow_90=4, valve_gate=1, valve_check=1,
+    friction_model="colebrook",
+).dict()
+MATERIALS = ["pvc", "steel", "ductile_iron", "concrete"]
+DIAMETERS = [200.0, 250.0, 300.0, 350.0, 400.0]
+
+
+def random_variants(n, seed=11):
+    rng = np.random.default_rng(seed)
+    return [
+        (f"V{i + 1}", {**BASE,
+                       "pipe_material": str(rng.choice(MATERIALS)),
+                       "pipe_diameter": float(rng.choice(DIAMETERS)),
+                       "valve_check": int(rng.integers(0, 3)),
+                       "elbow_90": int(rng.integers(0, 8))})
+        for i in range(n)
+    ]
+
+
+def refit(variants, seed=12):
+    # Mismas tuberías, otros accesorios
+    rng = np.random.default_rng(seed)
+    return [(name, {**row, "valve_check": int(rng.integers(0, 3)), "elbow_90": int(rng.integers(0, 8))})
+            for name, row in variants]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def power(result):
+    return [entry.get("power_kw") for entry in [result["baseline"]] + result["variants"]]
+
+
+def run(n):
+    variants = random_variants(n)
+    refitted = refit(variants)
+    stages = cache.LRUCache("stages", 64 * 1024 * 1024)
+
+    def by_hand():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [calculate_pumping_station(PumpingStationInput(**row))["power_kw"]
+                    for row in [BASE] + [row for _, row in variants]]
+
+    scalar, scalar_time = timed(by_hand)
+    batch, batch_time = timed(lambda: comparison.compare(BASE, variants, 4000, 0.12))
+    cold, cold_time = timed(lambda: comparison.compare(BASE, variants, 4000, 0.12, incremental=True,
+                                                       stage_cache=stages))
+    warm, warm_time = timed(lambda: comparison.compare(BASE, refitted, 4000, 0.12, incremental=True,
+                                                       stage_cache=stages))
+    reference = comparison.compare(BASE, refitted, 4000, 0.12)
+    same = power(batch) == scalar and power(cold) == scalar and power(warm) == power(reference)
+    friction = cold["stages"]["friction"]["computed"], warm["stages"]["friction"]["computed"]
+    return scalar_time, batch_time, cold_time, warm_time, friction, same
+
+
+def main():
+    counts = [int(a) for a in sys.argv[1:]] or [10, 100, 1000]
+    print(f"{'Variantes':>10}{'Escalar s':>11}{'Lote s':>9}{'Incr. frío s':>14}{'Incr. acc. s':>14}"
+          f"{'Tuberías':>10}{'Recalc.':>9}{'Iguales':>9}")
+    for n in counts:
+        scalar_time, batch_time, cold_time, warm_time, (pipes, recomputed), same = run(n)
+        print(f"{n:>10,}{scalar_time:>11.4f}{batch_time:>9.4f}{cold_time:>14.4f}{warm_time:>14.4f}"
+              f"{pipes:>10}{recomputed:>9}{'sí' if same else 'NO':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark: precisión frente a velocidad de los modelos de factor de fricción
+
+La referencia es Colebrook-White resuelto con tolerancia 1e-12.
+Uso: python benchmarks/bench_friction.py [muestras]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import friction
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(7)
+    reynolds = 10 ** rng.uniform(np.log10(4000), 8, n)  # Régimen turbulento
+    diameter_m = rng.uniform(0.05, 1.5, n)
+    relative = 10 ** rng.uniform(-6, -2, n)
+    roughness_mm = relative * diameter_m * 1000
+
+    reference = friction.friction_factor(reynolds, roughness_mm, diameter_m, 'colebrook')
+    friction.colebrook_table()  # La tabla se construye una sola vez, fuera de la medición
+
+    print(f"Muestras: {n:,} (4e3 <= Re <= 1e8, 1e-6 <= e/D <= 1e-2)")
+    print(f"{'Modelo':<14}{'Error medio %':>15}{'Error máx %':>14}{'ns/eval (lote)':>17}{'us/eval (escalar)':>20}")
+    for method in friction.METHODS:
+        start = time.perf_counter()
+        values = friction.friction_factor(reynolds, roughness_mm, diameter_m, method)
+        array_ns = (time.perf_counter() - start) / n * 1e9
+
+        m = min(n, 20_000)
+        start = time.perf_counter()
+        for i in range(m):
+            friction.friction_factor(float(reynolds[i]), float(roughness_mm[i]), float(diameter_m[i]), method)
+        scalar_us = (time.perf_counter() - start) / m * 1e6
+
+        error = np.abs(values / reference - 1) * 100
+        print(f"{method:<14}{error.mean():>15.4f}{error.max():>14.4f}{array_ns:>17.1f}{scalar_us:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
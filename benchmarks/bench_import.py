@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: importación masiva en streaming de listas de estaciones (CSV -> CSV/Parquet)
+
+Genera un CSV de N filas en bloques de 64 KB, como llegaría el cuerpo de la
+petición a /import, y lo procesa por trozos escribiendo la salida. Mide las
+filas por segundo y el pico de memoria (tracemalloc), que debe mantenerse
+constante al crecer el archivo. Una de cada mil filas trae un valor inválido.
+Uso: python benchmarks/bench_import.py [filas ...]
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import importer
+
+BLOCK_BYTES = 64 * 1024
+HEADER = ("project_name,geometric_height,geometric_height_unit,flow_rate,flow_rate_unit,pipe_length,"
+          "pipe_length_unit,pipe_diameter,pipe_diameter_unit,pipe_material,pump_efficiency,elbow_90,valve_gate\n")
+MATERIALS = ["pvc", "steel", "hdpe", "ductile_iron"]
+
+
+async def body(rows, seed=3):
+    """CSV bytes of ``rows`` random stations, in BLOCK_BYTES pieces."""
+    rng = np.random.default_rng(seed)
+    buffer = HEADER
+    for start in range(0, rows, 1000):
+        n = min(1000, rows - start)
+        height, flow = rng.uniform(5, 80, n), rng.uniform(5, 300, n)
+        length, diameter = rng.uniform(0.1, 10, n), rng.choice([110, 160, 200, 250, 315, 400], n)
+        material, efficiency = rng.choice(MATERIALS, n), rng.uniform(0.6, 0.85, n)
+        lines = [f"E{start + i},{height[i]:.2f},m,{flow[i]:.1f},l/s,{length[i]:.3f},km,{diameter[i]},mm,"
+                 f"{material[i]},{efficiency[i]:.3f},{i % 6},1\n" for i in range(n)]
+        lines[-1] = f"E{start + n - 1},{height[-1]:.2f},m,n/a,l/s,1,km,200,mm,pvc,0.7,0,0\n"
+        buffer += "".join(lines)
+        while len(buffer) >= BLOCK_BYTES:
+            yield buffer[:BLOCK_BYTES].encode()
+            buffer = buffer[BLOCK_BYTES:]
+    yield buffer.encode()
+
+
+async def run(rows, format):
+    table = await importer.open_table(body(rows))
+    writer = importer.writer_for(format, table.fields)
+    written = len(writer.start())
+    errors = 0
+    async for numbers, chunk in table.chunks():
+        result = table.calculate(numbers, chunk)
+        errors += sum(e is not None for e in result["error"])
+        written += len(writer.write(result))
+    written += len(writer.close())
+    return written, errors
+
+
+def main():
+    counts = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 500_000]
+    formats = ["csv"]
+    try:
+        importer.writer_for("parquet", ["row"])
+        formats.append("parquet")
+    except ValueError:
+        print("pyarrow no instalado: solo salida CSV")
+    print(f"{'Filas':>10}{'Salida':>9}{'s':>8}{'filas/s':>11}{'Errores':>9}{'MB salida':>11}{'Pico MB':>9}")
+    for rows in counts:
+        for format in formats:
+            start = time.perf_counter()
+            written, errors = asyncio.run(run(rows, format))
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            asyncio.run(run(rows, format))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{rows:>10,}{format:>9}{elapsed:>8.2f}{rows / elapsed:>11,.0f}{errors:>9,}"
+                  f"{written / 1e6:>11.1f}{peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recálculo incremental del cálculo en vivo frente a /calculate completo
+
+Aplica a una sesión en vivo cambios de un solo campo (eficiencia, accesorios,
+altura, diámetro) y mide el tiempo por cambio, las etapas recalculadas y el
+tamaño del diff enviado, frente a recalcular y enviar la respuesta completa de
+calculate_pumping_station. Luego envía una ráfaga de un deslizador por el
+WebSocket y cuenta cuántos recálculos hizo el servidor.
+Uso: python benchmarks/bench_live.py [repeticiones]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # main.py monta frontend/ con rutas relativas
+
+from fastapi.testclient import TestClient
+
+import live
+import main
+
+BASE = main.PumpingStationInput(
+    geometric_height=20.0, geometric_height_unit="m",
+    flow_rate=10.0, flow_rate_unit="l/s",
+    pipe_length=100.0, pipe_length_unit="m",
+    pipe_diameter=150.0, pipe_diameter_unit="mm",
+    pipe_material="pvc", pump_efficiency=0.7, valve_check=1,
+).dict()
+INPUTS = {field: BASE[field] for field in live.LIVE_FIELDS}
+CHANGES = [
+    ("pump_efficiency", lambda i: 0.6 + (i % 30) / 100),
+    ("valve_check", lambda i: i % 4),
+    ("geometric_height", lambda i: 15.0 + i % 20),
+    ("pipe_diameter", lambda i: 100.0 + i % 100),
+]
+
+
+def main_():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'Campo':<18}{'Etapas':<34}{'ms/cambio':>10}{'ms completo':>13}{'bytes diff':>12}{'bytes compl.':>14}")
+    for field, value in CHANGES:
+        session = live.LiveSession()
+        session.update(INPUTS)
+        start = time.perf_counter()
+        sizes = []
+        for i in range(repeats):
+            diff, stages = session.update({**INPUTS, field: value(i + 1)})
+            sizes.append(len(json.dumps(diff)))
+        live_time = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(repeats):
+                full = main.calculate_pumping_station(main.PumpingStationInput(**{**BASE, field: value(i + 1)}))
+        full_time = (time.perf_counter() - start) / repeats
+        print(f"{field:<18}{','.join(live.dirty_stages([field])):<34}{live_time * 1000:>10.3f}"
+              f"{full_time * 1000:>13.3f}{sum(sizes) / repeats:>12.0f}{len(json.dumps(full)):>14}")
+
+    # Ráfaga de un deslizador: 200 mensajes seguidos
+    with TestClient(main.app) as client, client.websocket_connect("/ws/calculate") as ws:
+        ws.send_text(json.dumps({"type": "init", "data": INPUTS, "seq": 0}))
+        ws.receive_json()
+        start = time.perf_counter()
+        for seq in range(1, 201):
+            ws.send_text(json.dumps({"type": "change", "changes": {"pipe_diameter": 100.0 + seq / 2}, "seq": seq}))
+        replies = 0
+        while True:
+            reply = ws.receive_json()
+            replies += 1
+            if reply["seq"] == 200:
+                break
+        print(f"\nRáfaga: 200 mensajes -> {replies} recálculos en {time.perf_counter() - start:.3f} s "
+              f"(DEBOUNCE {live.DEBOUNCE * 1000:.0f} ms, MAX_WAIT {live.MAX_WAIT * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main_()
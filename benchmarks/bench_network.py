@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: red mallada de distribución con el gradiente global (Todini)
+
+Genera una cuadrícula de N×N nudos (≈ 2·N² tuberías) con diámetros, materiales
+y demandas aleatorios, alimentada por una estación de bombeo desde un pozo y
+por un tanque elevado en la esquina opuesta. Mide la construcción de la red y
+la solución, y verifica la continuidad en los nudos y la energía en las mallas.
+Uso: python benchmarks/bench_network.py [N ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import network
+import operating_point
+
+MATERIALS = ["pvc", "ductile_iron", "hdpe", "steel"]
+DIAMETERS_MM = [100, 150, 200, 250, 300]
+
+
+def grid_network(size, seed=5):
+    rng = np.random.default_rng(seed)
+    node = lambda i, j: f"N{i}_{j}"
+    junctions = [
+        {"id": node(i, j), "elevation": float(rng.uniform(0, 15)), "demand": float(rng.uniform(0.05, 0.4))}
+        for i in range(size) for j in range(size)
+    ]
+    pipes = []
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((0, 1), (1, 0)):
+                if i + di < size and j + dj < size:
+                    pipes.append({
+                        "id": f"P{len(pipes)}",
+                        "start": node(i, j),
+                        "end": node(i + di, j + dj),
+                        "length": float(rng.uniform(50, 250)),
+                        "diameter": float(rng.choice(DIAMETERS_MM)),
+                        "material": str(rng.choice(MATERIALS)),
+                        "elbow_90": int(rng.integers(0, 3)),
+                    })
+    # Estación de bombeo: la demanda total a 35 m de altura
+    total = sum(j["demand"] for j in junctions) / 1000
+    pipes.append({"id": "impulsion", "start": "S", "end": node(0, 0), "length": 500, "diameter": 600,
+                  "material": "steel"})
+    pipes.append({"id": "tanque", "start": "T", "end": node(size - 1, size - 1), "length": 300, "diameter": 400,
+                  "material": "ductile_iron"})
+    junctions.append({"id": "S", "elevation": 0.0, "demand": 0.0})
+    reservoirs = [{"id": "W", "head": -3.0}, {"id": "T", "head": 40.0}]
+    pumps = [{"id": "estacion", "start": "W", "end": "S", "efficiency": 0.75}]
+    curve = operating_point.PumpCurve.synthetic(45.0, total * 0.7)
+    return junctions, reservoirs, pipes, pumps, curve
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [20, 50, 100, 120]
+    print(f"{'Nudos':>8}{'Tuberías':>10}{'Construir (s)':>15}{'Resolver (s)':>14}{'Iter.':>7}"
+          f"{'Continuidad (l/s)':>19}{'Energía (m)':>13}")
+    for size in sizes:
+        junctions, reservoirs, pipes, pumps, curve = grid_network(size)
+        start = time.perf_counter()
+        net = network.network_from_specs(junctions, reservoirs, pipes, pumps, curve)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        solution = network.solve(net)
+        solve = time.perf_counter() - start
+
+        # Continuidad: A12ᵀ·Q + d = 0; energía: H_inicio - H_fin = pérdida en cada tubería
+        imbalance = np.abs(net.a12.T @ solution["flow"] + net.demand).max() * 1000
+        n_pipes = net.n_pipes
+        head = solution["head"]
+        energy = np.abs(head[net.start[:n_pipes]] - head[net.end[:n_pipes]] - solution["headloss"]).max()
+        print(f"{len(junctions):>8,}{n_pipes:>10,}{build:>15.3f}{solve:>14.3f}{solution['iterations']:>7}"
+              f"{imbalance:>19.2e}{energy:>13.2e}")
+
+
+if __name__ == "__main__":
+    main()
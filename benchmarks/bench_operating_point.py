@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pares bomba/sistema resueltos por segundo con operating_point.solve
+
+Genera sistemas aleatorios (modelos de fricción mezclados) con curvas de bomba
+polinómicas y tabuladas, y compara una sola llamada vectorizada con resolver
+cada par por separado. Informa también el residuo |H_bomba - H_sistema|.
+Uso: python benchmarks/bench_operating_point.py [pares]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import operating_point
+
+
+def random_pairs(n, seed=7):
+    rng = np.random.default_rng(seed)
+    system = operating_point.SystemCurve(
+        rng.uniform(0, 60, n), rng.uniform(20, 3000, n), rng.uniform(0.05, 0.6, n),
+        rng.choice([0.0000015, 0.000045, 0.00015, 0.0003], n), rng.uniform(0, 25, n),
+        rng.choice(["swamee_jain", "colebrook", "haaland"], n),
+    )
+    design_flow = rng.uniform(0.005, 0.4, n)
+    design_head = system.head(design_flow) * rng.uniform(0.9, 1.1, n)
+
+    # Mitad polinómicas (H = A + B·Q + C·Q²), mitad tabuladas de 7 puntos
+    half = n // 2
+    shutoff = design_head * 1.3
+    c = -(shutoff - design_head) / design_flow**2
+    poly = operating_point.PumpCurve.polynomial(
+        np.stack([shutoff[:half], np.zeros(half), c[:half]], axis=1))
+    fractions = np.linspace(0, 1.8, 7)
+    q = design_flow[half:, None] * fractions
+    h = shutoff[half:, None] + c[half:, None] * q**2
+    table = operating_point.PumpCurve.tabulated_arrays(q, h)
+    return operating_point.PumpCurve.concat([poly, table]), system, design_flow
+
+
+def run():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    pump, system, design_flow = random_pairs(n)
+
+    start = time.perf_counter()
+    with np.errstate(invalid='ignore', over='ignore'):
+        flow, head, status = operating_point.solve(pump, system, design_flow)
+    vector_time = time.perf_counter() - start
+
+    # Un par por llamada (como haría un bucle sobre /calculate)
+    sample = min(n, 500)
+    start = time.perf_counter()
+    with np.errstate(invalid='ignore', over='ignore'):
+        for i in range(sample):
+            rows = np.array([i])
+            single = operating_point.SystemCurve(
+                system.geometric_height_m[rows], system.pipe_length_m[rows], system.diameter_m[rows],
+                system.roughness_mm[rows], system.total_k[rows], system.friction_model[rows])
+            operating_point.solve(pump.take(rows), single, design_flow[rows])
+    loop_time = (time.perf_counter() - start) / sample * n
+
+    solved = np.flatnonzero(status == operating_point.OK)
+    residual = np.abs(pump.head(flow[solved], solved) - system.head(flow[solved], solved))
+    counts = dict(zip(*np.unique(status, return_counts=True)))
+
+    print(f"Pares: {n} (mitad polinómicas, mitad tabuladas)")
+    print(f"{'Ruta':<30}{'Tiempo (s)':>12}{'Pares/s':>14}")
+    print(f"{'Vectorizado (una llamada)':<30}{vector_time:>12.4f}{n / vector_time:>14,.0f}")
+    print(f"{'Un par por llamada (estimado)':<30}{loop_time:>12.4f}{n / loop_time:>14,.0f}")
+    print(f"Aceleración: {loop_time / vector_time:.1f}x")
+    print(f"Estados: {', '.join(f'{k}={v}' for k, v in counts.items())}")
+    print(f"Residuo máximo |H_bomba - H_sistema|: {residual.max():.2e} m")
+    print(f"Desviación media del caudal de diseño: {np.nanmean(np.abs(flow / design_flow - 1)) * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: selección de bombas con un catálogo sintético grande
+
+Genera un catálogo de curvas H-Q / rendimiento / NPSHr (50.000 por defecto),
+mide la carga desde CSV y JSON, y compara consultas con el índice por caudal y
+altura del BEP contra revisar el catálogo completo. Verifica que ambos caminos
+devuelvan las mismas bombas.
+Uso: python benchmarks/bench_pump_select.py [bombas] [consultas]
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import operating_point
+import pump_catalog
+
+FRACTIONS = np.array([0, 0.25, 0.5, 0.75, 1.0, 1.15, 1.3, 1.45])
+
+
+def synthetic_pumps(n, seed=11):
+    rng = np.random.default_rng(seed)
+    bep_flow = np.exp(rng.uniform(np.log(1), np.log(1000), n))  # l/s
+    bep_head = np.exp(rng.uniform(np.log(5), np.log(150), n))  # m
+    bep_eff = rng.uniform(0.45, 0.88, n)
+    npsh = rng.uniform(1.5, 6, n)
+    shutoff = rng.uniform(1.1, 1.4, n)
+    pumps = []
+    for i in range(n):
+        x = FRACTIONS
+        pumps.append({
+            "model": f"SYN-{i:06d}",
+            "manufacturer": "Sintético",
+            "speed_rpm": 2900 if i % 2 else 1450,
+            "flow_ls": np.round(bep_flow[i] * x, 3).tolist(),
+            "head_m": np.round(bep_head[i] * (shutoff[i] - (shutoff[i] - 1) * x**2), 2).tolist(),
+            "efficiency": np.round(np.maximum(bep_eff[i] * (2 * x - x**2), 0), 4).tolist(),
+            "npshr_m": np.round(npsh[i] * (0.55 + 0.45 * x**2), 2).tolist(),
+        })
+    return pumps
+
+
+def write_files(pumps, directory):
+    json_path = os.path.join(directory, "pumps.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"_description": "sintético", "pumps": pumps}, f)
+    csv_path = os.path.join(directory, "pumps.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["model", "manufacturer", "speed_rpm", *pump_catalog.CURVE_FIELDS])
+        for p in pumps:
+            for point in zip(*(p[field] for field in pump_catalog.CURVE_FIELDS)):
+                writer.writerow([p["model"], p["manufacturer"], p["speed_rpm"], *point])
+    return json_path, csv_path
+
+
+def random_duties(n, seed=3):
+    rng = np.random.default_rng(seed)
+    duties = []
+    for _ in range(n):
+        flow = np.exp(rng.uniform(np.log(2), np.log(600))) / 1000
+        static = rng.uniform(0, 60)
+        system = operating_point.SystemCurve(static, rng.uniform(50, 3000), np.sqrt(4 * flow / (np.pi * 1.5)),
+                                             0.0015, rng.uniform(2, 15))
+        duties.append((system, flow, float(system.head(np.array([flow]))[0])))
+    return duties
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    pumps = synthetic_pumps(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, csv_path = write_files(pumps, tmp)
+        print(f"Catálogo de {n:,} bombas ({len(FRACTIONS)} puntos por curva)")
+        print(f"{'Carga':<12}{'s':>10}")
+        for label, path in (("JSON", json_path), ("CSV", csv_path)):
+            start = time.perf_counter()
+            catalog = pump_catalog.load_catalog(path)
+            print(f"{label:<12}{time.perf_counter() - start:>10.2f}")
+
+    duties = random_duties(queries)
+    print()
+    print(f"{'Modo':<22}{'s':>10}{'consultas/s':>14}{'ventana (media)':>18}{'resueltas (media)':>20}")
+    picks = {}
+    for label, indexed, count in (("Índice BEP", True, queries), ("Catálogo completo", False, min(queries, 20))):
+        window = evaluated = 0
+        start = time.perf_counter()
+        picks[indexed] = []
+        for system, flow, head in duties[:count]:
+            result = pump_catalog.select_pumps(catalog, system, flow, head, indexed=indexed)
+            window += result["window"]
+            evaluated += result["evaluated"]
+            picks[indexed].append([c["model"] for c in result["candidates"]])
+        elapsed = time.perf_counter() - start
+        print(f"{label:<22}{elapsed:>10.3f}{count / elapsed:>14,.0f}{window / count:>18,.1f}{evaluated / count:>20,.1f}")
+
+    checked = len(picks[False])
+    mismatches = sum(a != b for a, b in zip(picks[True], picks[False]))
+    found = sum(bool(p) for p in picks[True])
+    print(f"\nConsultas con al menos una bomba: {found}/{queries}")
+    print(f"Diferencias índice vs. catálogo completo: {mismatches}/{checked}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDFs/segundo con report_builder vs la versión anterior
+
+La versión anterior de build_report_pdf (importaciones, clase de plantilla,
+estilos y encabezado/pie rehechos en cada llamada) se carga desde el historial
+de git (LEGACY_REF) y se ejecuta en el espacio de nombres de main.
+Uso: python benchmarks/bench_report_builder.py [reportes] [vector|raster]
+"""
+import ast
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+
+# Último commit con el reporte construido dentro de build_report_pdf
+LEGACY_REF = os.environ.get("LEGACY_REF", "e5f40a3")
+
+test_data = main.PumpingStationInput(
+    project_name="Benchmark de reportes",
+    project_location="Ciudad de Prueba",
+    geometric_height=25.0, geometric_height_unit="m",
+    flow_rate=50.0, flow_rate_unit="l/s",
+    pipe_length=150.0, pipe_length_unit="m",
+    pipe_diameter=200.0, pipe_diameter_unit="mm",
+    pipe_material="pvc", pump_efficiency=0.75,
+    valve_gate=2, valve_check=1, elbow_90=4,
+)
+
+
+def load_legacy_builder():
+    source = subprocess.check_output(["git", "show", f"{LEGACY_REF}:main.py"], cwd=ROOT, text=True)
+    func = next(node for node in ast.parse(source).body
+                if isinstance(node, ast.FunctionDef) and node.name == "build_report_pdf")
+    namespace = dict(vars(main))
+    exec(compile(ast.Module(body=[func], type_ignores=[]), f"{LEGACY_REF}:main.py", "exec"), namespace)
+    return namespace["build_report_pdf"]
+
+
+def pdfs_per_second(builder, n, chart):
+    with contextlib.redirect_stdout(io.StringIO()):
+        builder(test_data, chart)  # Calentamiento
+        start = time.perf_counter()
+        for _ in range(n):
+            builder(test_data, chart)
+        elapsed = time.perf_counter() - start
+    return n / elapsed
+
+
+def run():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    chart = sys.argv[2] if len(sys.argv) > 2 else "vector"
+    legacy = load_legacy_builder()
+    rows = [
+        (f"Anterior ({LEGACY_REF})", pdfs_per_second(legacy, n, chart)),
+        ("report_builder", pdfs_per_second(main.build_report_pdf, n, chart)),
+    ]
+    print(f"Reportes: {n}, gráfico: {chart}")
+    print(f"{'Versión':<22}{'PDFs/s':>10}{'ms/PDF':>10}")
+    for label, rate in rows:
+        print(f"{label:<22}{rate:>10.1f}{1000 / rate:>10.1f}")
+    print(f"\nMejora: {rows[1][1] / rows[0][1]:.2f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: gráfico vectorial (ReportLab) vs PNG a 150 dpi en el reporte PDF
+
+Para un conjunto de entradas de prueba mide el tiempo del gráfico por sí solo,
+el tiempo total de build_report_pdf y el tamaño del PDF resultante con cada
+tipo de gráfico.
+Uso: python benchmarks/bench_report_chart.py [repeticiones]
+"""
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from reportlab.graphics import renderPDF
+from reportlab.lib.units import inch
+
+import charts
+import main
+
+BASE = dict(
+    project_name="Benchmark de gráfico", project_location="Ciudad de Prueba",
+    geometric_height_unit="m", flow_rate_unit="l/s", pipe_length_unit="m",
+    pipe_diameter_unit="mm", pipe_material="pvc", pump_efficiency=0.75,
+)
+CASES = [
+    dict(geometric_height=25.0, flow_rate=50.0, pipe_length=150.0, pipe_diameter=200.0, valve_gate=2, elbow_90=4),
+    dict(geometric_height=8.0, flow_rate=5.0, pipe_length=40.0, pipe_diameter=75.0, valve_check=1),
+    dict(geometric_height=60.0, flow_rate=250.0, pipe_length=1200.0, pipe_diameter=400.0, pipe_material="steel",
+         valve_butterfly=2, elbow_45=6),
+    dict(geometric_height=3.5, flow_rate=0.8, pipe_length=12.0, pipe_diameter=25.0, pipe_material="copper"),
+    dict(geometric_height=120.0, flow_rate=900.0, pipe_length=5000.0, pipe_diameter=800.0,
+         pipe_material="ductile_iron", valve_gate=4, valve_check=2, elbow_90=10),
+]
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def run():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    inputs = [main.PumpingStationInput(**{**BASE, **case}) for case in CASES]
+    totals = {chart: [0.0, 0.0, 0] for chart in main.CHART_FORMATS}
+
+    print(f"Entradas: {len(inputs)}, repeticiones: {repeats} (mediana)")
+    print(f"{'Caso':<6}{'Gráfico':<9}{'Gráfico ms':>12}{'Reporte ms':>12}{'PDF KB':>10}")
+    with contextlib.redirect_stdout(io.StringIO()) as quiet:
+        main.build_report_pdf(inputs[0], "raster")  # Calentamiento (esqueleto del gráfico, fuentes)
+        main.build_report_pdf(inputs[0], "vector")
+    for i, data in enumerate(inputs, 1):
+        with contextlib.redirect_stdout(quiet):
+            results = main.calculate_pumping_station(data)
+        chart_fns = {
+            "vector": lambda: renderPDF.drawToString(charts.pump_curve_drawing(results, 6*inch, 3.6*inch)),
+            "raster": lambda: charts.render_pump_curve_png(results),
+        }
+        for chart in main.CHART_FORMATS:
+            chart_s, _ = timed(chart_fns[chart], repeats)
+            with contextlib.redirect_stdout(quiet):
+                report_s, pdf = timed(lambda: main.build_report_pdf(data, chart), repeats)
+            totals[chart][0] += chart_s
+            totals[chart][1] += report_s
+            totals[chart][2] += len(pdf)
+            print(f"{i:<6}{chart:<9}{chart_s * 1000:>12.1f}{report_s * 1000:>12.1f}{len(pdf) / 1024:>10.1f}")
+
+    print("\nPromedio por reporte")
+    n = len(inputs)
+    for chart, (chart_s, report_s, size) in totals.items():
+        print(f"{chart:<15}{chart_s / n * 1000:>12.1f}{report_s / n * 1000:>12.1f}{size / n / 1024:>10.1f}")
+    vector, raster = totals["vector"], totals["raster"]
+    print(f"\nReporte {raster[1] / vector[1]:.1f}x más rápido y PDF {raster[2] / vector[2]:.1f}x más pequeño con gráfico vectorial")
+
+
+if __name__ == "__main__":
+    run()
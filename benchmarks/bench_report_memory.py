@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoria (tracemalloc) y tiempo por reporte PDF
+
+Compara el flujo actual (PNG en bytes directo a ReportLab) con el anterior, que
+codificaba el gráfico en base64, renderizaba report.html sin usarlo y volvía a
+decodificar la imagen. El flujo anterior se reproduce envolviendo
+generate_pump_curve_chart con esos pasos adicionales.
+
+Se reportan dos picos: el total (dominado por el lienzo Agg del gráfico, igual
+en ambos flujos) y el posterior al renderizado del PNG, que es donde difieren.
+Uso: python benchmarks/bench_report_memory.py [reportes]
+"""
+import base64
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+
+test_data = main.PumpingStationInput(
+    project_name="Benchmark de memoria",
+    project_location="Ciudad de Prueba",
+    geometric_height=25.0, geometric_height_unit="m",
+    flow_rate=50.0, flow_rate_unit="l/s",
+    pipe_length=150.0, pipe_length_unit="m",
+    pipe_diameter=200.0, pipe_diameter_unit="mm",
+    pipe_material="pvc", pump_efficiency=0.75,
+    valve_gate=2, valve_check=1, elbow_90=4,
+)
+
+render_chart = main.generate_pump_curve_chart
+reset_after_chart = False
+
+
+def current_chart(results):
+    png = render_chart(results)
+    if reset_after_chart and tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    return png
+
+
+def legacy_chart(results):
+    """PNG -> data URI -> report.html (descartado) -> bytes, como antes"""
+    chart_image = f"data:image/png;base64,{base64.b64encode(current_chart(results)).decode('utf-8')}"
+    main.templates.get_template("report.html").render(
+        data=dict(test_data), results=results,
+        current_date=datetime.now().strftime("%d/%m/%Y"), chart_image=chart_image)
+    return base64.b64decode(chart_image.split(',')[1])
+
+
+def traced_peak(n, after_chart):
+    global reset_after_chart
+    reset_after_chart = after_chart
+    peaks = []
+    for _ in range(n):
+        tracemalloc.start()
+        main.build_report_pdf(test_data)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return max(peaks) / 2**20
+
+
+def measure(chart, n):
+    """(pico total MiB, pico tras el gráfico MiB, segundos por reporte)"""
+    main.generate_pump_curve_chart = chart
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.build_report_pdf(test_data)  # Calentamiento (esqueleto del gráfico, fuentes)
+        total_peak = traced_peak(n, after_chart=False)
+        post_chart_peak = traced_peak(n, after_chart=True)
+        start = time.perf_counter()
+        for _ in range(n):
+            main.build_report_pdf(test_data)
+        seconds = (time.perf_counter() - start) / n
+    return total_peak, post_chart_peak, seconds
+
+
+def run():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rows = [
+        ("base64 + HTML (anterior)", measure(legacy_chart, n)),
+        ("Bytes directos (actual)", measure(current_chart, n)),
+    ]
+    print(f"Reportes por variante: {n}")
+    print(f"{'Flujo':<28}{'Pico total MiB':>16}{'Pico tras PNG MiB':>19}{'s/reporte':>11}")
+    for label, (total_peak, post_chart_peak, seconds) in rows:
+        print(f"{label:<28}{total_peak:>16.2f}{post_chart_peak:>19.2f}{seconds:>11.3f}")
+
+
+if __name__ == "__main__":
+    run()
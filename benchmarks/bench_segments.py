@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: impulsiones de varios tramos en /calculate/batch frente al cálculo escalar
+
+Genera impulsiones de 1 a 8 tramos con material, diámetro y accesorios propios,
+las calcula fila por fila y en una sola pasada vectorizada (tramos rellenados a
+un ancho común) y verifica que ambos caminos den la misma altura total.
+Uso: python benchmarks/bench_segments.py [filas] [tramos máximos]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # main.py monta frontend/ con rutas relativas
+
+import hydraulics
+import operating_point
+from main import PumpingStationInput, calculate_pumping_station
+
+MATERIALS = ["pvc", "steel", "ductile_iron", "hdpe", "concrete"]
+
+
+def random_inputs(n, max_segments, seed=7):
+    rng = np.random.default_rng(seed)
+    items = []
+    for _ in range(n):
+        diameter = float(rng.uniform(100, 500))
+        segments = [
+            {
+                "length": float(rng.uniform(20, 1500)),
+                "diameter": float(diameter * rng.uniform(0.8, 1.25)),
+                "material": str(rng.choice(MATERIALS)),
+                "valve_gate": int(rng.integers(0, 2)),
+                "elbow_90": int(rng.integers(0, 5)),
+                "elbow_45": int(rng.integers(0, 3)),
+            }
+            for _ in range(int(rng.integers(1, max_segments + 1)))
+        ]
+        items.append(PumpingStationInput(
+            geometric_height=float(rng.uniform(5, 60)),
+            geometric_height_unit="m",
+            flow_rate=float(rng.uniform(5, 200)),
+            flow_rate_unit="l/s",
+            pipe_length=1.0,
+            pipe_length_unit="m",
+            pipe_diameter=diameter,
+            pipe_diameter_unit="mm",
+            pipe_material="pvc",
+            pump_efficiency=float(rng.uniform(0.55, 0.85)),
+            valve_check=1,
+            segments=segments,
+        ))
+    return items
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    max_segments = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    items = random_inputs(n, max_segments)
+    total_segments = sum(len(item.segments) for item in items)
+    print(f"Filas: {n}  Tramos: {total_segments} (máximo {max_segments} por fila)")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scalar = [calculate_pumping_station(item) for item in items]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = hydraulics.columns_from_items(items)
+    formatted, bad = hydraulics.format_results(operating_point.with_design_points(hydraulics.calculate_batch(columns)))
+    records = hydraulics.to_records(formatted, bad)
+    batch_time = time.perf_counter() - start
+
+    print(f"{'Ruta':<24}{'s':>10}{'filas/s':>14}{'tramos/s':>14}")
+    for label, elapsed in (("Escalar", scalar_time), ("Lote vectorizado", batch_time)):
+        print(f"{label:<24}{elapsed:>10.4f}{n / elapsed:>14,.0f}{total_segments / elapsed:>14,.0f}")
+    print(f"Aceleración: {scalar_time / batch_time:.1f}x")
+
+    mismatches = sum(1 for x, y in zip(scalar, records) if x != y)
+    print(f"Filas distintas a la ruta escalar (incluido el detalle por tramo): {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: simulación extendida de un millón de pasos con memoria acotada
+
+Alimenta simulation.Simulator con una demanda generada paso a paso (nunca se
+arma la serie completa) y mide pasos/s y el crecimiento de la memoria residente
+(RSS máximo del proceso), con y sin la serialización NDJSON de cada paso.
+Uso: python benchmarks/bench_simulation.py [pasos]
+"""
+import math
+import os
+import sys
+import resource
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import operating_point
+import simulation
+
+
+def demand(steps, base=0.035):
+    # Ciclo diario con pasos de un minuto, generado de a un valor
+    for i in range(steps):
+        yield base * (1 + 0.5 * math.sin(2 * math.pi * i / 1440))
+
+
+def make_simulator():
+    system = operating_point.SystemCurve(20.0, 800.0, 0.25, 0.0015, 10.0)
+    design_flow = 0.06
+    pump = operating_point.PumpCurve.synthetic(system.head(np.array([design_flow])), design_flow)
+    return simulation.Simulator(pump, system, 0.7, simulation.TANK, 200.0, 5.0, 2.5, 1.5, 4.5,
+                                step_seconds=60, tariff=[0.08] * 7 + [0.15] * 16 + [0.08])
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{steps:,} pasos de 60 s")
+    print(f"{'Modo':<26}{'s':>10}{'pasos/s':>14}{'RSS +MB':>10}{'salida MB':>11}")
+    for label, serialize in (("Solo simulación", False), ("Con líneas NDJSON", True)):
+        simulator = make_simulator()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        written = 0
+        for part in simulation.simulate(simulator, demand(steps)):
+            if serialize:
+                text = simulation.step_lines(part) if "step" in part else simulation.summary_line(part)
+                written += len(text)
+            else:
+                summary = part
+        elapsed = time.perf_counter() - start
+        # ru_maxrss está en KB en Linux
+        growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+        print(f"{label:<26}{elapsed:>10.2f}{steps / elapsed:>14,.0f}{growth:>10.1f}{written / 1e6:>11.1f}")
+    print(f"\nEnergía {summary['energy_kwh']:,.0f} kWh, costo {summary['cost']:,.0f}, "
+          f"arranques {summary['starts']}, horas de bombeo {summary['pump_hours']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: golpe de ariete por el método de las características en una impulsión de 5 km
+
+Simula el corte de energía de la bomba y el cierre instantáneo de la válvula de
+descarga con mallas cada vez más finas. Mide el tiempo y los nudos·paso por
+segundo, y compara las envolventes con la malla más fina y la sobrepresión del
+cierre instantáneo con la de Joukowsky (aV/g, más el empaquetamiento por fricción).
+Uso: python benchmarks/bench_surge.py [tramos ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import surge
+
+LENGTH = 5000.0  # m
+DIAMETER = 0.4  # m
+FLOW = 0.2  # m³/s
+STATIC_HEAD = 30.0  # m
+DURATION = 60.0  # s
+
+
+def line(reaches):
+    return surge.SurgeLine([LENGTH], [DIAMETER], [surge.hydraulics.ROUGHNESS["steel"]], [3.0],
+                           [surge.WAVE_SPEEDS["steel"]], FLOW, STATIC_HEAD, reaches=reaches)
+
+
+def main():
+    reaches = [int(a) for a in sys.argv[1:]] or [250, 500, 1000, 2000, 5000]
+    print(f"Impulsión de {LENGTH / 1000:.0f} km, D = {DIAMETER * 1000:.0f} mm, Q = {FLOW * 1000:.0f} l/s, "
+          f"{DURATION:.0f} s simulados")
+    print(f"{'Escenario':<16}{'Tramos':>8}{'Pasos':>9}{'s':>9}{'nudos·paso/s':>15}{'H máx (m)':>11}{'H mín (m)':>11}")
+    envelopes = {}
+    for scenario, closure in ((surge.PUMP_TRIP, None), (surge.VALVE_CLOSURE, 0.0)):
+        for n in reaches:
+            grid = line(n)
+            start = time.perf_counter()
+            run = surge.simulate(grid, scenario, pump_efficiency=0.78, closure_time=closure or 0.0,
+                                 duration=DURATION)
+            elapsed = time.perf_counter() - start
+            envelopes[scenario, n] = (grid.x, run["max_head"], run["min_head"])
+            print(f"{scenario:<16}{n:>8,}{run['steps']:>9,}{elapsed:>9.2f}{run['steps'] * len(grid) / elapsed:>15,.0f}"
+                  f"{run['max_head'].max():>11.2f}{run['min_head'].min():>11.2f}")
+
+    finest = max(reaches)
+    print(f"\nDiferencia máxima de la envolvente frente a {finest:,} tramos (m)")
+    for scenario in (surge.PUMP_TRIP, surge.VALVE_CLOSURE):
+        x_ref, max_ref, min_ref = envelopes[scenario, finest]
+        for n in reaches[:-1]:
+            x, h_max, h_min = envelopes[scenario, n]
+            diff = max(np.abs(np.interp(x_ref, x, h_max) - max_ref).max(),
+                       np.abs(np.interp(x_ref, x, h_min) - min_ref).max())
+            print(f"{scenario:<16}{n:>8,}{diff:>10.2f}")
+
+    grid = line(finest)
+    run = surge.simulate(grid, surge.VALVE_CLOSURE, closure_time=0.0, duration=DURATION)
+    rise = run["max_head"][-1] - run["steady_head"][-1]
+    print(f"\nCierre instantáneo: sobrepresión en la válvula {rise:.2f} m, Joukowsky {run['joukowsky']:.2f} m, "
+          f"pérdidas de régimen {run['steady_head'][0] - run['steady_head'][-1]:.2f} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: análisis de incertidumbre por Monte Carlo
+
+Propaga la incertidumbre del caudal, la eficiencia de la bomba y la rugosidad de
+una tubería envejecida con N muestras vectorizadas, en uno o varios procesos.
+Mide el tiempo y las muestras por segundo, y comprueba la convergencia de los
+percentiles frente a la corrida con más muestras.
+Uso: python benchmarks/bench_uncertainty.py [muestras ...]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import uncertainty
+
+BASE = {
+    "geometric_height": 30.0, "geometric_height_unit": "m",
+    "flow_rate": 50.0, "flow_rate_unit": "l/s",
+    "pipe_length": 2.0, "pipe_length_unit": "km",
+    "pipe_diameter": 250.0, "pipe_diameter_unit": "mm",
+    "pipe_material": "steel", "pump_efficiency": 0.75,
+    "elbow_90": 4, "valve_gate": 1, "valve_check": 1,
+}
+SPECS = {
+    "flow_rate": {"distribution": "normal", "cv": 0.05},
+    "pump_efficiency": {"distribution": "triangular", "low": 0.65, "high": 0.80},
+    # Tubería envejecida: rugosidad entre la nueva y varias veces mayor
+    "roughness": {"distribution": "lognormal", "mean": 0.5, "cv": 0.6},
+}
+
+
+def main():
+    counts = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    workers = sorted({1, uncertainty.MAX_WORKERS})
+    print(f"{'Muestras':>10}{'Procesos':>10}{'s':>8}{'muestras/s':>14}{'H p5':>9}{'H p50':>9}{'H p95':>9}"
+          f"{'kW p95':>9}")
+    runs = {}
+    for n in counts:
+        for w in workers:
+            start = time.perf_counter()
+            result = uncertainty.analyze(BASE, SPECS, samples=n, seed=7, workers=w)
+            elapsed = time.perf_counter() - start
+            runs[n] = result
+            head = result["total_head"]["percentiles"]
+            print(f"{n:>10,}{w:>10}{elapsed:>8.3f}{n / elapsed:>14,.0f}{head['p5']:>9.3f}{head['p50']:>9.3f}"
+                  f"{head['p95']:>9.3f}{result['power_kw']['percentiles']['p95']:>9.3f}")
+
+    reference = runs[max(counts)]
+    print(f"\nDiferencia de percentiles frente a {max(counts):,} muestras")
+    for n in counts[:-1]:
+        diff = max(abs(runs[n][key]["percentiles"][p] - reference[key]["percentiles"][p])
+                   for key in uncertainty.OUTPUTS for p in reference[key]["percentiles"])
+        print(f"{n:>10,}{diff:>10.3f}")
+
+    print(f"\nSensibilidad ({max(counts):,} muestras): Spearman / primer orden")
+    for key in uncertainty.OUTPUTS:
+        indices = reference[key]["sensitivity"]
+        print(f"{key:<12}" + "".join(f"{field:>18} {v['spearman']:+.3f}/{v['first_order']:.3f}"
+                                      for field, v in indices.items()))
+    uncertainty.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga: latencia p99 de /calculate mientras se generan reportes PDF
+
+Requiere el servidor en marcha (por defecto http://localhost:8001, como pdf_test.py).
+Uso: python benchmarks/load_report_pool.py [peticiones_calculate] [hilos_reporte]
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.environ.get("BASE_URL", "http://localhost:8001")
+
+test_data = {
+    "project_name": "Prueba de carga",
+    "project_location": "Ciudad de Prueba",
+    "geometric_height": 25.0,
+    "geometric_height_unit": "m",
+    "flow_rate": 50.0,
+    "flow_rate_unit": "l/s",
+    "pipe_length": 150.0,
+    "pipe_length_unit": "m",
+    "pipe_diameter": 200.0,
+    "pipe_diameter_unit": "mm",
+    "pipe_material": "pvc",
+    "pump_efficiency": 0.75,
+    "valve_gate": 2,
+    "valve_check": 1,
+    "elbow_90": 4,
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def measure_calculate(n, concurrency=4):
+    """Latencias (ms) de n peticiones a /calculate"""
+    session = requests.Session()
+
+    def one(_):
+        start = time.perf_counter()
+        response = session.post(f"{BASE_URL}/calculate", json=test_data)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(one, range(n)))
+
+
+def report_load(stop, counters):
+    """Pedir reportes sin pausa hasta que se active 'stop'"""
+    session = requests.Session()
+    while not stop.is_set():
+        response = session.post(f"{BASE_URL}/generate-report", json=test_data)
+        key = "pdf" if response.content.startswith(b"%PDF") else str(response.status_code)
+        counters[key] = counters.get(key, 0) + 1
+        if response.status_code == 503:
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+
+
+def summary(label, latencies):
+    print(f"{label:<34}{percentile(latencies, 50):>10.1f}{percentile(latencies, 99):>10.1f}{max(latencies):>10.1f}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    report_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    measure_calculate(20)  # Calentamiento
+    idle = measure_calculate(n)
+
+    stop = threading.Event()
+    counters = {}
+    threads = [threading.Thread(target=report_load, args=(stop, counters)) for _ in range(report_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1.0)  # Dejar que los reportes ocupen el servidor
+    loaded = measure_calculate(n)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"{'/calculate (ms)':<34}{'p50':>10}{'p99':>10}{'máx':>10}")
+    summary("Sin reportes", idle)
+    summary(f"Con {report_threads} clientes de reportes", loaded)
+    print(f"Respuestas de /generate-report: {counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Streaming containers for report bundles.
+
+PdfConcatenator appends whole ReportLab PDFs to a single output document as
+each one arrives: their objects are renumbered and written out at once, and
+only the page tree, the bookmarks and the cross-reference table wait for
+close(). ZipStream writes ZIP entries without seeking back, using data
+descriptors. Both return the bytes produced by every call, so a response can
+stream the bundle while later reports are still rendering.
+
+The PDF parser only handles what ReportLab writes: one classic xref table,
+object references in the dictionaries (never inside streams), no object
+streams and no encryption.
+"""
+import re
+import zipfile
+
+from streams import ByteDrain
+
+PDF_HEADER = b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n"
+OBJECT_RE = re.compile(rb"(\d+)\s+0\s+obj")
+REF_RE = re.compile(rb"(\d+) 0 R")
+STREAM_RE = re.compile(rb">>\s*stream\r?\n")
+KIDS_RE = re.compile(rb"/Kids\s*\[([^\]]*)\]")
+STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+XREF_ENTRY_RE = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+
+
+def pdf_objects(pdf):
+    """
+    ``({number: body}, trailer)`` of a PDF, where ``body`` is the text between
+    ``N 0 obj`` and ``endobj``.
+    """
+    match = STARTXREF_RE.search(pdf[-64:])
+    if match is None:
+        raise ValueError("PDF sin tabla de referencias cruzadas")
+    xref = int(match.group(1))
+    section, _, trailer = pdf[xref:].partition(b"trailer")
+    offsets = {}
+    number = 0
+    for line in section.splitlines()[1:]:
+        entry = XREF_ENTRY_RE.match(line)
+        if entry is None:
+            if line.split():
+                number = int(line.split()[0])  # Subsección "primero cantidad"
+            continue
+        if entry.group(3) == b"n":
+            offsets[number] = int(entry.group(1))
+        number += 1
+
+    objects = {}
+    ends = sorted(offsets.values()) + [xref]
+    following = dict(zip(ends, ends[1:]))
+    for number, offset in offsets.items():
+        text = pdf[offset:following[offset]]
+        header = OBJECT_RE.match(text)
+        if header is None or int(header.group(1)) != number:
+            raise ValueError(f"Objeto {number} del PDF no encontrado en su posición")
+        objects[number] = text[header.end():text.rindex(b"endobj")].strip(b"\r\n ")
+    return objects, trailer
+
+
+def trailer_ref(trailer, key):
+    match = re.search(rb"/" + key + rb"\s+(\d+) 0 R", trailer)
+    return int(match.group(1)) if match else None
+
+
+def pdf_text(text):
+    """PDF text string (UTF-16BE hex with BOM, so accents survive)."""
+    return b"<FEFF" + text.encode("utf-16-be").hex().upper().encode() + b">"
+
+
+class PdfConcatenator:
+    """One PDF built from the pages of several ReportLab PDFs, in the order they are added."""
+    CATALOG, PAGES, OUTLINES, INFO = 1, 2, 3, 4
+    media_type = "application/pdf"
+    extension = "pdf"
+
+    def __init__(self, title=""):
+        self.title = title
+        self.offsets = {}
+        self.position = 0
+        self.next_id = self.INFO + 1
+        self.pages = []
+        self.bookmarks = []  # (título, primera página)
+
+    def _object(self, number, body):
+        self.offsets[number] = self.position
+        data = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        self.position += len(data)
+        return data
+
+    def start(self):
+        self.position = len(PDF_HEADER)
+        return PDF_HEADER
+
+    def add(self, name, pdf):
+        """Append the pages of ``pdf`` under the bookmark ``name``; returns the bytes written."""
+        objects, trailer = pdf_objects(pdf)
+        catalog = trailer_ref(trailer, b"Root")
+        root = int(re.search(rb"/Pages (\d+) 0 R", objects[catalog]).group(1))
+        skip = {catalog, trailer_ref(trailer, b"Info")}
+        outlines = re.search(rb"/Outlines (\d+) 0 R", objects[catalog])
+        if outlines:
+            skip.add(int(outlines.group(1)))
+
+        # Los nodos del árbol de páginas se sustituyen por el árbol del documento combinado
+        pages, tree, nodes = [], set(), [root]
+        while nodes:
+            node = nodes.pop(0)
+            kids = KIDS_RE.search(objects[node])
+            if kids is None:
+                pages.append(node)
+            else:
+                nodes[:0] = [int(ref) for ref in REF_RE.findall(kids.group(1))]
+                tree.add(node)
+        skip |= tree
+
+        mapping = {node: self.PAGES for node in tree}
+        for number in sorted(objects):
+            if number not in skip:
+                mapping[number] = self.next_id
+                self.next_id += 1
+
+        def renumber(match):
+            new = mapping.get(int(match.group(1)))
+            return b"%d 0 R" % new if new is not None else b"null"
+
+        out = []
+        for number in sorted(objects):
+            if number in skip:
+                continue
+            body = objects[number]
+            stream = STREAM_RE.search(body)
+            head, tail = (body[:stream.start()], body[stream.start():]) if stream else (body, b"")
+            out.append(self._object(mapping[number], REF_RE.sub(renumber, head) + tail))
+        self.bookmarks.append((name, mapping[pages[0]]))
+        self.pages += [mapping[page] for page in pages]
+        return b"".join(out)
+
+    def close(self):
+        """Page tree, bookmarks, catalog and cross-reference table."""
+        out = []
+        items = list(range(self.next_id, self.next_id + len(self.bookmarks)))
+        self.next_id += len(items)
+        for i, (number, (name, page)) in enumerate(zip(items, self.bookmarks)):
+            links = b"".join([b" /Prev %d 0 R" % items[i - 1] if i else b"",
+                              b" /Next %d 0 R" % items[i + 1] if i + 1 < len(items) else b""])
+            out.append(self._object(number, b"<< /Title %s /Parent %d 0 R%s /Dest [ %d 0 R /Fit ] >>"
+                                    % (pdf_text(name), self.OUTLINES, links, page)))
+        ends = b" /First %d 0 R /Last %d 0 R" % (items[0], items[-1]) if items else b""
+        out.append(self._object(self.OUTLINES, b"<< /Type /Outlines%s /Count %d >>" % (ends, len(items))))
+        kids = b" ".join(b"%d 0 R" % page for page in self.pages)
+        out.append(self._object(self.PAGES, b"<< /Type /Pages /Kids [ %s ] /Count %d >>" % (kids, len(self.pages))))
+        out.append(self._object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R /Outlines %d 0 R /PageMode /UseOutlines >>"
+                                % (self.PAGES, self.OUTLINES)))
+        out.append(self._object(self.INFO, b"<< /Title %s /Producer (ReportLab PDF Library) >>" % pdf_text(self.title)))
+
+        xref = [b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id]
+        xref += [b"%010d 00000 n \n" % self.offsets[number] for number in range(1, self.next_id)]
+        xref.append(b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self.next_id, self.CATALOG, self.INFO, self.position))
+        return b"".join(out + xref)
+
+
+class ZipStream:
+    """ZIP archive written entry by entry, without seeking back."""
+    media_type = "application/zip"
+    extension = "zip"
+
+    def __init__(self):
+        self.sink = ByteDrain()
+        self.archive = zipfile.ZipFile(self.sink, "w", zipfile.ZIP_DEFLATED)
+
+    def start(self):
+        return b""
+
+    def add(self, name, content):
+        self.archive.writestr(name, content)
+        return self.sink.drain()
+
+    def close(self):
+        self.archive.close()
+        return self.sink.drain()
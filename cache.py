@@ -0,0 +1,138 @@
+"""
+Content-addressed cache for calculation results and rendered PDFs.
+
+Keys are SHA-256 hashes of the canonical JSON of the input model, so the same
+PumpingStationInput always maps to the same entry. Each cache keeps a
+size-bounded LRU in memory and, if a directory is configured, a second disk
+tier that survives restarts and is shared by every worker process.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Cambiar al modificar el cálculo o el formato del reporte para invalidar el disco
+CACHE_VERSION = "2"
+
+
+def canonical_key(namespace, payload, exclude=(), extra=None):
+    """SHA-256 of the canonical JSON of a model (or dict), minus ``exclude`` fields."""
+    if hasattr(payload, "dict"):
+        payload = payload.dict()
+    payload = {k: v for k, v in payload.items() if k not in exclude}
+    canonical = json.dumps([CACHE_VERSION, namespace, payload, extra],
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Byte-bounded LRU of bytes values with an optional disk tier"""
+
+    def __init__(self, name, max_bytes, disk_dir=None, disk_max_bytes=0):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) / name if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_bytes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*"))
+
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / key
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.disk_dir is not None:
+            try:
+                value = self._disk_path(key).read_bytes()
+            except OSError:
+                value = None
+            if value is not None:
+                self._put_memory(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self._put_memory(key, value)
+        if self.disk_dir is not None:
+            self._put_disk(key, value)
+
+    def _put_memory(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def _put_disk(self, key, value):
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{key}.{os.getpid()}.tmp")
+        tmp.write_bytes(value)
+        os.replace(tmp, path)
+        self._disk_bytes += len(value)
+        if self._disk_bytes > self.disk_max_bytes:
+            self._trim_disk()
+
+    def _trim_disk(self):
+        # Borrar los archivos menos usados hasta quedar en el 90% del límite
+        files = sorted(self.disk_dir.glob("*/*"), key=lambda p: p.stat().st_atime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.disk_max_bytes * 0.9:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_bytes": self._disk_bytes if self.disk_dir is not None else None,
+            }
+
+
+def from_env(name, default_mb):
+    """Build a cache sized by <NAME>_CACHE_MAX_MB, with the disk tier under CACHE_DIR if set."""
+    max_mb = float(os.environ.get(f"{name.upper()}_CACHE_MAX_MB", default_mb))
+    disk_mb = float(os.environ.get("CACHE_DISK_MAX_MB", 512))
+    return LRUCache(name, int(max_mb * 1024 * 1024), os.environ.get("CACHE_DIR") or None,
+                    int(disk_mb * 1024 * 1024))
@@ -0,0 +1,309 @@
+"""
+Pump curve chart renderer built on the object-oriented Figure/FigureCanvasAgg API.
+
+The figure skeleton (three flow axes, grid, styling, legend, line artists and
+the annotation box) is built once per thread and reused: each render only
+updates line data, axis limits and the annotation. Nothing touches the global
+pyplot state, so charts can be rendered from several threads at once.
+
+pump_curve_drawing() draws the same chart as native ReportLab vector graphics
+for the PDF report; the PNG renderer remains as the raster fallback.
+"""
+import io
+import threading
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import hydraulics
+
+M3S_TO_LS = 1000
+M3S_TO_GPM = 15850.3
+
+PRIMARY_COLOR = '#1B2951'
+LS_COLOR = '#00BFFF'
+GPM_COLOR = '#FF6B35'
+
+
+def _clip_top(flow, head, top):
+    """Cut a rising curve where it leaves the plot, ending exactly on the top edge."""
+    above = np.flatnonzero(head > top)
+    if above.size == 0 or above[0] == 0:
+        return flow, head
+    i = above[0]
+    crossing = flow[i - 1] + (top - head[i - 1]) * (flow[i] - flow[i - 1]) / (head[i] - head[i - 1])
+    return np.append(flow[:i], crossing), np.append(head[:i], top)
+
+
+def curve_data(results):
+    """
+    Pump and system curves, operating point and axis limits shared by both
+    renderers, taken from the calculate_pumping_station result so the chart
+    shows the same curves and solved operating point as the API and the web UI.
+    """
+    flow_design = results.get('flow_rate_m3s', 0.05)
+    pump_head = np.array([point['head'] for point in results['pump_curve']], dtype=float)
+    system_head = np.array([point['head'] for point in results['system_curve']], dtype=float)
+    # Caudales exactos de la curva (los de la respuesta están redondeados a 4 decimales)
+    flow = np.linspace(0, flow_design * hydraulics.RUNOUT_FACTOR, len(pump_head))
+
+    point = results.get('operating_point') or {}
+    if point.get('flow') is not None:
+        op_flow, op_head = point['flow'], point['head']
+    else:
+        # Sin intersección: se marca el punto de diseño
+        op_flow, op_head = flow_design, results.get('total_head', 20)
+
+    # Set limits with some padding
+    top = max(pump_head.max(), op_head) * 1.2
+    bottom = min(0.0, system_head.min() * 1.1)
+    system_flow, system_head = _clip_top(flow, system_head, top)
+
+    return {
+        'flow': flow,
+        'pump_head': pump_head,
+        'system_flow': system_flow,
+        'system_head': system_head,
+        'flow_design': op_flow,
+        'total_head': op_head,
+        'annotation_xy': (flow[-1] * 0.07, bottom + (top - bottom) * 0.55),
+        'xlim': (0, flow[-1] * 1.05),
+        'ylim': (bottom, top),
+    }
+
+
+def annotation_text(flow_design, total_head):
+    return (f'Punto de Operación\n'
+            f'Q = {flow_design:.4f} m³/s\n'
+            f'Q = {flow_design * M3S_TO_LS:.1f} l/s\n'
+            f'Q = {flow_design * M3S_TO_GPM:.0f} GPM\n'
+            f'H = {total_head:.1f} m')
+
+
+class PumpCurveChart:
+    """Reusable figure skeleton for the report's pump curve chart"""
+
+    def __init__(self):
+        self.figure = Figure(figsize=(12, 8))
+        FigureCanvasAgg(self.figure)
+        # Márgenes fijos en lugar de bbox_inches='tight', que obliga a una segunda
+        # pasada de maquetación del texto en cada guardado
+        self.figure.subplots_adjust(left=0.07, right=0.98, bottom=0.08, top=0.85)
+        ax1 = self.figure.add_subplot()
+        self.ax = ax1
+
+        self.pump_line, = ax1.plot([], [], 'b-', linewidth=3, label='Curva de Bomba', zorder=3)
+        self.operating_point, = ax1.plot([], [], 'ro', markersize=10, label='Punto de Operación', zorder=4)
+        self.system_line, = ax1.plot([], [], 'g--', linewidth=2.5, label='Curva del Sistema', zorder=2)
+
+        # PRIMARY AXIS (m³/s) - Bottom
+        ax1.set_xlabel('Caudal (m³/s)', fontsize=12, fontweight='bold', color=PRIMARY_COLOR)
+        ax1.set_ylabel('Altura (m)', fontsize=12, fontweight='bold', color=PRIMARY_COLOR)
+        ax1.tick_params(axis='x', colors=PRIMARY_COLOR, labelsize=10)
+        ax1.tick_params(axis='y', colors=PRIMARY_COLOR, labelsize=10)
+
+        # SECONDARY AXIS (l/s) - Top; sigue los límites del eje principal automáticamente
+        ax2 = ax1.secondary_xaxis('top', functions=(lambda q: q * M3S_TO_LS, lambda q: q / M3S_TO_LS))
+        ax2.set_xlabel('Caudal (l/s)', fontsize=12, fontweight='bold', color=LS_COLOR)
+        ax2.tick_params(axis='x', colors=LS_COLOR, labelsize=10)
+
+        # THIRD AXIS (GPM) - Top, desplazado hacia afuera
+        ax3 = ax1.secondary_xaxis('top', functions=(lambda q: q * M3S_TO_GPM, lambda q: q / M3S_TO_GPM))
+        ax3.spines['top'].set_position(('outward', 40))
+        ax3.set_xlabel('Caudal (GPM)', fontsize=12, fontweight='bold', color=GPM_COLOR)
+        ax3.tick_params(axis='x', colors=GPM_COLOR, labelsize=10)
+
+        # Grid and styling
+        ax1.grid(True, alpha=0.4, linestyle='--', color='gray')
+        ax1.set_facecolor('#FAFBFC')
+
+        # Legend positioned in bottom right corner
+        ax1.legend(loc='lower right', frameon=True, fancybox=True, shadow=True,
+                   fontsize=11, bbox_to_anchor=(0.98, 0.02))
+
+        self.annotation = ax1.annotate(
+            '', xy=(0, 0), xytext=(0, 0),
+            arrowprops=dict(arrowstyle='->', color='red', lw=2),
+            fontsize=9, ha='left', va='center',
+            bbox=dict(boxstyle='round,pad=0.4', facecolor='yellow',
+                      edgecolor='red', alpha=0.9, linewidth=1.5))
+
+    def update(self, results):
+        """Load one calculation's curves, operating point and limits into the skeleton."""
+        curves = curve_data(results)
+        flow_design, total_head = curves['flow_design'], curves['total_head']
+
+        self.pump_line.set_data(curves['flow'], curves['pump_head'])
+        self.operating_point.set_data([flow_design], [total_head])
+        self.system_line.set_data(curves['system_flow'], curves['system_head'])
+
+        self.annotation.set_text(annotation_text(flow_design, total_head))
+        self.annotation.xy = (flow_design, total_head)
+        self.annotation.set_position(curves['annotation_xy'])
+
+        self.ax.set_xlim(*curves['xlim'])
+        self.ax.set_ylim(*curves['ylim'])
+
+    def render_png(self, results, dpi=150):
+        self.update(results)
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format='png', dpi=dpi)
+        return buffer.getvalue()
+
+
+_local = threading.local()
+
+
+def get_chart():
+    """The calling thread's chart skeleton, built on first use."""
+    chart = getattr(_local, 'chart', None)
+    if chart is None:
+        chart = _local.chart = PumpCurveChart()
+    return chart
+
+
+def render_pump_curve_png(results, dpi=150):
+    """Render the pump curve chart for a calculate_pumping_station result as PNG bytes."""
+    return get_chart().render_png(results, dpi=dpi)
+
+
+# Gráfico vectorial nativo de ReportLab (sin rasterizar)
+
+VECTOR_FONT = 'Helvetica'
+VECTOR_BOLD = 'Helvetica-Bold'
+GRID_COLOR = '#B3B3B3'
+FACE_COLOR = '#FAFBFC'
+GPM_OFFSET = 24  # Separación en puntos del eje GPM sobre el eje l/s
+
+
+def nice_ticks(lo, hi, nbins=8):
+    """Tick positions within [lo, hi] chosen like matplotlib's default locator."""
+    from matplotlib.ticker import MaxNLocator
+    ticks = MaxNLocator(nbins=nbins, steps=[1, 2, 2.5, 5, 10]).tick_values(lo, hi)
+    span = (hi - lo) * 1e-9
+    return [t for t in ticks if lo - span <= t <= hi + span]
+
+
+def tick_labels(ticks):
+    """Shortest fixed-point labels that still tell every tick apart."""
+    step = abs(ticks[1] - ticks[0]) if len(ticks) > 1 else 1.0
+    for decimals in range(10):
+        labels = [f'{t:.{decimals}f}' for t in ticks]
+        if all(abs(float(label) - t) < step * 1e-6 for label, t in zip(labels, ticks)):
+            return labels
+    return [f'{t:g}' for t in ticks]
+
+
+def pump_curve_drawing(results, width, height):
+    """
+    Draw the pump curve chart as a ReportLab Drawing of ``width`` x ``height``
+    points: the same curves, operating point, annotation and three flow axes
+    (m³/s, l/s, GPM) as the raster chart, embedded as PDF vector graphics.
+    """
+    from reportlab.graphics.shapes import Circle, Drawing, Group, Line, PolyLine, Polygon, Rect, String
+    from reportlab.lib.colors import HexColor, black, white
+
+    curves = curve_data(results)
+    x0, x1 = curves['xlim']
+    y0, y1 = curves['ylim']
+    left, right = 44, width - 6
+    bottom, top = 30, height - 48
+
+    def px(q):
+        return left + (q - x0) / (x1 - x0) * (right - left)
+
+    def py(h):
+        return bottom + (h - y0) / (y1 - y0) * (top - bottom)
+
+    def points(xs, ys):
+        return [c for pair in zip(map(px, xs), map(py, ys)) for c in pair]
+
+    primary, ls, gpm = HexColor(PRIMARY_COLOR), HexColor(LS_COLOR), HexColor(GPM_COLOR)
+    drawing = Drawing(width, height)
+    drawing.add(Rect(left, bottom, right - left, top - bottom,
+                     fillColor=HexColor(FACE_COLOR), strokeColor=None))
+
+    # Grid and primary axes (m³/s abajo, altura a la izquierda)
+    grid = dict(strokeColor=HexColor(GRID_COLOR), strokeWidth=0.4, strokeDashArray=[2, 2])
+    x_ticks = nice_ticks(x0, x1)
+    y_ticks = nice_ticks(y0, y1)
+    for q, label in zip(x_ticks, tick_labels(x_ticks)):
+        drawing.add(Line(px(q), bottom, px(q), top, **grid))
+        drawing.add(Line(px(q), bottom, px(q), bottom - 3, strokeColor=primary, strokeWidth=0.5))
+        drawing.add(String(px(q), bottom - 10, label, fontName=VECTOR_FONT, fontSize=6,
+                           fillColor=primary, textAnchor='middle'))
+    for h, label in zip(y_ticks, tick_labels(y_ticks)):
+        drawing.add(Line(left, py(h), right, py(h), **grid))
+        drawing.add(Line(left, py(h), left - 3, py(h), strokeColor=primary, strokeWidth=0.5))
+        drawing.add(String(left - 5, py(h) - 2, label, fontName=VECTOR_FONT, fontSize=6,
+                           fillColor=primary, textAnchor='end'))
+    drawing.add(String((left + right) / 2, 4, 'Caudal (m³/s)', fontName=VECTOR_BOLD, fontSize=7,
+                       fillColor=primary, textAnchor='middle'))
+    y_label = Group(String(0, 0, 'Altura (m)', fontName=VECTOR_BOLD, fontSize=7,
+                           fillColor=primary, textAnchor='middle'))
+    y_label.translate(10, (bottom + top) / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+
+    # Secondary flow axes on top: l/s on the plot frame, GPM shifted outward
+    for factor, color, unit, axis_y in ((M3S_TO_LS, ls, 'l/s', top),
+                                        (M3S_TO_GPM, gpm, 'GPM', top + GPM_OFFSET)):
+        ticks = nice_ticks(x0 * factor, x1 * factor)
+        drawing.add(Line(left, axis_y, right, axis_y, strokeColor=black, strokeWidth=0.6))
+        for value, label in zip(ticks, tick_labels(ticks)):
+            x = px(value / factor)
+            drawing.add(Line(x, axis_y, x, axis_y + 3, strokeColor=color, strokeWidth=0.5))
+            drawing.add(String(x, axis_y + 5, label, fontName=VECTOR_FONT, fontSize=6,
+                               fillColor=color, textAnchor='middle'))
+        drawing.add(String((left + right) / 2, axis_y + 13, f'Caudal ({unit})', fontName=VECTOR_BOLD,
+                           fontSize=7, fillColor=color, textAnchor='middle'))
+
+    drawing.add(Rect(left, bottom, right - left, top - bottom, fillColor=None,
+                     strokeColor=black, strokeWidth=0.6))
+
+    # Curves and operating point, in the raster chart's z-order
+    drawing.add(PolyLine(points(curves['system_flow'], curves['system_head']), strokeColor=HexColor('#008000'),
+                         strokeWidth=1.25, strokeDashArray=[4, 2]))
+    drawing.add(PolyLine(points(curves['flow'], curves['pump_head']), strokeColor=HexColor('#0000FF'),
+                         strokeWidth=1.5))
+    op_x, op_y = px(curves['flow_design']), py(curves['total_head'])
+    drawing.add(Circle(op_x, op_y, 2.5, fillColor=HexColor('#FF0000'), strokeColor=None))
+
+    # Annotation box with an arrow to the operating point
+    lines = annotation_text(curves['flow_design'], curves['total_head']).split('\n')
+    box_x, box_mid = px(curves['annotation_xy'][0]), py(curves['annotation_xy'][1])
+    box_w, box_h = 76, len(lines) * 6.5 + 5
+    box_y = box_mid - box_h / 2
+    drawing.add(Line(box_x + box_w, box_mid, op_x - 2.5, op_y, strokeColor=HexColor('#FF0000'),
+                     strokeWidth=0.8))
+    dx, dy = op_x - (box_x + box_w), op_y - box_mid
+    norm = max((dx * dx + dy * dy) ** 0.5, 1e-9)
+    ux, uy = dx / norm, dy / norm
+    tip_x, tip_y = op_x - 2.5 * ux, op_y - 2.5 * uy
+    drawing.add(Polygon([tip_x, tip_y,
+                         tip_x - 5 * ux + 2 * uy, tip_y - 5 * uy - 2 * ux,
+                         tip_x - 5 * ux - 2 * uy, tip_y - 5 * uy + 2 * ux],
+                        fillColor=HexColor('#FF0000'), strokeColor=None))
+    drawing.add(Rect(box_x, box_y, box_w, box_h, rx=3, ry=3, fillColor=HexColor('#FFFF00'),
+                     fillOpacity=0.9, strokeColor=HexColor('#FF0000'), strokeWidth=0.75))
+    for i, line in enumerate(lines):
+        drawing.add(String(box_x + 4, box_y + box_h - 8 - i * 6.5, line, fontName=VECTOR_FONT,
+                           fontSize=5.5, fillColor=black))
+
+    # Legend in the bottom right corner
+    entries = (('Curva de Bomba', '#0000FF', None), ('Punto de Operación', '#FF0000', 'marker'),
+               ('Curva del Sistema', '#008000', [4, 2]))
+    legend_w, legend_h = 92, len(entries) * 9 + 4
+    legend_x, legend_y = right - legend_w - 4, bottom + 4
+    drawing.add(Rect(legend_x, legend_y, legend_w, legend_h, rx=2, ry=2, fillColor=white,
+                     fillOpacity=0.8, strokeColor=HexColor('#CCCCCC'), strokeWidth=0.5))
+    for i, (label, color, style) in enumerate(entries):
+        y = legend_y + legend_h - 7 - i * 9
+        if style == 'marker':
+            drawing.add(Circle(legend_x + 12, y + 2, 2, fillColor=HexColor(color), strokeColor=None))
+        else:
+            drawing.add(Line(legend_x + 4, y + 2, legend_x + 20, y + 2, strokeColor=HexColor(color),
+                             strokeWidth=1.25, strokeDashArray=style))
+        drawing.add(String(legend_x + 24, y, label, fontName=VECTOR_FONT, fontSize=6, fillColor=black))
+    return drawing
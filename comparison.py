@@ -0,0 +1,247 @@
+"""
+Side-by-side comparison of design alternatives against a baseline station.
+
+Each variant overrides some PumpingStationInput fields of the baseline
+(material, diameter, number of check valves, ...). All alternatives are
+computed together and returned with their head, power and annual energy, the
+deltas against the baseline and their rank.
+
+The incremental mode splits the calculation in stages. The friction stage
+(velocity, Reynolds, friction factor and friction head loss) only depends on
+FRICTION_FIELDS, so it is computed once per distinct pipe and kept in a cache
+between requests; the minor losses, the static head and the power are cheap
+and always recomputed. A variant that only changes fittings reuses the pipe
+hydraulics of the baseline and only evaluates total_k·v²/2g. Both modes give
+the same numbers as /calculate.
+"""
+import json
+
+import numpy as np
+
+import cache
+import hydraulics
+
+# Campos que determinan la etapa de fricción (el fluido fija la viscosidad y la
+# densidad); el resto (accesorios, altura geométrica y eficiencia) se evalúa siempre
+FRICTION_FIELDS = ('flow_rate', 'flow_rate_unit', 'pipe_length', 'pipe_length_unit',
+                   'pipe_diameter', 'pipe_diameter_unit', 'pipe_material', 'friction_model',
+                   'segments') + hydraulics.FLUID_FIELDS
+VARIANT_FIELDS = hydraulics.REQUIRED_FIELDS + hydraulics.FITTING_FIELDS + hydraulics.OPTIONAL_FIELDS
+
+RESULT_KEYS = ('total_head', 'friction_head_loss', 'minor_head_loss', 'velocity', 'power_kw', 'power_hp')
+# Salidas con diferencia frente a la base, y sus decimales
+DELTA_KEYS = {'total_head': 2, 'power_kw': 2, 'annual_energy_kwh': 0, 'annual_energy_cost': 2}
+RANK_KEYS = tuple(DELTA_KEYS)
+DEFAULT_RANK = 'annual_energy_cost'
+MAX_VARIANTS = 1000
+
+COMPUTED = "computed"
+CACHED = "cached"
+
+
+def merge_variant(baseline, variant, index):
+    """(name, station dict) of a variant: the baseline with the variant's overrides applied."""
+    overrides = dict(variant)
+    name = overrides.pop('name', None) or f"Variante {index}"
+    unknown = sorted(set(overrides) - set(VARIANT_FIELDS))
+    if unknown:
+        raise ValueError(f"Variante '{name}': campos no comparables {', '.join(unknown)}")
+    return name, {**baseline, **overrides}
+
+
+def changed_fields(baseline, row):
+    return [field for field in VARIANT_FIELDS if row.get(field) != baseline.get(field)]
+
+
+def pipe_of(row):
+    """Hashable identity of the row's pipe (the FRICTION_FIELDS values)."""
+    return tuple(json.dumps(row.get(field), sort_keys=True) if field == 'segments' else row.get(field)
+                 for field in FRICTION_FIELDS)
+
+
+def friction_key(row):
+    return cache.canonical_key("friction", {field: row.get(field) for field in FRICTION_FIELDS})
+
+
+def friction_stage(rows):
+    """
+    Pipe hydraulics of each row without fittings, static head or pump, in one
+    calculate_batch pass. Returns one dict per row with the per-segment
+    velocity and fitting K needed to add the minor losses later.
+    """
+    columns = {field: [row.get(field) for row in rows] for field in FRICTION_FIELDS}
+    columns.update(geometric_height=0.0, geometric_height_unit='m', pump_efficiency=1.0)
+    results = hydraulics.calculate_batch(columns)
+    stages = []
+    for i in range(len(rows)):
+        if "segment_mask" in results:
+            mask = results["segment_mask"][i]
+            segment_velocity = results["segment_velocity"][i][mask]
+            segment_k = results["total_k"][i][mask]
+        else:
+            segment_velocity = results["velocity"][i:i + 1]
+            segment_k = np.zeros(1)
+        stages.append({
+            "flow_rate_m3s": float(results["flow_rate_m3s"][i]),
+            "velocity": float(results["velocity"][i]),
+            "reynolds": float(results["reynolds"][i]),
+            "friction_factor": float(results["friction_factor"][i]),
+            "friction_head_loss": float(results["friction_head_loss"][i]),
+            "kinematic_viscosity": float(results["kinematic_viscosity"][i]),
+            "density": float(results["density"][i]),
+            "segment_velocity": segment_velocity.tolist(),
+            "segment_k": segment_k.tolist(),
+        })
+    return stages
+
+
+def cached_friction_stages(rows, stage_cache=None):
+    """
+    Friction stage of every row, computing only the distinct pipes missing from
+    ``stage_cache`` (in one batch). Returns (stages, status per row).
+    """
+    # Se calcula el hash una vez por tubería distinta, no por fila
+    pipes = [pipe_of(row) for row in rows]
+    hashes = {}
+    for pipe, row in zip(pipes, rows):
+        if pipe not in hashes:
+            hashes[pipe] = friction_key(row)
+    keys = [hashes[pipe] for pipe in pipes]
+    found = {}
+    for key in hashes.values():
+        hit = stage_cache.get(key) if stage_cache is not None else None
+        if hit is not None:
+            found[key] = json.loads(hit)
+    missing = [key for key in hashes.values() if key not in found]
+    first = {key: i for i, key in reversed(list(enumerate(keys)))}
+    if missing:
+        computed = friction_stage([rows[first[key]] for key in missing])
+        for key, stage in zip(missing, computed):
+            found[key] = stage
+            if stage_cache is not None:
+                stage_cache.set(key, json.dumps(stage).encode("utf-8"))
+    # Solo la primera fila de cada tubería calculada cuenta como calculada
+    status = [COMPUTED if key in missing and first[key] == i else CACHED for i, key in enumerate(keys)]
+    return [found[key] for key in keys], status
+
+
+def finish_stages(rows, stages):
+    """
+    Minor losses, total head and power of each row on top of its friction
+    stage, with the operations (and their order) of compute_hydraulics.
+    """
+    n = len(rows)
+    width = max(len(stage["segment_k"]) for stage in stages)
+    k = np.zeros((n, width))
+    velocity = np.zeros((n, width))
+    for i, stage in enumerate(stages):
+        k[i, :len(stage["segment_k"])] = stage["segment_k"]
+        velocity[i, :len(stage["segment_velocity"])] = stage["segment_velocity"]
+    # Los accesorios de la estación van en el primer tramo, como en segment_arrays
+    k[:, 0] += hydraulics.fittings_k({f: [row.get(f) for row in rows] for f in hydraulics.FITTING_FIELDS}, n)
+
+    def column(key):
+        return np.array([stage[key] for stage in stages], dtype=float)
+
+    flow_rate_m3s = column("flow_rate_m3s")
+    head_loss_friction = column("friction_head_loss")
+    density = column("density")
+    geometric_height_m = hydraulics.to_si([row["geometric_height"] for row in rows],
+                                          [row["geometric_height_unit"] for row in rows], hydraulics.HEIGHT_UNITS)
+    pump_efficiency = np.array([row["pump_efficiency"] for row in rows], dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        head_loss_minor = (k * (velocity**2) / (2 * hydraulics.GRAVITY)).sum(axis=-1)
+        total_head = geometric_height_m + head_loss_friction + head_loss_minor
+        power_watts = (density * hydraulics.GRAVITY * flow_rate_m3s * total_head) / pump_efficiency
+        power_kw = power_watts / 1000
+        power_hp = power_kw * 1.34102
+    return {
+        "velocity": column("velocity"),
+        "reynolds": column("reynolds"),
+        "friction_factor": column("friction_factor"),
+        "friction_head_loss": head_loss_friction,
+        "minor_head_loss": head_loss_minor,
+        "total_head": total_head,
+        "power_kw": power_kw,
+        "power_hp": power_hp,
+        "geometric_height": geometric_height_m,
+        "flow_rate_m3s": flow_rate_m3s,
+        "kinematic_viscosity": column("kinematic_viscosity"),
+        "density": density,
+    }
+
+
+def compare(baseline, variants, operating_hours, energy_tariff, rank_by=DEFAULT_RANK,
+            incremental=False, stage_cache=None):
+    """
+    Compare the station dict ``baseline`` with ``variants``, a list of
+    (name, station dict). Annual energy is power_kw · operating_hours and its
+    cost energy · energy_tariff. Alternatives are ranked ascending on
+    ``rank_by`` (baseline included); rows that cannot be computed get an error
+    and no rank.
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"Criterio de orden '{rank_by}' no soportado (use {', '.join(RANK_KEYS)})")
+    if len(variants) > MAX_VARIANTS:
+        raise ValueError(f"Se admiten hasta {MAX_VARIANTS} variantes")
+    names = ["Base"] + [name for name, _ in variants]
+    rows = [baseline] + [row for _, row in variants]
+
+    if incremental:
+        stages, status = cached_friction_stages(rows, stage_cache)
+        results = finish_stages(rows, stages)
+    else:
+        columns = {field: [row.get(field) for row in rows] for field in VARIANT_FIELDS}
+        results = hydraulics.calculate_batch(columns)
+        status = None
+
+    bad = hydraulics.invalid_rows(results)
+    if bad[0]:
+        raise ValueError(f"La base no se puede calcular: {hydraulics.INVALID_ROW_ERROR}")
+    with np.errstate(invalid='ignore', over='ignore'):
+        values = {key: results[key] for key in ('total_head', 'power_kw')}
+        values["annual_energy_kwh"] = results["power_kw"] * operating_hours
+        values["annual_energy_cost"] = values["annual_energy_kwh"] * energy_tariff
+        deltas = {key: value - value[0] for key, value in values.items()}
+        percents = {key: np.where(value[0] != 0, deltas[key] / abs(value[0]) * 100, np.nan)
+                    for key, value in values.items()}
+
+    rounded = hydraulics.round_outputs(results)
+    rounded["annual_energy_kwh"] = hydraulics.round_half_even(values["annual_energy_kwh"], 0)
+    rounded["annual_energy_cost"] = hydraulics.round_half_even(values["annual_energy_cost"], 2)
+    rounded = {key: rounded[key].tolist() for key in RESULT_KEYS + ('annual_energy_kwh', 'annual_energy_cost')}
+    delta = {key: hydraulics.round_half_even(deltas[key], digits).tolist() for key, digits in DELTA_KEYS.items()}
+    percent = {key: hydraulics.finite_or_none(hydraulics.round_half_even(percents[key], 2)) for key in DELTA_KEYS}
+
+    valid = np.flatnonzero(~bad)
+    order = valid[np.argsort(values[rank_by][valid], kind='stable')]
+    rank = {int(i): position + 1 for position, i in enumerate(order)}
+
+    entries = []
+    for i, (name, row) in enumerate(zip(names, rows)):
+        entry = {"name": name}
+        if i:
+            entry["changes"] = {field: row.get(field) for field in changed_fields(baseline, row)}
+        if status is not None:
+            entry["friction_stage"] = status[i]
+        if bad[i]:
+            entry.update({"rank": None, "error": hydraulics.INVALID_ROW_ERROR})
+        else:
+            entry.update({key: value[i] for key, value in rounded.items()})
+            if i:
+                entry["delta"] = {key: value[i] for key, value in delta.items()}
+                entry["delta_percent"] = {key: value[i] for key, value in percent.items()}
+            entry["rank"] = rank[i]
+        entries.append(entry)
+
+    response = {
+        "rank_by": rank_by,
+        "operating_hours": operating_hours,
+        "energy_tariff": energy_tariff,
+        "baseline": entries[0],
+        "variants": entries[1:],
+        "ranking": [names[i] for i in order],
+    }
+    if status is not None:
+        response["stages"] = {"friction": {COMPUTED: status.count(COMPUTED), CACHED: status.count(CACHED)}}
+    return response
@@ -0,0 +1,155 @@
+"""
+Density and viscosity of the pumped fluid by fluid type and temperature.
+
+Reference points per fluid (temperature, density, dynamic viscosity) come from
+data/fluids.json. The first lookup of a fluid builds a dense table every
+TABLE_STEP °C with monotone cubic (PCHIP) interpolation of the density and of
+the log of the viscosity; lookups then interpolate linearly on that uniform
+table (index arithmetic, no search), with one vectorized pass per fluid for a
+whole batch and a memo for scalar states.
+
+A 'custom' fluid (slurries, oils, ...) takes its density and dynamic
+viscosity from the request. The same two values override the table of any
+other fluid. Without a temperature or overrides, water resolves to the
+``default`` properties the caller passes: the constants that
+calculate_pumping_station has always used.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+FLUIDS_PATH = Path(__file__).parent / "data" / "fluids.json"
+
+WATER = "water"
+CUSTOM = "custom"
+DEFAULT_FLUID = WATER
+DEFAULT_TEMPERATURE = 20.0  # °C, para fluidos de tabla sin temperatura
+TABLE_STEP = 0.1  # °C
+
+
+@lru_cache(maxsize=None)
+def load_fluids(path=FLUIDS_PATH):
+    """Reference points of each fluid: {name: (label, temperature, density, viscosity mPa·s)}."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    fluids = {}
+    for name, spec in raw.items():
+        if name.startswith("_"):
+            continue
+        points = np.array(sorted(spec["points"]), dtype=float)
+        fluids[name.lower()] = (spec.get("label", name), points[:, 0], points[:, 1], points[:, 2])
+    return fluids
+
+
+def catalog():
+    """Available fluids with their temperature range."""
+    return [
+        {"fluid": name, "label": label, "min_temperature": float(t[0]), "max_temperature": float(t[-1])}
+        for name, (label, t, _, _) in load_fluids().items()
+    ] + [{"fluid": CUSTOM, "label": "Definido por el usuario (fluid_density y fluid_viscosity)",
+          "min_temperature": None, "max_temperature": None}]
+
+
+@lru_cache(maxsize=None)
+def table(name):
+    """(temperature, kinematic viscosity m²/s, density kg/m³) every TABLE_STEP °C, built once per fluid."""
+    fluids = load_fluids()
+    if name not in fluids:
+        raise ValueError(f"Fluido desconocido: '{name}'. Opciones: {', '.join(list(fluids) + [CUSTOM])}")
+    _, t, density, viscosity = fluids[name]
+    grid = np.linspace(t[0], t[-1], int(round((t[-1] - t[0]) / TABLE_STEP)) + 1)
+    rho = PchipInterpolator(t, density)(grid)
+    mu = np.exp(PchipInterpolator(t, np.log(viscosity))(grid)) / 1000  # mPa·s -> Pa·s
+    return grid, mu / rho, rho
+
+
+def interpolate(name, temperature):
+    """Kinematic viscosity and density of ``name`` at an array of temperatures (°C)."""
+    grid, nu, rho = table(name)
+    temperature = np.asarray(temperature, dtype=float)
+    outside = (temperature < grid[0]) | (temperature > grid[-1])
+    if outside.any():
+        bad = temperature[outside].ravel()[0]
+        raise ValueError(f"Temperatura {bad:g} °C fuera del rango de '{name}' ({grid[0]:g} a {grid[-1]:g} °C)")
+    # Rejilla uniforme: el tramo sale de la temperatura, sin búsqueda binaria
+    position = (temperature - grid[0]) * ((len(grid) - 1) / (grid[-1] - grid[0]))
+    index = np.minimum(position.astype(int), len(grid) - 2)
+    fraction = position - index
+    return nu[index] + fraction * (nu[index + 1] - nu[index]), rho[index] + fraction * (rho[index + 1] - rho[index])
+
+
+@lru_cache(maxsize=4096)
+def lookup(name, temperature):
+    """Memoized (kinematic viscosity, density) of one fluid at one temperature."""
+    nu, rho = interpolate(name, temperature)
+    return float(nu), float(rho)
+
+
+def _override(nu, rho, density, viscosity):
+    # La densidad y la viscosidad dinámica (mPa·s) dadas reemplazan a las de la tabla
+    given = ~(np.isnan(density) & np.isnan(viscosity))
+    mu = np.where(np.isnan(viscosity), nu * rho, viscosity / 1000)
+    rho = np.where(np.isnan(density), rho, density)
+    with np.errstate(invalid='ignore'):
+        return np.where(given, mu / rho, nu), rho
+
+
+def resolve(fluid=None, temperature=None, density=None, viscosity=None, default=None):
+    """
+    (kinematic viscosity m²/s, density kg/m³) of one fluid state. ``density``
+    is in kg/m³ and ``viscosity`` is the dynamic viscosity in mPa·s (cP).
+    """
+    name = (fluid or DEFAULT_FLUID).lower()
+    if default is not None and name == DEFAULT_FLUID and temperature is None and density is None \
+            and viscosity is None:
+        return default
+    if density is not None and density <= 0 or viscosity is not None and viscosity <= 0:
+        raise ValueError("La densidad y la viscosidad del fluido deben ser mayores que cero")
+    if name == CUSTOM:
+        if density is None or viscosity is None:
+            raise ValueError("El fluido 'custom' necesita fluid_density (kg/m³) y fluid_viscosity (mPa·s)")
+        return viscosity / 1000 / density, float(density)
+    nu, rho = lookup(name, float(DEFAULT_TEMPERATURE if temperature is None else temperature))
+    if density is None and viscosity is None:
+        return nu, rho
+    nu, rho = _override(nu, rho, np.nan if density is None else density, np.nan if viscosity is None else viscosity)
+    return float(nu), float(rho)
+
+
+def resolve_many(fluid, temperature, density, viscosity, n, default):
+    """
+    resolve for ``n`` rows at once. Each argument is a sequence with one
+    value per row, or None when the column is absent; missing values are None
+    or NaN. Returns the ``default`` pair itself when no row describes a fluid,
+    so batches of plain water compute exactly as before.
+    """
+    def numbers(values):
+        if values is None:
+            return np.full(n, np.nan)
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    names = np.array([(name or DEFAULT_FLUID).lower() for name in fluid] if fluid is not None
+                     else [DEFAULT_FLUID] * n, dtype=object)
+    temperature, density, viscosity = numbers(temperature), numbers(density), numbers(viscosity)
+    legacy = (names == DEFAULT_FLUID) & np.isnan(temperature) & np.isnan(density) & np.isnan(viscosity)
+    if legacy.all():
+        return default
+    if (density <= 0).any() or (viscosity <= 0).any():
+        raise ValueError("La densidad y la viscosidad del fluido deben ser mayores que cero")
+
+    nu = np.full(n, float(default[0]))
+    rho = np.full(n, float(default[1]))
+    for name in set(names[~legacy].tolist()):
+        rows = np.flatnonzero((names == name) & ~legacy)
+        if name == CUSTOM:
+            if np.isnan(density[rows]).any() or np.isnan(viscosity[rows]).any():
+                raise ValueError("El fluido 'custom' necesita fluid_density (kg/m³) y fluid_viscosity (mPa·s)")
+            nu[rows] = viscosity[rows] / 1000 / density[rows]
+            rho[rows] = density[rows]
+            continue
+        t = np.where(np.isnan(temperature[rows]), DEFAULT_TEMPERATURE, temperature[rows])
+        nu[rows], rho[rows] = _override(*interpolate(name, t), density[rows], viscosity[rows])
+    return nu, rho
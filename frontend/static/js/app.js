@@ -3,33 +3,41 @@ document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('calcForm');
     const submitBtn = form.querySelector('.modern-btn');
     
+    function getFormData() {
+        return {
+            project_name: document.getElementById('project_name').value,
+            project_location: document.getElementById('project_location').value,
+            geometric_height: parseFloat(document.getElementById('geometric_height').value),
+            geometric_height_unit: document.getElementById('geometric_height_unit').value,
+            flow_rate: parseFloat(document.getElementById('flow_rate').value),
+            flow_rate_unit: document.getElementById('flow_rate_unit').value,
+            pipe_length: parseFloat(document.getElementById('pipe_length').value),
+            pipe_length_unit: document.getElementById('pipe_length_unit').value,
+            pipe_diameter: parseFloat(document.getElementById('pipe_diameter').value),
+            pipe_diameter_unit: document.getElementById('pipe_diameter_unit').value,
+            pipe_material: document.getElementById('pipe_material').value,
+            pump_efficiency: parseFloat(document.getElementById('pump_efficiency').value) / 100,
+            // Fluido y temperatura (vacía: agua a 20 °C de siempre)
+            fluid: document.getElementById('fluid').value,
+            temperature: document.getElementById('temperature').value === ''
+                ? null : parseFloat(document.getElementById('temperature').value),
+
+            // Accesorios
+            valve_gate: parseInt(document.getElementById('valve_gate').value) || 0,
+            valve_butterfly: parseInt(document.getElementById('valve_butterfly').value) || 0,
+            valve_check: parseInt(document.getElementById('valve_check').value) || 0,
+            valve_globe: parseInt(document.getElementById('valve_globe').value) || 0,
+            elbow_90: parseInt(document.getElementById('elbow_90').value) || 0,
+            elbow_45: parseInt(document.getElementById('elbow_45').value) || 0
+        };
+    }
+    
     form.addEventListener('submit', async function(e) {
         e.preventDefault();
         
         try {
             // Obtener valores del formulario
-            const formData = {
-                project_name: document.getElementById('project_name').value,
-                project_location: document.getElementById('project_location').value,
-                geometric_height: parseFloat(document.getElementById('geometric_height').value),
-                geometric_height_unit: document.getElementById('geometric_height_unit').value,
-                flow_rate: parseFloat(document.getElementById('flow_rate').value),
-                flow_rate_unit: document.getElementById('flow_rate_unit').value,
-                pipe_length: parseFloat(document.getElementById('pipe_length').value),
-                pipe_length_unit: document.getElementById('pipe_length_unit').value,
-                pipe_diameter: parseFloat(document.getElementById('pipe_diameter').value),
-                pipe_diameter_unit: document.getElementById('pipe_diameter_unit').value,
-                pipe_material: document.getElementById('pipe_material').value,
-                pump_efficiency: parseFloat(document.getElementById('pump_efficiency').value) / 100,
-
-                // Accesorios
-                valve_gate: parseInt(document.getElementById('valve_gate').value) || 0,
-                valve_butterfly: parseInt(document.getElementById('valve_butterfly').value) || 0,
-                valve_check: parseInt(document.getElementById('valve_check').value) || 0,
-                valve_globe: parseInt(document.getElementById('valve_globe').value) || 0,
-                elbow_90: parseInt(document.getElementById('elbow_90').value) || 0,
-                elbow_45: parseInt(document.getElementById('elbow_45').value) || 0
-            };
+            const formData = getFormData();
             
             console.log('Datos del formulario:', formData);
             
@@ -111,6 +119,10 @@ document.addEventListener('DOMContentLoaded', function() {
             }, index * 50);
         });
         
+        updateResultValues(data);
+    }
+    
+    function updateResultValues(data) {
         // Actualizar valores
         document.getElementById('total_head').textContent = data.total_head + ' m';
         document.getElementById('friction_head_loss').textContent = data.friction_head_loss + ' m';
@@ -136,34 +148,22 @@ document.addEventListener('DOMContentLoaded', function() {
             y: point.head
         }));
         
-        // Punto de operación (BEP)
+        // Punto de operación: intersección calculada en el servidor
+        // (si no hay intersección se muestra el punto de diseño)
+        const solved = data.operating_point && data.operating_point.flow_ls !== null;
         const operatingPoint = {
-            x: data.flow_rate, // Ya viene en l/s desde el backend
-            y: data.total_head
+            x: solved ? data.operating_point.flow_ls : data.flow_rate, // l/s
+            y: solved ? data.operating_point.head : data.total_head
         };
         
-        // Calcular curva del sistema
-        const systemCurveData = [];
-        const geometricHeight = data.geometric_height;
-        const maxFlow = Math.max(...curveData.map(p => p.x));
-        
-        // Generar puntos de la curva del sistema: H = H_geo + K*Q^2
-        // Donde K se calcula basándose en el punto de operación
-        const K = (data.friction_head_loss + data.minor_head_loss) / Math.pow(data.flow_rate, 2);
-        
-        for (let i = 0; i <= 20; i++) {
-            const flow = (i / 20) * maxFlow;
-            const systemHead = geometricHeight + K * Math.pow(flow, 2);
-            systemCurveData.push({
-                x: flow,
-                y: systemHead
-            });
-        }
+        // Curva del sistema del servidor (fricción recalculada en cada caudal)
+        const systemCurveData = data.system_curve.map(point => ({
+            x: point.flow_ls,
+            y: point.head
+        }));
         
-        console.log('Punto de operación:', operatingPoint);
+        console.log('Punto de operación:', operatingPoint, data.operating_point);
         console.log('Datos de la curva:', curveData.slice(0, 3)); // Primeros 3 puntos
-        console.log('Altura geométrica:', geometricHeight);
-        console.log('Coeficiente K del sistema:', K);
         console.log('Datos de la curva del sistema:', systemCurveData.slice(0, 3)); // Primeros 3 puntos
         
         window.pumpChart = new Chart(ctx, {
@@ -290,6 +290,121 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    function updateChart(data) {
+        // Actualiza los datos del gráfico existente sin reconstruirlo (cálculo en vivo)
+        if (!window.pumpChart) {
+            generateChart(data);
+            return;
+        }
+        const solved = data.operating_point && data.operating_point.flow_ls !== null;
+        const operatingPoint = {
+            x: solved ? data.operating_point.flow_ls : data.flow_rate,
+            y: solved ? data.operating_point.head : data.total_head
+        };
+        const datasets = window.pumpChart.data.datasets;
+        datasets[0].data = data.pump_curve.map(point => ({x: point.flow_ls, y: point.head}));
+        datasets[1].data = data.system_curve.map(point => ({x: point.flow_ls, y: point.head}));
+        datasets[2].data = [operatingPoint];
+        datasets[3].data = [{x: 0, y: operatingPoint.y}, {x: operatingPoint.x, y: operatingPoint.y}];
+        datasets[4].data = [{x: operatingPoint.x, y: 0}, {x: operatingPoint.x, y: operatingPoint.y}];
+        window.pumpChart.update('none');
+    }
+    
+    // --- Cálculo en vivo por WebSocket ---
+    // Se envían solo los campos que cambiaron, como máximo cada LIVE_SEND_INTERVAL ms
+    // (los deslizadores generan decenas de eventos por segundo); el servidor
+    // responde con los resultados que cambiaron y además agrupa ráfagas.
+    const LIVE_SEND_INTERVAL = 100;
+    const LIVE_RECONNECT_DELAY = 3000;
+    const CHART_KEYS = ['pump_curve', 'system_curve', 'operating_point'];
+    let liveSocket = null;
+    let liveSent = {};
+    let liveResults = {};
+    let livePending = {};
+    let liveTimer = null;
+    let liveSeq = 0;
+    
+    function connectLive() {
+        if (!window.WebSocket) {
+            return;
+        }
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${protocol}://${window.location.host}/ws/calculate`);
+        
+        socket.addEventListener('open', function() {
+            liveSocket = socket;
+            liveSent = validFields(getFormData());
+            liveResults = {};
+            socket.send(JSON.stringify({type: 'init', data: liveSent, seq: ++liveSeq}));
+        });
+        
+        socket.addEventListener('message', function(event) {
+            const message = JSON.parse(event.data);
+            if (message.type === 'error') {
+                // El servidor conserva el último estado válido
+                console.warn('Cálculo en vivo:', message.error);
+                return;
+            }
+            const changes = message.changes;
+            if (Object.keys(changes).length === 0) {
+                return;
+            }
+            const first = Object.keys(liveResults).length === 0;
+            Object.assign(liveResults, changes);
+            updateResultValues(liveResults);
+            if (first) {
+                generateChart(liveResults);
+            } else if (CHART_KEYS.some(key => key in changes)) {
+                updateChart(liveResults);
+            }
+        });
+        
+        socket.addEventListener('close', function() {
+            // Sin conexión el formulario sigue funcionando con el botón Calcular
+            liveSocket = null;
+            setTimeout(connectLive, LIVE_RECONNECT_DELAY);
+        });
+    }
+    
+    function validFields(data) {
+        // Los campos a medio escribir (NaN) no se envían
+        const valid = {};
+        Object.entries(data).forEach(([field, value]) => {
+            if (typeof value !== 'number' || !isNaN(value)) {
+                valid[field] = value;
+            }
+        });
+        return valid;
+    }
+    
+    function queueLiveChanges() {
+        if (!liveSocket) {
+            return;
+        }
+        Object.entries(validFields(getFormData())).forEach(([field, value]) => {
+            if (liveSent[field] !== value) {
+                livePending[field] = value;
+            }
+        });
+        if (liveTimer === null && Object.keys(livePending).length > 0) {
+            liveTimer = setTimeout(flushLiveChanges, LIVE_SEND_INTERVAL);
+        }
+    }
+    
+    function flushLiveChanges() {
+        liveTimer = null;
+        if (!liveSocket || Object.keys(livePending).length === 0) {
+            return;
+        }
+        liveSocket.send(JSON.stringify({type: 'change', changes: livePending, seq: ++liveSeq}));
+        Object.assign(liveSent, livePending);
+        livePending = {};
+    }
+    
+    form.addEventListener('input', queueLiveChanges);
+    form.addEventListener('change', queueLiveChanges);
+    connectLive();
+    
     function showError(message) {
         // Crear notificación de error moderna
         const errorDiv = document.createElement('div');
@@ -334,28 +449,7 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('generate-pdf').addEventListener('click', async () => {
         console.log('PDF button clicked');
         
-        const formData = {
-            project_name: document.getElementById('project_name').value,
-            project_location: document.getElementById('project_location').value,
-            geometric_height: parseFloat(document.getElementById('geometric_height').value),
-            geometric_height_unit: document.getElementById('geometric_height_unit').value,
-            flow_rate: parseFloat(document.getElementById('flow_rate').value),
-            flow_rate_unit: document.getElementById('flow_rate_unit').value,
-            pipe_length: parseFloat(document.getElementById('pipe_length').value),
-            pipe_length_unit: document.getElementById('pipe_length_unit').value,
-            pipe_diameter: parseFloat(document.getElementById('pipe_diameter').value),
-            pipe_diameter_unit: document.getElementById('pipe_diameter_unit').value,
-            pipe_material: document.getElementById('pipe_material').value,
-            pump_efficiency: parseFloat(document.getElementById('pump_efficiency').value) / 100,
-
-            // Accesorios
-            valve_gate: parseInt(document.getElementById('valve_gate').value) || 0,
-            valve_butterfly: parseInt(document.getElementById('valve_butterfly').value) || 0,
-            valve_check: parseInt(document.getElementById('valve_check').value) || 0,
-            valve_globe: parseInt(document.getElementById('valve_globe').value) || 0,
-            elbow_90: parseInt(document.getElementById('elbow_90').value) || 0,
-            elbow_45: parseInt(document.getElementById('elbow_45').value) || 0
-        };
+        const formData = getFormData();
         console.log('Form data:', formData);
         
         try {
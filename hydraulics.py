@@ -0,0 +1,567 @@
+"""
+Vectorized (NumPy) version of the hydraulic calculation in calculate_pumping_station.
+
+Every formula follows the scalar path operation by operation, so a batch of rows
+computed here returns the same numbers as calling /calculate once per row.
+"""
+import numpy as np
+
+import fluids
+import friction
+
+# Constantes físicas
+GRAVITY = 9.80665  # m/s2 (standard gravity)
+WATER_DENSITY = 1000  # kg/m3
+KINEMATIC_VISCOSITY = 1.004e-6  # m2/s for water at 20°C
+# Propiedades por defecto (agua sin temperatura indicada), ver fluids.resolve
+LEGACY_FLUID = (KINEMATIC_VISCOSITY, WATER_DENSITY)
+
+# Rugosidad absoluta por material (mm)
+ROUGHNESS = {
+    "pvc": 0.00015,
+    "steel": 0.000045,
+    "copper": 0.0000015,
+    "concrete": 0.0003,
+    "ductile_iron": 0.00015  # Hierro dúctil
+}
+DEFAULT_ROUGHNESS = 0.0015  # mm
+
+# Coeficientes K de pérdidas menores por accesorio
+K_VALUES = {
+    'valve_gate': 0.2,       # Válvula de compuerta
+    'valve_butterfly': 0.3,  # Válvula mariposa
+    'valve_check': 2.0,      # Válvula check (tipo clapeta)
+    'valve_globe': 10.0,     # Válvula de globo (para regulación)
+    'elbow_90': 0.9,         # Codo de 90 grados
+    'elbow_45': 0.4          # Codo de 45 grados
+}
+
+# Curva de bomba sintética (21 puntos)
+PUMP_CURVE_STEPS = 20
+SHUTOFF_FACTOR = 1.33  # 133% de la altura en BEP
+RUNOUT_FACTOR = 2.0  # 200% del caudal en BEP
+
+# Conversión de unidades a SI: (divisores, multiplicadores) por unidad.
+# Se mantiene la misma operación (división o multiplicación) que el cálculo escalar.
+HEIGHT_UNITS = ({}, {'ft': 0.3048})
+FLOW_UNITS = ({'l/s': 1000, 'm3/h': 3600}, {'gpm': 6.309e-5})
+LENGTH_UNITS = ({}, {'km': 1000, 'ft': 0.3048, 'mi': 1609.34})
+DIAMETER_UNITS = ({'mm': 1000}, {'in': 0.0254})
+
+REQUIRED_FIELDS = (
+    'geometric_height', 'geometric_height_unit',
+    'flow_rate', 'flow_rate_unit',
+    'pipe_length', 'pipe_length_unit',
+    'pipe_diameter', 'pipe_diameter_unit',
+    'pipe_material', 'pump_efficiency',
+)
+FITTING_FIELDS = tuple(K_VALUES)
+# Fluido bombeado: tipo, temperatura (°C) y densidad (kg/m3) / viscosidad dinámica (mPa·s) propias
+FLUID_FIELDS = ('fluid', 'temperature', 'fluid_density', 'fluid_viscosity')
+OPTIONAL_FIELDS = ('friction_model', 'segments') + FLUID_FIELDS
+
+# Ejes del barrido paramétrico, en el orden de las dimensiones de la rejilla
+SWEEP_AXES = ('pipe_diameter', 'flow_rate', 'pipe_material', 'pump_efficiency')
+MAX_SWEEP_CELLS = 2_000_000
+
+INVALID_ROW_ERROR = "Valores de entrada inválidos: el resultado no es finito (revise caudal, diámetro y eficiencia)"
+
+
+def to_si(values, units, table):
+    """Convert an array of values to SI using a (divisors, multipliers) unit table."""
+    divisors, multipliers = table
+    result = np.array(values, dtype=float)
+    units = np.broadcast_to(np.asarray(units, dtype=object), result.shape)
+    for unit, divisor in divisors.items():
+        mask = units == unit
+        result[mask] /= divisor
+    for unit, multiplier in multipliers.items():
+        mask = units == unit
+        result[mask] *= multiplier
+    return result
+
+
+def roughness_for(materials):
+    """Absolute roughness (mm) for each material name."""
+    materials = np.asarray(materials, dtype=object)
+    names, inverse = np.unique(np.char.lower(materials.astype(str)), return_inverse=True)
+    lookup = np.array([ROUGHNESS.get(name, DEFAULT_ROUGHNESS) for name in names], dtype=float)
+    return lookup[inverse.reshape(materials.shape)]
+
+
+def fittings_k(columns, n):
+    """Sum of minor-loss K coefficients per row, accumulated in the scalar order."""
+    total_k = np.zeros(n)
+    for field in FITTING_FIELDS:
+        counts = columns.get(field)
+        if counts is None:
+            continue
+        counts = np.asarray(counts, dtype=float)
+        total_k = total_k + counts * K_VALUES[field]
+    return total_k
+
+
+def fluid_properties(params):
+    """(kinematic viscosity, density) of the fluid described by a PumpingStationInput or its dict."""
+    if not isinstance(params, dict):
+        params = {field: getattr(params, field, None) for field in FLUID_FIELDS}
+    return fluids.resolve(params.get('fluid'), params.get('temperature'), params.get('fluid_density'),
+                          params.get('fluid_viscosity'), default=LEGACY_FLUID)
+
+
+def compute_hydraulics(geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                       roughness_mm, total_k, pump_efficiency, friction_model=friction.DEFAULT_METHOD,
+                       kinematic_viscosity=KINEMATIC_VISCOSITY, density=WATER_DENSITY):
+    """
+    Darcy-Weisbach hydraulics for arrays of SI inputs (any broadcastable shape).
+    ``friction_model`` is a friction.METHODS name, or an array of names per row;
+    ``kinematic_viscosity`` (m²/s) and ``density`` (kg/m³) broadcast the same way.
+
+    Returns a dict of unrounded arrays: velocity, reynolds, friction_factor,
+    friction_head_loss, minor_head_loss, total_head, power_kw and power_hp.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        velocity = flow_rate_m3s / (np.pi * (diameter_m**2)/4)
+        reynolds = velocity * diameter_m / kinematic_viscosity
+        f = friction.friction_factor(reynolds, roughness_mm, diameter_m, friction_model)
+        head_loss_friction = f * (pipe_length_m/diameter_m) * (velocity**2)/(2*GRAVITY)
+        head_loss_minor = total_k * (velocity**2) / (2 * GRAVITY)
+        total_head = geometric_height_m + head_loss_friction + head_loss_minor
+        power_watts = (density * GRAVITY * flow_rate_m3s * total_head) / pump_efficiency
+        power_kw = power_watts / 1000
+        power_hp = power_kw * 1.34102
+    return {
+        "velocity": velocity,
+        "reynolds": reynolds,
+        "friction_factor": f,
+        "friction_head_loss": head_loss_friction,
+        "minor_head_loss": head_loss_minor,
+        "total_head": total_head,
+        "power_kw": power_kw,
+        "power_hp": power_hp,
+    }
+
+
+def segment_arrays(segments, pipe_length_m, diameter_m, roughness_mm, total_k):
+    """
+    Pad per-row segment lists into (n, segments) SI arrays, segment axis last.
+
+    ``segments`` has one entry per row: a list of segment dicts (length,
+    length_unit, diameter, diameter_unit, material and fitting counts), or None
+    to keep the row's single pipe. The station fittings in ``total_k`` go on
+    the first segment. Padding segments have zero length and no fittings.
+    Returns (pipe_length_m, diameter_m, roughness_mm, total_k, mask).
+    """
+    n = len(pipe_length_m)
+    width = max(len(row) if row else 1 for row in segments)
+    length = np.zeros((n, width))
+    diameter = np.ones((n, width))  # Evita divisiones por cero en el relleno
+    roughness = np.zeros((n, width))
+    k = np.zeros((n, width))
+    mask = np.zeros((n, width), dtype=bool)
+
+    single = np.array([not row for row in segments])
+    length[single, 0] = pipe_length_m[single]
+    diameter[single, 0] = diameter_m[single]
+    roughness[single, 0] = roughness_mm[single]
+    mask[single, 0] = True
+    k[:, 0] = total_k
+
+    flat = [(i, j, segment) for i, row in enumerate(segments) if row for j, segment in enumerate(row)]
+    if flat:
+        rows, cols, items = zip(*flat)
+        rows, cols = np.array(rows), np.array(cols)
+
+        def field(name, default=None):
+            return [item.get(name) if item.get(name) is not None else default for item in items]
+
+        length[rows, cols] = to_si(field('length'), field('length_unit', 'm'), LENGTH_UNITS)
+        diameter[rows, cols] = to_si(field('diameter'), field('diameter_unit', 'mm'), DIAMETER_UNITS)
+        roughness[rows, cols] = roughness_for(field('material'))
+        k[rows, cols] += fittings_k({f: field(f, 0) for f in FITTING_FIELDS}, len(items))
+        mask[rows, cols] = True
+    return length, diameter, roughness, k, mask
+
+
+def compute_pipeline(geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                     roughness_mm, total_k, pump_efficiency, friction_model=friction.DEFAULT_METHOD,
+                     kinematic_viscosity=KINEMATIC_VISCOSITY, density=WATER_DENSITY):
+    """
+    compute_hydraulics for pipelines of segments in series, along the last
+    axis of the pipe arrays (the other inputs have no segment axis).
+
+    Friction and minor losses are summed over the segments; velocity, reynolds
+    and friction_factor are those of the first segment (the station discharge).
+    The per-segment arrays are returned as segment_<key>.
+    """
+    flow = np.asarray(flow_rate_m3s, dtype=float)[..., np.newaxis]
+    model = friction_model
+    if model is not None and not isinstance(model, str):
+        model = np.asarray(model, dtype=object)[..., np.newaxis]
+    nu = kinematic_viscosity
+    if np.ndim(nu) > 0:
+        nu = np.asarray(nu, dtype=float)[..., np.newaxis]
+    segment = compute_hydraulics(0.0, flow, pipe_length_m, diameter_m, roughness_mm, total_k, 1.0, model, nu)
+    # Un tramo de longitud cero no pierde por fricción (aunque f no esté definido)
+    segment_friction = np.where(np.asarray(pipe_length_m) > 0, segment["friction_head_loss"], 0.0)
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        head_loss_friction = segment_friction.sum(axis=-1)
+        head_loss_minor = segment["minor_head_loss"].sum(axis=-1)
+        total_head = geometric_height_m + head_loss_friction + head_loss_minor
+        power_watts = (density * GRAVITY * flow_rate_m3s * total_head) / pump_efficiency
+        power_kw = power_watts / 1000
+        power_hp = power_kw * 1.34102
+    return {
+        "velocity": segment["velocity"][..., 0],
+        "reynolds": segment["reynolds"][..., 0],
+        "friction_factor": segment["friction_factor"][..., 0],
+        "friction_head_loss": head_loss_friction,
+        "minor_head_loss": head_loss_minor,
+        "total_head": total_head,
+        "power_kw": power_kw,
+        "power_hp": power_hp,
+        "segment_velocity": segment["velocity"],
+        "segment_reynolds": segment["reynolds"],
+        "segment_friction_factor": segment["friction_factor"],
+        "segment_friction_head_loss": segment_friction,
+        "segment_minor_head_loss": segment["minor_head_loss"],
+    }
+
+
+def pipeline_results(segments, geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                     roughness_mm, total_k, pump_efficiency, friction_model=friction.DEFAULT_METHOD,
+                     kinematic_viscosity=KINEMATIC_VISCOSITY, density=WATER_DENSITY):
+    """
+    compute_pipeline on the padded segments of each row, plus the (n, segments)
+    pipe arrays, the segment mask and the segment dicts, as calculate_batch
+    returns them.
+    """
+    segments = [[item.dict() if hasattr(item, "dict") else item for item in row] if row else None
+                for row in segments]
+    length, diameter, roughness, k, mask = segment_arrays(segments, pipe_length_m, diameter_m,
+                                                          roughness_mm, total_k)
+    results = compute_pipeline(geometric_height_m, flow_rate_m3s, length, diameter, roughness, k,
+                               pump_efficiency, friction_model, kinematic_viscosity, density)
+    results.update({
+        "pipe_length_m": length,
+        "diameter_m": diameter,
+        "roughness_mm": roughness,
+        "total_k": k,
+        "segment_mask": mask,
+        "segments": segments,
+    })
+    return results
+
+
+def format_segments(results):
+    """Per-row list of rounded segment breakdowns (None for single-pipe rows)."""
+    keys = {
+        "length_m": (results["pipe_length_m"], 2),
+        "diameter_mm": (results["diameter_m"] * 1000, 1),
+        "total_k": (results["total_k"], 2),
+        "velocity": (results["segment_velocity"], 2),
+        "reynolds": (results["segment_reynolds"], 2),
+        "friction_factor": (results["segment_friction_factor"], 6),
+        "friction_head_loss": (results["segment_friction_head_loss"], 2),
+        "minor_head_loss": (results["segment_minor_head_loss"], 2),
+        "head_loss": (results["segment_friction_head_loss"] + results["segment_minor_head_loss"], 2),
+    }
+    rounded = {key: round_half_even(values, digits).tolist() for key, (values, digits) in keys.items()}
+    rows = []
+    for i, row in enumerate(results["segments"]):
+        if not row:
+            rows.append(None)
+            continue
+        rows.append([
+            {"label": item.get("label") or f"Tramo {j + 1}", "material": item.get("material"),
+             **{key: values[i][j] for key, values in rounded.items()}}
+            for j, item in enumerate(row)
+        ])
+    return rows
+
+
+def pump_curve(total_head, flow_rate_m3s, steps=PUMP_CURVE_STEPS):
+    """
+    Synthetic parabola H = A - B*Q^2 through shutoff (1.33H) and runout (2Q).
+
+    Returns (A, B, q, h) where q and h have shape (n, steps + 1).
+    """
+    A = total_head * SHUTOFF_FACTOR
+    max_flow_m3s = flow_rate_m3s * RUNOUT_FACTOR
+    with np.errstate(divide='ignore', invalid='ignore'):
+        B = np.where(max_flow_m3s > 0, A / (max_flow_m3s**2), 0.0)
+    fractions = np.arange(steps + 1) / steps
+    q = fractions[np.newaxis, :] * max_flow_m3s[:, np.newaxis]
+    h = A[:, np.newaxis] - B[:, np.newaxis] * (q**2)
+    return A, B, q, h
+
+
+def columns_from_items(items):
+    """Transpose a list of PumpingStationInput models into a columnar dict."""
+    return {
+        field: [getattr(item, field) for item in items]
+        for field in REQUIRED_FIELDS + FITTING_FIELDS + OPTIONAL_FIELDS
+    }
+
+
+def calculate_batch(columns):
+    """
+    Run calculate_pumping_station over a columnar payload in one vectorized pass.
+
+    ``columns`` maps PumpingStationInput field names to lists (or a single value
+    to broadcast, e.g. ``"flow_rate_unit": "l/s"``). Returns a dict of unrounded
+    arrays including the SI inputs and the 21-point pump curve.
+    """
+    missing = [field for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(missing)}")
+
+    lengths = {len(v) for v in columns.values() if isinstance(v, (list, tuple, np.ndarray))}
+    if len(lengths) > 1:
+        raise ValueError("Todas las columnas deben tener la misma longitud")
+    n = lengths.pop() if lengths else 1
+
+    def column(field, dtype):
+        return np.broadcast_to(np.asarray(columns[field], dtype=dtype), (n,))
+
+    geometric_height_m = to_si(column('geometric_height', float), column('geometric_height_unit', object), HEIGHT_UNITS)
+    flow_rate_m3s = to_si(column('flow_rate', float), column('flow_rate_unit', object), FLOW_UNITS)
+    pipe_length_m = to_si(column('pipe_length', float), column('pipe_length_unit', object), LENGTH_UNITS)
+    diameter_m = to_si(column('pipe_diameter', float), column('pipe_diameter_unit', object), DIAMETER_UNITS)
+    roughness_mm = roughness_for(column('pipe_material', object))
+    total_k = fittings_k({f: np.broadcast_to(np.asarray(columns[f], dtype=float), (n,))
+                          for f in FITTING_FIELDS if f in columns}, n)
+    pump_efficiency = column('pump_efficiency', float)
+    friction_model = columns.get('friction_model')
+    if isinstance(friction_model, (list, tuple, np.ndarray)):
+        friction_model = column('friction_model', object)
+        if len(set(friction_model.tolist())) == 1:
+            friction_model = friction_model[0]
+    # Sin columnas de fluido (o todas vacías) se usan las constantes escalares del agua
+    def optional(field):
+        values = columns.get(field)
+        if values is None or isinstance(values, (list, tuple, np.ndarray)):
+            return values
+        return [values] * n
+
+    kinematic_viscosity, density = fluids.resolve_many(*map(optional, FLUID_FIELDS), n, LEGACY_FLUID)
+
+    segments = columns.get('segments')
+    if segments is not None and any(segments):
+        # Tuberías por tramos: arreglos (n, tramos) con la pérdida sumada por fila
+        if len(segments) != n:
+            raise ValueError("'segments' debe tener una lista de tramos (o null) por fila")
+        results = pipeline_results(segments, geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                                   roughness_mm, total_k, pump_efficiency, friction_model,
+                                   kinematic_viscosity, density)
+    else:
+        results = compute_hydraulics(geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                                     roughness_mm, total_k, pump_efficiency, friction_model,
+                                     kinematic_viscosity, density)
+        results.update({
+            "pipe_length_m": pipe_length_m,
+            "diameter_m": diameter_m,
+            "roughness_mm": roughness_mm,
+            "total_k": total_k,
+        })
+    A, B, q, h = pump_curve(results["total_head"], flow_rate_m3s)
+    results.update({
+        "geometric_height": geometric_height_m,
+        "flow_rate_m3s": flow_rate_m3s,
+        "friction_model": friction_model,
+        "pump_efficiency": pump_efficiency,
+        "kinematic_viscosity": np.broadcast_to(np.asarray(kinematic_viscosity, dtype=float), (n,)),
+        "density": np.broadcast_to(np.asarray(density, dtype=float), (n,)),
+        "curve_A": A,
+        "curve_B": B,
+        "curve_flow": q,
+        "curve_head": h,
+    })
+    return results
+
+
+def expand_axis(spec):
+    """
+    Expand a sweep axis given as a scalar, a list, or a range dict
+    ({start, stop, num} for linspace or {start, stop, step} inclusive of stop).
+    """
+    if isinstance(spec, dict):
+        start, stop = spec['start'], spec['stop']
+        if spec.get('num') is not None:
+            return np.linspace(start, stop, int(spec['num']))
+        if spec.get('step'):
+            step = spec['step']
+            return np.arange(start, stop + step / 2, step)
+        raise ValueError("Un rango debe indicar 'num' o 'step'")
+    if isinstance(spec, (list, tuple, np.ndarray)):
+        return np.asarray(spec)
+    return np.asarray([spec])
+
+
+def sweep(base, axes):
+    """
+    Evaluate the Darcy-Weisbach calculation over the Cartesian grid of ``axes``.
+
+    ``base`` holds the scalar PumpingStationInput fields (units, length, height,
+    fittings); ``axes`` maps each name in SWEEP_AXES to its list of values. All
+    cells are computed in one broadcast pass; arrays have one dimension per axis.
+    """
+    values = {name: expand_axis(axes[name]) for name in SWEEP_AXES}
+    shape = tuple(len(values[name]) for name in SWEEP_AXES)
+    if 0 in shape:
+        raise ValueError("Todos los ejes del barrido deben tener al menos un valor")
+    if np.prod(shape) > MAX_SWEEP_CELLS:
+        raise ValueError(f"La rejilla tiene {int(np.prod(shape))} celdas (máximo {MAX_SWEEP_CELLS})")
+
+    def along(name, array):
+        # Orientar el eje en su dimensión de la rejilla para que NumPy haga el producto cartesiano
+        index = [1] * len(SWEEP_AXES)
+        index[SWEEP_AXES.index(name)] = -1
+        return np.asarray(array).reshape(index)
+
+    diameter_m = along('pipe_diameter', to_si(values['pipe_diameter'], base['pipe_diameter_unit'], DIAMETER_UNITS))
+    flow_rate_m3s = along('flow_rate', to_si(values['flow_rate'], base['flow_rate_unit'], FLOW_UNITS))
+    roughness_mm = along('pipe_material', roughness_for(values['pipe_material'].astype(object)))
+    pump_efficiency = along('pump_efficiency', values['pump_efficiency'].astype(float))
+    geometric_height_m = to_si([base['geometric_height']], base['geometric_height_unit'], HEIGHT_UNITS)[0]
+    pipe_length_m = to_si([base['pipe_length']], base['pipe_length_unit'], LENGTH_UNITS)[0]
+    total_k = fittings_k({f: [base[f]] for f in FITTING_FIELDS if base.get(f) is not None}, 1)[0]
+
+    results = compute_hydraulics(geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                                 roughness_mm, total_k, pump_efficiency, base.get('friction_model'),
+                                 *fluid_properties(base))
+    results = {key: np.broadcast_to(value, shape) for key, value in results.items()}
+    return values, results
+
+
+def round_half_even(values, decimals):
+    """
+    Round like Python's round(): np.round everywhere, delegating near-tie values
+    (where binary scaling may tip the result) to round() itself.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.round(values, decimals)
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = values * 10.0**decimals
+        ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in zip(*np.nonzero(ties)):
+        out[index] = round(float(values[index]), decimals)
+    return out
+
+
+def invalid_rows(results):
+    """Boolean mask of rows whose scalar outputs are not finite."""
+    bad = np.zeros(results["total_head"].shape, dtype=bool)
+    for key in ("velocity", "reynolds", "friction_factor", "total_head", "power_kw"):
+        bad |= ~np.isfinite(results[key])
+    return bad
+
+
+def round_outputs(results):
+    """Scalar /calculate outputs of a calculate_batch result, rounded as arrays."""
+    power_kw = results["power_kw"]
+    power_hp = results["power_hp"]
+    flow = results["flow_rate_m3s"]
+    return {
+        "total_head": round_half_even(results["total_head"], 2),
+        "geometric_height": round_half_even(results["geometric_height"], 2),
+        "friction_head_loss": round_half_even(results["friction_head_loss"], 2),
+        "minor_head_loss": round_half_even(results["minor_head_loss"], 2),
+        "power_kw": np.where(power_kw < 1, round_half_even(power_kw, 4), round_half_even(power_kw, 2)),
+        "power_hp": np.where(power_hp < 1, round_half_even(power_hp, 4), round_half_even(power_hp, 2)),
+        "velocity": round_half_even(results["velocity"], 2),
+        "reynolds": round_half_even(results["reynolds"], 2),
+        "friction_factor": round_half_even(results["friction_factor"], 6),
+        "flow_rate": round_half_even(flow * 1000, 1),
+        "flow_rate_m3s": round_half_even(flow, 6),
+        "fluid_density": round_half_even(results["density"], 2),
+        "kinematic_viscosity": round_half_even(results["kinematic_viscosity"], 10),
+    }
+
+
+def format_results(results):
+    """
+    Round a calculate_batch result exactly like calculate_pumping_station.
+
+    Returns (columns, bad) where ``columns`` maps each /calculate key to a list and
+    ``bad`` flags rows that could not be computed.
+    """
+    bad = invalid_rows(results)
+    flow = results["flow_rate_m3s"]
+    curve_flow = round_half_even(results["curve_flow"], 4)
+    curve_head = round_half_even(results["curve_head"], 2)
+    curve_flow_ls = round_half_even(results["curve_flow"] * 1000, 1)
+
+    columns = {
+        **round_outputs(results),
+        "pump_curve": {
+            "flow": curve_flow,
+            "head": curve_head,
+            "flow_ls": curve_flow_ls,
+        },
+        "bep_flow_ls": round_half_even(flow * 1000, 1),
+    }
+    columns = {
+        key: ({k: v.tolist() for k, v in value.items()} if isinstance(value, dict) else value.tolist())
+        for key, value in columns.items()
+    }
+    A = results["curve_A"].tolist()
+    B = results["curve_B"].tolist()
+    columns["curve_equation"] = [
+        f"H = {round(a, 2)} - {b / (1000**2):.4f}·Q²" for a, b in zip(A, B)
+    ]
+
+    # Punto de operación y curva del sistema (operating_point.with_design_points)
+    if "operating_flow" in results:
+        operating_flow = results["operating_flow"]
+        columns["operating_point"] = {
+            "flow": finite_or_none(round_half_even(operating_flow, 6)),
+            "flow_ls": finite_or_none(round_half_even(operating_flow * 1000, 1)),
+            "head": finite_or_none(round_half_even(results["operating_head"], 2)),
+            "status": results["operating_status"].tolist(),
+        }
+        columns["system_curve"] = {
+            "flow": columns["pump_curve"]["flow"],
+            "head": round_half_even(results["system_curve_head"], 2).tolist(),
+            "flow_ls": columns["pump_curve"]["flow_ls"],
+        }
+
+    if "segment_mask" in results:
+        columns["segments"] = format_segments(results)
+
+    for i in np.flatnonzero(bad):
+        for key, value in columns.items():
+            if isinstance(value, dict):
+                for sub in value.values():
+                    sub[i] = None
+            else:
+                value[i] = None
+    return columns, bad
+
+
+def finite_or_none(values):
+    """List of the values with NaN/inf replaced by None (JSON has no NaN)."""
+    return [v if np.isfinite(v) else None for v in values.tolist()]
+
+
+def to_records(columns, bad):
+    """Turn formatted columns into a list of /calculate-shaped dicts."""
+    records = []
+    for i, failed in enumerate(bad.tolist()):
+        if failed:
+            records.append({"error": INVALID_ROW_ERROR})
+            continue
+        record = {}
+        for key, value in columns.items():
+            if key in ("pump_curve", "system_curve"):
+                record[key] = [
+                    {"flow": q, "head": h, "flow_ls": q_ls}
+                    for q, h, q_ls in zip(value["flow"][i], value["head"][i], value["flow_ls"][i])
+                ]
+            elif isinstance(value, dict):
+                record[key] = {k: v[i] for k, v in value.items()}
+            else:
+                record[key] = value[i]
+        records.append(record)
+    return records
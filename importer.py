@@ -0,0 +1,412 @@
+"""
+Streaming bulk import of station lists from CSV or XLSX.
+
+The upload is read as it arrives and processed in chunks of CHUNK_ROWS rows:
+header columns map onto PumpingStationInput fields (units included), each
+chunk runs through hydraulics.calculate_batch, and the results are written
+back as CSV text or Parquet row groups before the next chunk is read, so
+memory use does not grow with the file. Rows that cannot be parsed or
+calculated carry their error in the ``error`` column; the run goes on.
+
+XLSX files need random access, so they are spooled to a temporary file and
+read with openpyxl in read-only mode. openpyxl and pyarrow (Parquet output,
+an optional dependency) are imported only when needed.
+"""
+import asyncio
+import codecs
+import csv
+import functools
+import io
+import tempfile
+from itertools import islice, zip_longest
+
+import numpy as np
+
+import fluids
+import friction
+import hydraulics
+from streams import ByteDrain
+
+CHUNK_ROWS = 5000
+XLSX_MAGIC = b"PK\x03\x04"
+CSV_DELIMITERS = ",;\t"
+
+# Propiedades del fluido: una celda vacía toma la de la tabla (no es un error)
+OPTIONAL_NUMERIC_FIELDS = ('temperature', 'fluid_density', 'fluid_viscosity')
+NUMERIC_FIELDS = (
+    'geometric_height', 'flow_rate', 'pipe_length', 'pipe_diameter', 'pump_efficiency',
+) + hydraulics.FITTING_FIELDS + OPTIONAL_NUMERIC_FIELDS
+TEXT_FIELDS = (
+    'geometric_height_unit', 'flow_rate_unit', 'pipe_length_unit', 'pipe_diameter_unit', 'pipe_material',
+    'friction_model', 'fluid', 'project_name',
+)
+# Valores por defecto de las columnas opcionales (como en PumpingStationInput)
+FIELD_DEFAULTS = {**{field: 0 for field in hydraulics.FITTING_FIELDS},
+                  'friction_model': friction.DEFAULT_METHOD, 'fluid': fluids.DEFAULT_FLUID, 'project_name': ''}
+
+# Columnas de resultados, con los nombres y el redondeo de /calculate
+OUTPUT_FIELDS = (
+    'total_head', 'geometric_height', 'friction_head_loss', 'minor_head_loss', 'velocity', 'reynolds',
+    'friction_factor', 'flow_rate_m3s', 'power_kw', 'power_hp', 'fluid_density', 'kinematic_viscosity',
+)
+TEXT_OUTPUTS = ('curve_equation', 'error')
+
+
+def sniff(text):
+    try:
+        return csv.Sniffer().sniff(text, CSV_DELIMITERS)
+    except csv.Error:
+        # Una sola columna, o un encabezado sin separador reconocible
+        return csv.excel
+
+
+def field_name(header):
+    """PumpingStationInput field for a spreadsheet header ("Flow rate unit" -> flow_rate_unit)."""
+    return "_".join(str(header or "").strip().lower().split())
+
+
+async def csv_batches(first, chunks):
+    """
+    Rows of a CSV byte stream, one list per received chunk, after a first
+    item telling whether numbers use a decimal comma. The delimiter (comma,
+    semicolon or tab) is sniffed from the header; with semicolons, numbers
+    are read with a decimal comma.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    dialect = None
+    pending = ""
+    text = ""
+
+    async def pieces():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    async for chunk in pieces():
+        text += decoder.decode(chunk)
+        *lines, text = text.split("\n")
+        records = []
+        for line in lines:
+            # Un registro termina en un salto de línea fuera de comillas
+            pending += line + "\n"
+            if pending.count('"') % 2 == 0:
+                records.append(pending)
+                pending = ""
+        if not any(record.strip() for record in records):
+            continue
+        if dialect is None:
+            dialect = sniff(next(record for record in records if record.strip()))
+            yield dialect.delimiter == ";"
+        yield list(csv.reader(records, dialect))
+    tail = pending + text + decoder.decode(b"", final=True)
+    if tail.strip():
+        if dialect is None:
+            dialect = sniff(tail)
+            yield dialect.delimiter == ";"
+        yield list(csv.reader([tail], dialect))
+
+
+async def xlsx_batches(first, chunks, sheet=None, size=CHUNK_ROWS):
+    """
+    Rows of an XLSX byte stream (spooled to disk), in lists of ``size``, after
+    a first False item. The workbook is opened and read in the thread pool.
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("La importación de XLSX necesita openpyxl (pip install openpyxl)")
+    with tempfile.TemporaryFile() as spool:
+        spool.write(first)
+        async for chunk in chunks:
+            spool.write(chunk)
+        spool.seek(0)
+        # openpyxl descomprime y analiza el XML al abrir y al iterar: se hace en el pool de hilos
+        loop = asyncio.get_running_loop()
+        workbook = await loop.run_in_executor(
+            None, functools.partial(openpyxl.load_workbook, spool, read_only=True, data_only=True))
+        try:
+            if sheet is not None and sheet not in workbook.sheetnames:
+                raise ValueError(f"La hoja '{sheet}' no existe (hojas: {', '.join(workbook.sheetnames)})")
+            rows = (workbook[sheet] if sheet is not None else workbook.active).iter_rows(values_only=True)
+            yield False  # Sin coma decimal: las celdas numéricas ya son números
+            while True:
+                batch = await loop.run_in_executor(None, list, islice(rows, size))
+                if not batch:
+                    break
+                yield batch
+        finally:
+            workbook.close()
+
+
+class ImportTable:
+    """
+    An uploaded station list being read: the column mapping from its header
+    and the chunked calculation of its rows. ``defaults`` give a value for
+    fields without a column (e.g. ``flow_rate_unit=l/s`` for the whole file).
+    """
+
+    def __init__(self, header, batches, defaults=None, decimal_comma=False):
+        self.batches = batches
+        self.decimal_comma = decimal_comma
+        self.columns = {}
+        for index, name in enumerate(header):
+            field = field_name(name)
+            if field in NUMERIC_FIELDS + TEXT_FIELDS and field not in self.columns:
+                self.columns[field] = index
+        self.defaults = {**FIELD_DEFAULTS, **{k: v for k, v in (defaults or {}).items()
+                                              if k in NUMERIC_FIELDS + TEXT_FIELDS}}
+        missing = [f for f in hydraulics.REQUIRED_FIELDS if f not in self.columns and f not in self.defaults]
+        if missing:
+            raise ValueError(f"Faltan columnas requeridas: {', '.join(missing)}")
+        self.fields = ['row'] + (['project_name'] if 'project_name' in self.columns else []) \
+            + list(OUTPUT_FIELDS) + list(TEXT_OUTPUTS)
+        self.header_row = 1
+
+    async def chunks(self, size=CHUNK_ROWS):
+        """
+        (row numbers, rows) for at most ``size`` data rows at a time, blank
+        rows skipped. Row numbers count from the header as row 1, as in a
+        spreadsheet (CSV records spanning several lines count once).
+        """
+        numbers, chunk = [], []
+        number = self.header_row
+        async for batch in self.batches:
+            for row in batch:
+                number += 1
+                if not any(row) and all(cell in (None, "") for cell in row):
+                    continue
+                numbers.append(number)
+                chunk.append(row)
+                if len(chunk) == size:
+                    yield numbers, chunk
+                    numbers, chunk = [], []
+        if chunk:
+            yield numbers, chunk
+
+    def cells(self, raw, field, n):
+        """Cells of ``field`` (stripped; empty cells take the field default)."""
+        index = self.columns.get(field)
+        if index is None or index >= len(raw):
+            return [self.defaults.get(field)] * n
+        default = self.defaults.get(field)
+        values = [v.strip() if isinstance(v, str) else v for v in raw[index]]
+        return [default if v is None or v == "" else v for v in values]
+
+    def numbers(self, raw, field, n, errors):
+        """Float column; cells that are not numbers become NaN and a row error."""
+        index = self.columns.get(field)
+        if index is not None and index < len(raw) and not self.decimal_comma:
+            # Camino rápido: todas las celdas son números
+            try:
+                values = np.array(raw[index], dtype=float)
+                if not np.isnan(values).any():
+                    return values
+            except (TypeError, ValueError):
+                pass
+        cells = self.cells(raw, field, n)
+        if self.decimal_comma:
+            cells = [c.replace(",", ".") if isinstance(c, str) else c for c in cells]
+        try:
+            values = np.array(cells, dtype=float)
+        except (TypeError, ValueError):
+            # Alguna celda no es un número: convertir una a una para ubicar los errores
+            values = np.empty(n)
+            for i, cell in enumerate(cells):
+                try:
+                    values[i] = float(cell)
+                except (TypeError, ValueError):
+                    values[i] = np.nan
+        for i in np.flatnonzero(np.isnan(values)).tolist():
+            if cells[i] is None and field in OPTIONAL_NUMERIC_FIELDS:
+                continue
+            if i not in errors:
+                errors[i] = (f"Falta el valor de '{field}'" if cells[i] is None
+                             else f"Valor no numérico en '{field}': {cells[i]!r}")
+        return values
+
+    def texts(self, raw, field, n, errors):
+        values = np.array(self.cells(raw, field, n), dtype=object)
+        for i in np.flatnonzero(values == None).tolist():  # noqa: E711 (comparación elemento a elemento)
+            errors.setdefault(i, f"Falta el valor de '{field}'")
+            values[i] = ""
+        return values
+
+    def calculate(self, numbers, rows):
+        """Result table (field -> list or array) for a chunk of data rows."""
+        n = len(rows)
+        errors = {}
+        raw = list(zip_longest(*rows))  # Columnas del trozo; las filas cortas se completan con None
+        columns = {field: self.numbers(raw, field, n, errors) for field in NUMERIC_FIELDS}
+        columns.update({field: self.texts(raw, field, n, errors) for field in TEXT_FIELDS})
+        for i, name in enumerate(columns['friction_model'].tolist()):
+            if name not in friction.METHODS and i not in errors:
+                errors[i] = f"Modelo de fricción desconocido: '{name}'. Opciones: {', '.join(friction.METHODS)}"
+        known = set(fluids.load_fluids()) | {fluids.CUSTOM}
+        for i, name in enumerate(columns['fluid'].tolist()):
+            if name.lower() not in known and i not in errors:
+                errors[i] = f"Fluido desconocido: '{name}'. Opciones: {', '.join(sorted(known))}"
+
+        table = {'row': numbers}
+        if 'project_name' in self.columns:
+            table['project_name'] = columns['project_name'].tolist()
+
+        valid = np.ones(n, dtype=bool)
+        valid[list(errors)] = False
+        outputs = {field: np.full(n, np.nan) for field in OUTPUT_FIELDS}
+        equations = [None] * n
+        del columns['project_name']
+        try:
+            groups = [np.flatnonzero(valid)] if valid.any() else []
+            evaluated = [evaluate({field: values[group] for field, values in columns.items()}) for group in groups]
+        except Exception:
+            # El lote falló entero: calcular fila por fila para acotar el error
+            groups, evaluated = [], []
+            for i in np.flatnonzero(valid):
+                try:
+                    evaluated.append(evaluate({field: values[[i]] for field, values in columns.items()}))
+                    groups.append(np.array([i]))
+                except Exception as e:
+                    errors[int(i)] = str(e)
+        for group, (rounded, curve_equations, bad) in zip(groups, evaluated):
+            for field in OUTPUT_FIELDS:
+                outputs[field][group] = rounded[field]
+            for i, equation, failed in zip(group.tolist(), curve_equations, bad.tolist()):
+                if failed:
+                    errors[i] = hydraulics.INVALID_ROW_ERROR
+                else:
+                    equations[i] = equation
+
+        failed = np.zeros(n, dtype=bool)
+        failed[list(errors)] = True
+        for field in OUTPUT_FIELDS:
+            outputs[field][failed] = np.nan
+            table[field] = outputs[field]
+        table['curve_equation'] = equations
+        table['error'] = [errors.get(i) for i in range(n)]
+        return table
+
+
+def evaluate(columns):
+    """Rounded outputs, curve equations and invalid-row mask of a columnar chunk."""
+    results = hydraulics.calculate_batch(columns)
+    equations = [f"H = {round(a, 2)} - {b / (1000**2):.4f}·Q²"
+                 for a, b in zip(results["curve_A"].tolist(), results["curve_B"].tolist())]
+    return hydraulics.round_outputs(results), equations, hydraulics.invalid_rows(results)
+
+
+def error_table(fields, message):
+    """One-row table carrying an error that stopped the import mid-stream."""
+    return {field: [message if field == 'error' else None] for field in fields}
+
+
+async def open_table(chunks, defaults=None, sheet=None):
+    """ImportTable for a CSV or XLSX byte stream (XLSX detected by its ZIP signature)."""
+    first = b""
+    async for chunk in chunks:
+        first += chunk
+        if len(first) >= len(XLSX_MAGIC):
+            break
+    batches = xlsx_batches(first, chunks, sheet) if first.startswith(XLSX_MAGIC) else csv_batches(first, chunks)
+    try:
+        decimal_comma = await batches.__anext__()
+    except StopAsyncIteration:
+        raise ValueError("El archivo está vacío")
+
+    # El encabezado es la primera fila con contenido
+    header, skipped = None, 0
+    while header is None:
+        try:
+            batch = await batches.__anext__()
+        except StopAsyncIteration:
+            raise ValueError("El archivo no tiene encabezado")
+        for index, row in enumerate(batch):
+            if any(cell not in (None, "") for cell in row):
+                header, rest = row, batch[index + 1:]
+                skipped += index
+                break
+        else:
+            skipped += len(batch)
+
+    async def remaining():
+        yield rest
+        async for batch in batches:
+            yield batch
+
+    table = ImportTable(header, remaining(), defaults, decimal_comma)
+    table.header_row += skipped
+    return table
+
+
+class CsvWriter:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def _rows(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def start(self):
+        return self._rows([self.fields])
+
+    def write(self, table):
+        columns = []
+        for field in self.fields:
+            values = table[field]
+            if isinstance(values, np.ndarray):
+                values = [v if v == v else None for v in values.tolist()]  # NaN -> celda vacía
+            columns.append(["" if v is None else v for v in values])
+        return self._rows(zip(*columns))
+
+    def close(self):
+        return b""
+
+
+class ParquetWriter:
+    """Parquet output with one row group per chunk, flushed as it is written."""
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, fields):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("La exportación a Parquet necesita pyarrow (pip install pyarrow)")
+        self.pa = pyarrow
+        self.fields = fields
+        types = {'row': pyarrow.int64(), 'project_name': pyarrow.string(), 'curve_equation': pyarrow.string(),
+                 'error': pyarrow.string()}
+        self.schema = pyarrow.schema([(f, types.get(f, pyarrow.float64())) for f in fields])
+        self.sink = ByteDrain()
+        self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema)
+
+    def start(self):
+        return self.sink.drain()
+
+    def write(self, table):
+        arrays = []
+        for field in self.fields:
+            values = table[field]
+            if isinstance(values, np.ndarray):
+                arrays.append(self.pa.array(values, mask=np.isnan(values)))
+            else:
+                arrays.append(self.pa.array(values, type=self.schema.field(field).type))
+        self.writer.write_batch(self.pa.record_batch(arrays, schema=self.schema))
+        return self.sink.drain()
+
+    def close(self):
+        self.writer.close()
+        return self.sink.drain()
+
+
+WRITERS = {"csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def writer_for(format, fields):
+    if format not in WRITERS:
+        raise ValueError(f"Formato de salida '{format}' no soportado (use {', '.join(WRITERS)})")
+    return WRITERS[format](fields)
@@ -0,0 +1,204 @@
+"""
+Per-session state for live recalculation of one station over a WebSocket.
+
+The /calculate pipeline is split in stages that depend on a few input
+fields and on earlier stages:
+
+    pipe    flow, length, diameter, material, friction model, fluid
+            -> velocity, Reynolds, friction factor, friction head loss
+    minor   fittings + pipe -> minor head loss
+    head    geometric height + pipe + minor -> total head
+    power   pump efficiency + head -> power
+    curves  pipe + minor + head -> pump curve, system curve, operating point
+
+A change marks the stages that read the changed fields as dirty, and every
+stage downstream of them; only those are recomputed. The session returns the
+/calculate keys whose rounded value changed, so the client receives small
+diffs (e.g. an efficiency slider never recomputes the curves). Values are
+rounded like calculate_pumping_station.
+"""
+import math
+import os
+
+import numpy as np
+
+import friction
+import hydraulics
+import operating_point
+
+PIPE, MINOR, HEAD, POWER, CURVES = "pipe", "minor", "head", "power", "curves"
+STAGES = (PIPE, MINOR, HEAD, POWER, CURVES)  # En orden topológico
+
+# Campos de entrada que lee cada etapa y etapas de las que depende
+STAGE_FIELDS = {
+    PIPE: ('flow_rate', 'flow_rate_unit', 'pipe_length', 'pipe_length_unit',
+           'pipe_diameter', 'pipe_diameter_unit', 'pipe_material', 'friction_model')
+    + hydraulics.FLUID_FIELDS,
+    MINOR: hydraulics.FITTING_FIELDS,
+    HEAD: ('geometric_height', 'geometric_height_unit'),
+    POWER: ('pump_efficiency',),
+    CURVES: (),
+}
+STAGE_INPUTS = {
+    PIPE: (),
+    MINOR: (PIPE,),
+    HEAD: (PIPE, MINOR),
+    POWER: (PIPE, HEAD),
+    CURVES: (PIPE, MINOR, HEAD),
+}
+# Campos que solo se guardan (no intervienen en el cálculo)
+PASSIVE_FIELDS = ('project_name', 'project_location')
+LIVE_FIELDS = tuple(field for stage in STAGES for field in STAGE_FIELDS[stage]) + PASSIVE_FIELDS
+
+# Agrupación de mensajes: se recalcula tras DEBOUNCE segundos sin cambios nuevos,
+# y como máximo cada MAX_WAIT segundos mientras sigan llegando (deslizadores)
+DEBOUNCE = float(os.environ.get("LIVE_DEBOUNCE_MS", 40)) / 1000
+MAX_WAIT = float(os.environ.get("LIVE_MAX_WAIT_MS", 200)) / 1000
+
+
+def dirty_stages(fields):
+    """Stages to recompute when ``fields`` change, in evaluation order."""
+    dirty = []
+    for stage in STAGES:
+        if set(STAGE_FIELDS[stage]) & set(fields) or set(STAGE_INPUTS[stage]) & set(dirty):
+            dirty.append(stage)
+    return dirty
+
+
+def pipe_stage(inputs, stages):
+    flow_rate_m3s = hydraulics.to_si([inputs['flow_rate']], inputs['flow_rate_unit'], hydraulics.FLOW_UNITS)
+    pipe_length_m = hydraulics.to_si([inputs['pipe_length']], inputs['pipe_length_unit'], hydraulics.LENGTH_UNITS)
+    diameter_m = hydraulics.to_si([inputs['pipe_diameter']], inputs['pipe_diameter_unit'], hydraulics.DIAMETER_UNITS)
+    roughness_mm = hydraulics.roughness_for([inputs['pipe_material']])
+    model = inputs.get('friction_model') or friction.DEFAULT_METHOD
+    kinematic_viscosity, density = hydraulics.fluid_properties(inputs)
+    # Sin accesorios, altura ni bomba: solo la parte que depende de la tubería
+    results = hydraulics.compute_hydraulics(0.0, flow_rate_m3s, pipe_length_m, diameter_m, roughness_mm,
+                                            0.0, 1.0, model, kinematic_viscosity)
+    stage = {key: float(results[key][0]) for key in ("velocity", "reynolds", "friction_factor",
+                                                      "friction_head_loss")}
+    stage.update(flow_rate_m3s=float(flow_rate_m3s[0]), pipe_length_m=float(pipe_length_m[0]),
+                 diameter_m=float(diameter_m[0]), roughness_mm=float(roughness_mm[0]), friction_model=model,
+                 kinematic_viscosity=kinematic_viscosity, density=density)
+    return stage
+
+
+def minor_stage(inputs, stages):
+    total_k = float(hydraulics.fittings_k({f: [inputs.get(f)] for f in hydraulics.FITTING_FIELDS}, 1)[0])
+    velocity = stages[PIPE]["velocity"]
+    return {"total_k": total_k, "minor_head_loss": total_k * (velocity**2) / (2 * hydraulics.GRAVITY)}
+
+
+def head_stage(inputs, stages):
+    geometric_height_m = float(hydraulics.to_si([inputs['geometric_height']], inputs['geometric_height_unit'],
+                                                hydraulics.HEIGHT_UNITS)[0])
+    total_head = geometric_height_m + stages[PIPE]["friction_head_loss"] + stages[MINOR]["minor_head_loss"]
+    return {"geometric_height": geometric_height_m, "total_head": total_head}
+
+
+def power_stage(inputs, stages):
+    flow_rate_m3s = stages[PIPE]["flow_rate_m3s"]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        power_watts = (stages[PIPE]["density"] * hydraulics.GRAVITY * flow_rate_m3s * stages[HEAD]["total_head"]) \
+            / np.float64(inputs['pump_efficiency'])
+    power_kw = float(power_watts) / 1000
+    return {"power_kw": power_kw, "power_hp": power_kw * 1.34102}
+
+
+def curves_stage(inputs, stages):
+    pipe, head = stages[PIPE], stages[HEAD]
+    total_head, flow_rate_m3s = head["total_head"], pipe["flow_rate_m3s"]
+    A, B, q, h = hydraulics.pump_curve(np.array([total_head]), np.array([flow_rate_m3s]))
+    system = operating_point.SystemCurve(head["geometric_height"], pipe["pipe_length_m"], pipe["diameter_m"],
+                                         pipe["roughness_mm"], stages[MINOR]["total_k"], pipe["friction_model"],
+                                         pipe["kinematic_viscosity"], pipe["density"])
+    pump = operating_point.PumpCurve.synthetic(total_head, flow_rate_m3s)
+    with np.errstate(invalid='ignore', over='ignore'):
+        op_flow, op_head, op_status = operating_point.solve(pump, system, flow_rate_m3s)
+        system_heads = system.head(q)[0]
+    return {"A": float(A[0]), "B": float(B[0]), "curve_flow": q[0].tolist(), "curve_head": h[0].tolist(),
+            "system_head": system_heads.tolist(), "operating_flow": float(op_flow[0]),
+            "operating_head": float(op_head[0]), "operating_status": op_status[0]}
+
+
+STAGE_FUNCTIONS = {PIPE: pipe_stage, MINOR: minor_stage, HEAD: head_stage, POWER: power_stage, CURVES: curves_stage}
+
+
+def stage_outputs(stage, values):
+    """/calculate keys produced by one stage, rounded like calculate_pumping_station."""
+    if stage == PIPE:
+        flow = values["flow_rate_m3s"]
+        return {
+            "friction_head_loss": round(values["friction_head_loss"], 2),
+            "velocity": round(values["velocity"], 2),
+            "reynolds": round(values["reynolds"], 2),
+            "friction_factor": round(values["friction_factor"], 6),
+            "flow_rate": round(flow * 1000, 1),
+            "flow_rate_m3s": round(flow, 6),
+            "bep_flow_ls": round(flow * 1000, 1),
+            "fluid_density": round(values["density"], 2),
+            "kinematic_viscosity": round(values["kinematic_viscosity"], 10),
+        }
+    if stage == MINOR:
+        return {"minor_head_loss": round(values["minor_head_loss"], 2)}
+    if stage == HEAD:
+        return {"total_head": round(values["total_head"], 2),
+                "geometric_height": round(values["geometric_height"], 2)}
+    if stage == POWER:
+        power_kw, power_hp = values["power_kw"], values["power_hp"]
+        return {"power_kw": round(power_kw, 4) if power_kw < 1 else round(power_kw, 2),
+                "power_hp": round(power_hp, 4) if power_hp < 1 else round(power_hp, 2)}
+    curve_points = [{"flow": round(q, 4), "head": round(h, 2), "flow_ls": round(q * 1000, 1)}
+                    for q, h in zip(values["curve_flow"], values["curve_head"])]
+    solved = math.isfinite(values["operating_flow"])
+    return {
+        "pump_curve": curve_points,
+        "curve_equation": f"H = {round(values['A'], 2)} - {values['B'] / (1000**2):.4f}·Q²",
+        "operating_point": {
+            "flow": round(values["operating_flow"], 6) if solved else None,
+            "flow_ls": round(values["operating_flow"] * 1000, 1) if solved else None,
+            "head": round(values["operating_head"], 2) if solved else None,
+            "status": values["operating_status"],
+        },
+        "system_curve": [{**point, "head": round(h, 2)} for point, h in zip(curve_points, values["system_head"])],
+    }
+
+
+class LiveSession:
+    """
+    Inputs, stage values and rounded outputs of one live calculator session.
+    ``requested`` accumulates every change the client sent, including those
+    of a batch that failed; ``inputs`` are those of the last valid result.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requested = {}
+        self.inputs = {}
+        self.stages = {}
+        self.outputs = {}
+
+    def update(self, inputs):
+        """
+        Apply the full (already validated) input dict ``inputs``. Returns
+        (changed outputs, recomputed stages). On a non-finite result nothing is
+        applied and ValueError is raised, so the session keeps its last state.
+        """
+        changed_fields = [field for field in LIVE_FIELDS if inputs.get(field) != self.inputs.get(field)]
+        dirty = dirty_stages(changed_fields) if self.stages else list(STAGES)
+        stages = dict(self.stages)
+        outputs = {}
+        for stage in dirty:
+            stages[stage] = STAGE_FUNCTIONS[stage](inputs, stages)
+            outputs.update(stage_outputs(stage, stages[stage]))
+        for key in ("velocity", "reynolds", "friction_factor", "total_head", "power_kw"):
+            if key in outputs and not math.isfinite(outputs[key]):
+                raise ValueError(hydraulics.INVALID_ROW_ERROR)
+
+        self.inputs = dict(inputs)
+        self.stages = stages
+        diff = {key: value for key, value in outputs.items() if self.outputs.get(key) != value}
+        self.outputs.update(outputs)
+        return diff, dirty
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import asyncio
+import functools
+import json
 import math
+import os
+import re
+import unicodedata
+from collections import deque
 from datetime import datetime
-from fastapi.responses import Response
-import matplotlib.pyplot as plt
-import matplotlib
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 import numpy as np
+import bundle
+import charts
+import cache
+import comparison
+import fluids
+import friction
+import hydraulics
+import importer
+import live
+import network
+import operating_point
+import optimizer
+import pump_catalog
+import pump_groups
+import report_jobs
+import simulation
+import surge
+import uncertainty
+import vfd
+from report_pool import PoolSaturatedError, ReportPool
 
-# Configure matplotlib for headless operation
-matplotlib.use('Agg')
 import base64
 import io
 
@@ -32,6 +55,64 @@ app.mount("/image", StaticFiles(directory="frontend/image"), name="image")
 
 templates = Jinja2Templates(directory="frontend/templates")
 
+def warm_report_worker():
+    """Build the report assets (ReportLab styles, chart skeleton) when a worker process starts"""
+    try:
+        import report_builder
+        charts.get_chart()
+    except ImportError:
+        pass
+
+# Pool de procesos para reportes PDF (REPORT_WORKERS, REPORT_QUEUE_LIMIT)
+report_pool = ReportPool(initializer=warm_report_worker)
+
+@app.on_event("shutdown")
+def shutdown_report_pool():
+    report_pool.shutdown()
+    uncertainty.shutdown()
+
+# Caché de resultados y PDFs (RESULTS_CACHE_MAX_MB, PDF_CACHE_MAX_MB, CACHE_DIR, CACHE_DISK_MAX_MB)
+results_cache = cache.from_env("results", 16)
+pdf_cache = cache.from_env("pdf", 64)
+# Etapa de fricción de /compare incremental (STAGES_CACHE_MAX_MB)
+stage_cache = cache.from_env("stages", 8)
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a CPU-heavy calculation in the thread pool so the event loop keeps serving other requests"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+# Campos que solo aparecen en el reporte y no afectan al cálculo
+REPORT_ONLY_FIELDS = ("project_name", "project_location")
+
+# Gráfico del PDF: "vector" (dibujo nativo de ReportLab) o "raster" (PNG a 150 dpi)
+CHART_FORMATS = ("vector", "raster")
+REPORT_CHART_FORMAT = os.environ.get("REPORT_CHART_FORMAT", "vector")
+
+# Paquetes de reportes: máximo de escenarios y reportes por worker renderizados por adelantado
+BUNDLE_MAX_ITEMS = int(os.environ.get("BUNDLE_MAX_ITEMS", 500))
+BUNDLE_LOOKAHEAD = 2
+
+# Trabajos de reporte asíncronos (REPORT_STORE_DIR, REPORT_JOB_TTL)
+report_store = report_jobs.ReportJobStore()
+report_tasks = set()  # Referencias a las tareas en curso para que no las recoja el GC
+report_purge_task = None
+REPORT_CLEANUP_INTERVAL = int(os.environ.get("REPORT_CLEANUP_INTERVAL", 300))
+# Máximo de trabajos en cola o en ejecución; al llegar al tope POST /reports responde 503
+REPORT_JOBS_MAX = int(os.environ.get("REPORT_JOBS_MAX", 32))
+
+async def purge_report_jobs():
+    while True:
+        removed = report_store.purge_expired()
+        if removed:
+            print(f"Trabajos de reporte expirados eliminados: {removed}")
+        await asyncio.sleep(REPORT_CLEANUP_INTERVAL)
+
+@app.on_event("startup")
+async def start_report_jobs():
+    global report_purge_task
+    report_store.fail_interrupted()
+    report_purge_task = asyncio.create_task(purge_report_jobs())
+
 # Configurar el favicon
 from fastapi.responses import FileResponse
 from pathlib import Path
@@ -43,9 +124,52 @@ async def favicon():
         favicon_path = Path("frontend/static/favicon.ico")
     return FileResponse(favicon_path)
 
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
+
+class PumpCurveInput(BaseModel):
+    # Polinomio H = c0 + c1·Q + c2·Q² + ... o puntos [[Q, H], ...]
+    coefficients: Optional[List[float]] = None
+    points: Optional[List[List[float]]] = None
+    max_flow: Optional[float] = None  # Fin del rango válido del polinomio
+    flow_unit: Optional[str] = "l/s"
+    head_unit: Optional[str] = "m"
+
+class PipeSegmentInput(BaseModel):
+    # Tramo de la impulsión, con sus propios accesorios
+    label: Optional[str] = None
+    length: float
+    length_unit: Optional[str] = "m"
+    diameter: float
+    diameter_unit: Optional[str] = "mm"
+    material: str
+    valve_gate: Optional[int] = 0
+    valve_butterfly: Optional[int] = 0
+    valve_check: Optional[int] = 0
+    valve_globe: Optional[int] = 0
+    elbow_90: Optional[int] = 0
+    elbow_45: Optional[int] = 0
+
+class PumpUnitInput(PumpCurveInput):
+    # Tipo de bomba de un grupo; sin curva se usa la parábola sintética del punto de diseño
+    name: Optional[str] = None
+    count: Optional[int] = 1  # Unidades iguales de este tipo
+    speed_ratio: Optional[float] = 1.0  # Velocidad / velocidad nominal (variador), leyes de afinidad
+    efficiency: Optional[float] = None  # Por defecto, pump_efficiency de la estación
+
+class PumpGroupInput(BaseModel):
+    arrangement: Optional[str] = "parallel"  # "parallel" o "series"
+    pumps: List[PumpUnitInput]
+    standby: Optional[int] = 0  # Bombas de reserva: nunca funcionan todas a la vez
+
+class FluidInput(BaseModel):
+    # Fluido bombeado: water, seawater, ethylene_glycol_30/50, propylene_glycol_30/50 o custom
+    # (ver GET /fluids). Sin temperatura ni propiedades se usa el agua a 20 °C de siempre
+    fluid: Optional[str] = fluids.DEFAULT_FLUID
+    temperature: Optional[float] = None  # °C
+    fluid_density: Optional[float] = None  # kg/m3, reemplaza a la de la tabla
+    fluid_viscosity: Optional[float] = None  # Viscosidad dinámica en mPa·s (cP), reemplaza a la de la tabla
 
-class PumpingStationInput(BaseModel):
+class PumpingStationInput(FluidInput):
     project_name: Optional[str] = ""
     project_location: Optional[str] = ""
     geometric_height: float
@@ -67,6 +191,199 @@ class PumpingStationInput(BaseModel):
     elbow_90: Optional[int] = 0
     elbow_45: Optional[int] = 0
 
+    # Modelo de factor de fricción: swamee_jain, haaland, churchill, colebrook o table
+    friction_model: Optional[str] = friction.DEFAULT_METHOD
+
+    # Tramos en serie de la impulsión (opcional): reemplazan a la tubería única
+    # (pipe_length, pipe_diameter, pipe_material); los accesorios de la estación
+    # se suman al primer tramo
+    segments: Optional[List[PipeSegmentInput]] = None
+
+    # Grupo de bombas en paralelo o en serie (opcional): agrega el escalonamiento a la respuesta
+    pump_group: Optional[PumpGroupInput] = None
+
+class BatchInput(BaseModel):
+    # Lista de entradas completas o carga columnar {campo: [valores]}
+    items: Optional[List[PumpingStationInput]] = None
+    columns: Optional[Dict[str, Any]] = None
+    format: Optional[str] = "columns"  # "columns" o "records"
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float
+    num: Optional[int] = None   # Número de puntos (linspace)
+    step: Optional[float] = None  # o paso, incluyendo 'stop'
+
+class SweepInput(FluidInput):
+    geometric_height: float
+    geometric_height_unit: str
+    flow_rate: Union[SweepRange, List[float], float]
+    flow_rate_unit: str
+    pipe_length: float
+    pipe_length_unit: str
+    pipe_diameter: Union[SweepRange, List[float], float]
+    pipe_diameter_unit: str
+    pipe_material: Union[List[str], str]
+    pump_efficiency: Union[SweepRange, List[float], float]
+
+    valve_gate: Optional[int] = 0
+    valve_butterfly: Optional[int] = 0
+    valve_check: Optional[int] = 0
+    valve_globe: Optional[int] = 0
+    elbow_90: Optional[int] = 0
+    elbow_45: Optional[int] = 0
+
+class PipeCatalogItem(BaseModel):
+    nominal: str
+    internal_diameter_mm: float
+    cost_per_m: float
+
+class DiameterOptimizationInput(FluidInput):
+    geometric_height: float
+    geometric_height_unit: str
+    flow_rate: float
+    flow_rate_unit: str
+    pipe_length: float
+    pipe_length_unit: str
+    pipe_material: str
+    pump_efficiency: float
+
+    valve_gate: Optional[int] = 0
+    valve_butterfly: Optional[int] = 0
+    valve_check: Optional[int] = 0
+    valve_globe: Optional[int] = 0
+    elbow_90: Optional[int] = 0
+    elbow_45: Optional[int] = 0
+    friction_model: Optional[str] = friction.DEFAULT_METHOD
+
+    # Parámetros económicos y restricciones
+    years: float = 20  # Horizonte de análisis (años)
+    energy_tariff: float = 0.12  # Costo de energía por kWh
+    operating_hours: float = 4000  # Horas de operación por año
+    velocity_min: Optional[float] = 0.6  # m/s
+    velocity_max: Optional[float] = 3.0  # m/s
+    top_n: int = 5
+    catalog: Optional[List[PipeCatalogItem]] = None  # Catálogo propio (por defecto data/pipe_catalog.json)
+
+class CompareInput(BaseModel):
+    baseline: PumpingStationInput
+    # Cada variante cambia algunos campos de la base; "name" es opcional
+    variants: List[Dict[str, Any]]
+    energy_tariff: float = 0.12  # Costo de energía por kWh
+    operating_hours: float = 4000  # Horas de operación por año
+    rank_by: Optional[str] = comparison.DEFAULT_RANK  # total_head, power_kw, annual_energy_kwh o annual_energy_cost
+    incremental: Optional[bool] = False  # Reutiliza la etapa de fricción ya calculada (sólo recalcula lo afectado)
+
+class PumpSelectionInput(PumpingStationInput):
+    # El punto de diseño y la curva del sistema salen de los datos de la estación
+    top_n: int = 5
+    head_tolerance: float = 0.1  # Desvío admitido de la altura en el caudal de diseño (fracción)
+    npsh_available: Optional[float] = None  # NPSH disponible (m); sin valor no se filtra
+
+class VariableSpeedInput(PumpingStationInput):
+    # Bombas iguales en paralelo, todas a la misma velocidad; cada una con la
+    # curva sintética de su parte del punto de diseño
+    pumps: Optional[int] = 1
+    min_speed: Optional[float] = vfd.MIN_SPEED  # Relación de velocidad n/n0
+    max_speed: Optional[float] = vfd.MAX_SPEED
+
+class SpeedInput(VariableSpeedInput):
+    target_flow: Optional[float] = None  # En flow_rate_unit; por defecto el caudal de diseño
+
+class SpeedScheduleInput(VariableSpeedInput):
+    demand: List[float]  # Caudal demandado por paso, en flow_rate_unit
+    step_hours: Optional[float] = 1.0
+    format: Optional[str] = "columns"  # "columns", "records" o "summary" (solo totales)
+
+class SimulationInput(PumpingStationInput):
+    # geometric_height es la altura estática con nivel cero (fondo del tanque o del pozo)
+    mode: Optional[str] = simulation.TANK  # "tank" (la bomba llena un tanque) o "wet_well" (vacía un pozo)
+    storage_area: float  # m², sección del tanque o del pozo
+    max_level: float  # m, altura útil
+    initial_level: float  # m
+    start_level: float  # m, nivel de arranque de la bomba
+    stop_level: float  # m, nivel de parada
+    step_seconds: Optional[float] = 60
+    start_hour: Optional[float] = 0  # Hora del día del primer paso
+    tariff: Union[float, List[float]] = 0.12  # Precio por kWh, o 24 precios horarios
+    output_every: Optional[int] = 1  # Emitir uno de cada N pasos (0: solo el resumen)
+    # Demanda por paso en flow_rate_unit; si falta, el cuerpo sigue en NDJSON con un valor por línea
+    demand: Optional[List[float]] = None
+
+class SurgeInput(PumpingStationInput):
+    scenario: Optional[str] = surge.PUMP_TRIP  # "pump_trip" o "valve_closure"
+    wave_speed: Optional[float] = None  # m/s; por defecto, la típica del material de cada tramo
+    pump_inertia: Optional[float] = None  # kg·m², bomba y motor; por defecto se estima (Thorley)
+    pump_speed_rpm: Optional[float] = 1450
+    closure_time: Optional[float] = 5.0  # s, cierre de la válvula de descarga
+    closure_exponent: Optional[float] = 1.0  # 1: cierre lineal
+    duration: Optional[float] = None  # s; por defecto 10 periodos 2L/a
+    reaches: Optional[int] = surge.DEFAULT_REACHES
+    profile: Optional[List[List[float]]] = None  # [[abscisa m, cota m], ...]; por defecto subida uniforme
+
+class DistributionInput(BaseModel):
+    distribution: Optional[str] = uncertainty.NORMAL  # normal, lognormal, uniform, triangular
+    mean: Optional[float] = None  # Por defecto, el valor nominal del dato
+    std: Optional[float] = None
+    cv: Optional[float] = None  # std / media, alternativa a std
+    low: Optional[float] = None  # uniform y triangular
+    high: Optional[float] = None
+    mode: Optional[float] = None  # triangular; por defecto, el valor nominal
+
+class UncertaintyInput(PumpingStationInput):
+    # Claves: flow_rate, pump_efficiency, roughness (mm), geometric_height, pipe_length, pipe_diameter
+    distributions: Dict[str, DistributionInput]
+    samples: Optional[int] = uncertainty.DEFAULT_SAMPLES
+    seed: Optional[int] = None
+    workers: Optional[int] = 1  # Procesos; >1 reparte las muestras entre núcleos
+    percentiles: Optional[List[float]] = None
+
+class BundleInput(BaseModel):
+    items: List[PumpingStationInput]
+    title: Optional[str] = ""  # Proyecto o licitación, en la portada
+
+class JunctionInput(BaseModel):
+    id: str
+    elevation: Optional[float] = 0.0  # m
+    demand: Optional[float] = 0.0  # En demand_unit de la red
+
+class ReservoirInput(BaseModel):
+    # Reservorio o tanque a nivel fijo
+    id: str
+    head: float  # m, cota de la superficie libre
+
+class NetworkPipeInput(PipeSegmentInput):
+    id: str
+    start: str  # Nudo inicial; el caudal es positivo de start a end
+    end: str
+
+class NetworkPumpInput(PumpCurveInput):
+    # Sin curva se usa la curva sintética de la estación de bombeo de la red ('station')
+    id: str
+    start: str  # Nudo de aspiración
+    end: str  # Nudo de impulsión
+    speed_ratio: Optional[float] = 1.0
+    efficiency: Optional[float] = None  # Por defecto, pump_efficiency de la estación
+
+class NetworkInput(BaseModel):
+    junctions: List[JunctionInput]
+    reservoirs: List[ReservoirInput]
+    pipes: List[NetworkPipeInput]
+    pumps: Optional[List[NetworkPumpInput]] = None
+    station: Optional[PumpingStationInput] = None
+    demand_unit: Optional[str] = "l/s"
+    friction_model: Optional[str] = None  # Por defecto network.FRICTION_MODEL
+    accuracy: Optional[float] = None
+    max_iterations: Optional[int] = None
+
+class OperatingPointInput(BaseModel):
+    # Sistemas como en /calculate/batch
+    items: Optional[List[PumpingStationInput]] = None
+    columns: Optional[Dict[str, Any]] = None
+    # Una curva por sistema o una para todos; sin curvas se usa la curva sintética del punto de diseño
+    pumps: Optional[List[PumpCurveInput]] = None
+    format: Optional[str] = "columns"  # "columns" o "records"
+
 @app.get("/")
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -87,17 +404,12 @@ def calculate_pumping_station(data: PumpingStationInput):
     diameter_m = data.pipe_diameter / 1000  # mm to m
     
     # Get roughness coefficient based on material
-    roughness = {
-        "pvc": 0.00015,
-        "steel": 0.000045,
-        "copper": 0.0000015,
-        "concrete": 0.0003,
-        "ductile_iron": 0.00015  # Hierro dúctil
-    }.get(data.pipe_material.lower(), 0.0015)  # mm
+    roughness = hydraulics.ROUGHNESS.get(data.pipe_material.lower(), hydraulics.DEFAULT_ROUGHNESS)  # mm
     print(f"Coeficiente de rugosidad: {roughness} mm")
     
     # Calculate Reynolds number
-    kinematic_viscosity = 1.004e-6  # m2/s for water at 20°C
+    # Viscosidad cinemática y densidad del fluido a su temperatura (agua a 20 °C por defecto)
+    kinematic_viscosity, water_density = hydraulics.fluid_properties(data)
     # --- Conversión de Unidades a SI ---
     # Altura Geométrica (a metros)
     geometric_height_m = data.geometric_height
@@ -133,25 +445,14 @@ def calculate_pumping_station(data: PumpingStationInput):
     reynolds = velocity * diameter_m / kinematic_viscosity
     
     # Calculate friction factor (Darcy-Weisbach)
-    if reynolds < 2000:
-        friction_factor = 64 / reynolds
-    else:
-        # Colebrook-White approximation
-        friction_factor = 0.25 / (math.log10((roughness/1000)/(3.7*diameter_m) + 5.74/(reynolds**0.9)))**2
+    friction_factor = friction.friction_factor(reynolds, roughness, diameter_m, data.friction_model)
     
     # Calculate head loss por fricción
     gravity = 9.80665  # m/s2 (standard gravity)
     head_loss_friction = friction_factor * (pipe_length_m/diameter_m) * (velocity**2)/(2*gravity)
 
     # --- Cálculo de Pérdidas Menores por Accesorios ---
-    k_values = {
-        'valve_gate': 0.2,       # Válvula de compuerta
-        'valve_butterfly': 0.3,  # Válvula mariposa
-        'valve_check': 2.0,      # Válvula check (tipo clapeta)
-        'valve_globe': 10.0,     # Válvula de globo (para regulación)
-        'elbow_90': 0.9,         # Codo de 90 grados
-        'elbow_45': 0.4          # Codo de 45 grados
-    }
+    k_values = hydraulics.K_VALUES
     total_k = (
         data.valve_gate * k_values['valve_gate'] +
         data.valve_butterfly * k_values['valve_butterfly'] +
@@ -164,9 +465,26 @@ def calculate_pumping_station(data: PumpingStationInput):
     
     # Total dynamic head
     total_head = geometric_height_m + head_loss_friction + head_loss_minor
+
+    # Tramos: pérdidas por tramo vectorizadas y sumadas; velocidad, Reynolds y f
+    # son los del primer tramo (descarga de la estación)
+    segments = None
+    if data.segments:
+        pipeline = hydraulics.pipeline_results(
+            [data.segments], geometric_height_m, np.array([flow_rate_m3s]), np.array([pipe_length_m]),
+            np.array([diameter_m]), np.array([roughness]), np.array([total_k]), 1.0, data.friction_model,
+            kinematic_viscosity)
+        velocity = float(pipeline["velocity"][0])
+        reynolds = float(pipeline["reynolds"][0])
+        friction_factor = float(pipeline["friction_factor"][0])
+        head_loss_friction = float(pipeline["friction_head_loss"][0])
+        head_loss_minor = float(pipeline["minor_head_loss"][0])
+        total_head = float(pipeline["total_head"][0])
+        pipe_length_m, diameter_m = pipeline["pipe_length_m"], pipeline["diameter_m"]
+        roughness, total_k = pipeline["roughness_mm"], pipeline["total_k"]
+        segments = hydraulics.format_segments(pipeline)[0]
     
     # Power calculation with precise constants
-    water_density = 1000  # kg/m3
     gravity = 9.80665  # m/s2 (standard gravity)
     if flow_rate_m3s <= 0 or total_head <= 0:
         print("¡Advertencia! Valores de entrada inválidos para cálculo de potencia")
@@ -207,9 +525,32 @@ def calculate_pumping_station(data: PumpingStationInput):
             "head": round(h, 2),
             "flow_ls": round(q_m3s * 1000, 1)
         })
+
+    # --- Punto de Operación Real y Curva del Sistema ---
+    # Intersección de la curva de la bomba con la curva del sistema completa
+    # (fricción recalculada en cada caudal), no el punto de diseño
+    system = operating_point.SystemCurve(geometric_height_m, pipe_length_m, diameter_m,
+                                         roughness, total_k, data.friction_model, kinematic_viscosity, water_density)
+    pump = operating_point.PumpCurve.synthetic(total_head, flow_rate_m3s)
+    with np.errstate(invalid='ignore', over='ignore'):
+        op_flow, op_head, op_status = operating_point.solve(pump, system, flow_rate_m3s)
+        system_heads = system.head(np.array([[(i / steps) * max_flow_m3s for i in range(steps + 1)]]))[0]
+    op_flow, op_head = float(op_flow[0]), float(op_head[0])
+    solved = math.isfinite(op_flow)
+    system_points = [
+        {**point, "head": round(float(h), 2)} for point, h in zip(curve_points, system_heads)
+    ]
     
+    staging = None
+    if data.pump_group is not None:
+        group = data.pump_group
+        pumps = pump_groups.group_from_specs([p.dict() for p in group.pumps], group.arrangement, group.standby,
+                                             total_head, flow_rate_m3s, data.pump_efficiency)
+        staging = pump_groups.staging_table(pumps, pump_groups.solve_staging(pumps, system, flow_rate_m3s),
+                                            flow_rate_m3s)
+
     # Resultados
-    return {
+    results = {
         "total_head": round(total_head, 2),
         "geometric_height": round(geometric_height_m, 2),
         "friction_head_loss": round(head_loss_friction, 2),
@@ -221,11 +562,25 @@ def calculate_pumping_station(data: PumpingStationInput):
         "friction_factor": round(friction_factor, 6),
         "flow_rate": round(flow_rate_m3s * 1000, 1),  # Caudal en l/s para el punto de operación
         "flow_rate_m3s": round(flow_rate_m3s, 6),  # Caudal en m3/s para cálculos
+        "fluid_density": round(water_density, 2),  # kg/m3
+        "kinematic_viscosity": round(kinematic_viscosity, 10),  # m2/s
         "pump_curve": curve_points,
         "bep_flow_ls": round(bep_flow_m3s * 1000, 1),
         # La ecuación debe usar Q en l/s, por lo que el coeficiente B debe ser ajustado (dividido por 1000^2)
-        "curve_equation": f"H = {round(A, 2)} - {B / (1000**2):.4f}·Q²"
+        "curve_equation": f"H = {round(A, 2)} - {B / (1000**2):.4f}·Q²",
+        "operating_point": {
+            "flow": round(op_flow, 6) if solved else None,
+            "flow_ls": round(op_flow * 1000, 1) if solved else None,
+            "head": round(op_head, 2) if solved else None,
+            "status": op_status[0],
+        },
+        "system_curve": system_points
     }
+    if segments is not None:
+        results["segments"] = segments
+    if staging is not None:
+        results["staging"] = staging
+    return results
     
     print("Resultados:")
     for key, value in results.items():
@@ -233,542 +588,867 @@ def calculate_pumping_station(data: PumpingStationInput):
     
     return results
 
+def cached_calculation(data: PumpingStationInput):
+    """calculate_pumping_station memoized on the canonical hash of the hydraulic inputs"""
+    key = cache.canonical_key("results", data, exclude=REPORT_ONLY_FIELDS)
+    hit = results_cache.get(key)
+    if hit is not None:
+        return json.loads(hit)
+    results = calculate_pumping_station(data)
+    results_cache.set(key, json.dumps(results).encode("utf-8"))
+    return results
+
+def report_cache_key(data: PumpingStationInput, format="pdf", chart=REPORT_CHART_FORMAT):
+    # El reporte imprime la fecha del día, que forma parte de la clave
+    extra = datetime.now().strftime("%d/%m/%Y")
+    if format == "pdf":
+        extra = [extra, chart]
+    return cache.canonical_key(format, data, extra=extra)
+
+@app.get('/fluids')
+async def list_fluids():
+    """Fluids with tabulated properties and their temperature range"""
+    return {"fluids": fluids.catalog(), "default": fluids.DEFAULT_FLUID,
+            "default_temperature": fluids.DEFAULT_TEMPERATURE}
+
+@app.get('/cache/stats')
+async def cache_stats():
+    return {"results": results_cache.stats(), "pdf": pdf_cache.stats(), "stages": stage_cache.stats()}
+
 @app.post('/calculate')
 async def calculate(data: PumpingStationInput):
     try:
-        results = calculate_pumping_station(data)
+        results = cached_calculation(data)
         return results
     except Exception as e:
         print(f"Error en cálculo: {str(e)}")
         return {"error": str(e)}
 
+def live_update(session: live.LiveSession, messages):
+    """Apply a batch of coalesced client messages to a live session and build the reply"""
+    seq = None
+    try:
+        changes = {}
+        for text in messages:
+            message = json.loads(text)
+            seq = message.get("seq", seq)
+            if message.get("type") == "init":
+                # Estado completo del formulario: la sesión empieza de nuevo
+                session.reset()
+                changes = dict(message.get("data") or {})
+            else:
+                changes.update(message.get("changes") or {})
+        unknown = sorted(set(changes) - set(live.LIVE_FIELDS))
+        if unknown:
+            raise ValueError(f"Campos no soportados en el cálculo en vivo: {', '.join(unknown)}")
+        # Los cambios se conservan aunque el lote falle: el cliente no los vuelve a enviar
+        session.requested.update(changes)
+        inputs = PumpingStationInput(**session.requested).dict()
+        diff, stages = session.update({field: inputs[field] for field in live.LIVE_FIELDS})
+        return {"type": "result", "seq": seq, "changes": diff, "stages": stages, "messages": len(messages)}
+    except Exception as e:
+        print(f"Error en cálculo en vivo: {str(e)}")
+        return {"type": "error", "seq": seq, "error": str(e)}
+
+async def live_messages(websocket: WebSocket, queue: asyncio.Queue):
+    # Lee del socket mientras se recalcula; None marca el cierre de la conexión
+    try:
+        while True:
+            await queue.put(await websocket.receive_text())
+    except (WebSocketDisconnect, RuntimeError):
+        await queue.put(None)
+
+@app.websocket('/ws/calculate')
+async def live_calculate(websocket: WebSocket):
+    """
+    Live recalculation for the calculator form. The client sends
+    {"type": "init", "data": {...}} and then {"type": "change", "changes":
+    {...}, "seq": n}; the server replies with the /calculate keys whose value
+    changed. Bursts of changes (sliders) are coalesced into one recalculation.
+    """
+    await websocket.accept()
+    session = live.LiveSession()
+    messages = asyncio.Queue()
+    reader = asyncio.create_task(live_messages(websocket, messages))
+    loop = asyncio.get_running_loop()
+    try:
+        closed = False
+        while not closed:
+            message = await messages.get()
+            if message is None:
+                break
+            batch = [message]
+            deadline = loop.time() + live.MAX_WAIT
+            while deadline > loop.time():
+                try:
+                    message = await asyncio.wait_for(messages.get(), min(live.DEBOUNCE, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if message is None:
+                    closed = True
+                    break
+                batch.append(message)
+            await websocket.send_json(live_update(session, batch))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
+
+@app.post('/calculate/batch')
+def calculate_batch(data: BatchInput):
+    """
+    Calculate many stations in one vectorized pass (same numbers as /calculate)
+    """
+    try:
+        if data.items is not None:
+            columns = hydraulics.columns_from_items(data.items)
+        elif data.columns is not None:
+            columns = data.columns
+        else:
+            return {"error": "Debe enviar 'items' o 'columns'"}
+
+        results = operating_point.with_design_points(hydraulics.calculate_batch(columns))
+        formatted, bad = hydraulics.format_results(results)
+        errors = [{"index": int(i), "error": hydraulics.INVALID_ROW_ERROR} for i in np.flatnonzero(bad)]
+
+        if data.format == "records":
+            formatted = hydraulics.to_records(formatted, bad)
+        # Serializada en el hilo del pool, no con jsonable_encoder en el bucle de eventos
+        return JSONResponse({"count": len(bad), "results": formatted, "errors": errors})
+    except Exception as e:
+        print(f"Error en cálculo por lotes: {str(e)}")
+        return {"error": str(e)}
+
+SWEEP_JSON_CHUNK = 20_000  # Celdas por trozo de la respuesta de /sweep
+
+def sweep_json(header, columns, chunk=SWEEP_JSON_CHUNK):
+    """
+    JSON body of a sweep, rendered in slices of ``chunk`` cells. The rows are
+    iterated in the thread pool and each slice releases the GIL afterwards,
+    so millions of cells do not stall the event loop.
+    """
+    yield json.dumps(header)[:-1]
+    for key, values in columns.items():
+        yield f', "{key}": ['
+        for start in range(0, len(values), chunk):
+            yield ("," if start else "") + json.dumps(values[start:start + chunk])[1:-1]
+        yield "]"
+    yield "}"
+
+@app.post('/sweep')
+def sweep(data: SweepInput):
+    """
+    Evaluate the full Cartesian grid of diameter x flow x material x efficiency.
+    Result arrays are flattened in C order over the axes listed in 'axes'.
+    """
+    try:
+        params = data.dict()
+        axes = {name: params.pop(name) for name in hydraulics.SWEEP_AXES}
+        values, results = hydraulics.sweep(params, axes)
+
+        bad = hydraulics.invalid_rows(results).ravel()
+        columns = {
+            "total_head": hydraulics.round_half_even(results["total_head"], 2),
+            "velocity": hydraulics.round_half_even(results["velocity"], 2),
+            "power_kw": np.where(results["power_kw"] < 1,
+                                 hydraulics.round_half_even(results["power_kw"], 4),
+                                 hydraulics.round_half_even(results["power_kw"], 2)),
+        }
+        columns = {key: value.ravel().tolist() for key, value in columns.items()}
+        for i in np.flatnonzero(bad):
+            for value in columns.values():
+                value[i] = None
+
+        header = {
+            "axes": {name: values[name].tolist() for name in hydraulics.SWEEP_AXES},
+            "shape": list(results["total_head"].shape),
+            "cells": int(bad.size),
+        }
+        return StreamingResponse(sweep_json(header, columns), media_type="application/json")
+    except Exception as e:
+        print(f"Error en barrido paramétrico: {str(e)}")
+        return {"error": str(e)}
+
+@app.post('/optimize/diameter')
+async def optimize_diameter(data: DiameterOptimizationInput):
+    """
+    Find the commercial diameter with the lowest pipe + energy life-cycle cost
+    """
+    try:
+        if data.catalog:
+            catalog = optimizer.PipeCatalog([item.dict() for item in data.catalog])
+        else:
+            catalog = optimizer.load_catalog().get(data.pipe_material.lower())
+            if catalog is None:
+                return {"error": f"No hay catálogo de diámetros para el material '{data.pipe_material}'"}
+
+        return optimizer.optimize_diameter(
+            data.dict(), catalog,
+            years=data.years,
+            energy_tariff=data.energy_tariff,
+            operating_hours=data.operating_hours,
+            velocity_min=data.velocity_min,
+            velocity_max=data.velocity_max,
+            top_n=data.top_n,
+        )
+    except Exception as e:
+        print(f"Error en optimización de diámetro: {str(e)}")
+        return {"error": str(e)}
+
+@app.post('/compare')
+async def compare_alternatives(data: CompareInput):
+    """
+    Compare design alternatives with a baseline: head, power and annual energy
+    of each, deltas against the baseline and ranking
+    """
+    try:
+        baseline = data.baseline.dict()
+        variants = []
+        for index, variant in enumerate(data.variants, start=1):
+            name, row = comparison.merge_variant(baseline, variant, index)
+            variants.append((name, PumpingStationInput(**row).dict()))
+        return comparison.compare(
+            baseline, variants,
+            operating_hours=data.operating_hours,
+            energy_tariff=data.energy_tariff,
+            rank_by=data.rank_by or comparison.DEFAULT_RANK,
+            incremental=bool(data.incremental),
+            stage_cache=stage_cache,
+        )
+    except Exception as e:
+        print(f"Error en comparación de alternativas: {str(e)}")
+        return {"error": str(e)}
+
+@app.post('/operating-point')
+def solve_operating_point(data: OperatingPointInput):
+    """
+    Intersect pump curves with the full system curves (friction re-evaluated at
+    each flow) for many pump/system pairs in one vectorized pass
+    """
+    try:
+        if data.items is not None:
+            columns = hydraulics.columns_from_items(data.items)
+        elif data.columns is not None:
+            columns = data.columns
+        else:
+            return {"error": "Debe enviar 'items' o 'columns'"}
+
+        results = hydraulics.calculate_batch(columns)
+        system = operating_point.SystemCurve.from_batch(results)
+        n = len(system)
+        if data.pumps:
+            if len(data.pumps) not in (1, n):
+                return {"error": "Envíe una curva de bomba por sistema, o una sola para todos"}
+            pump = operating_point.pump_curves_from_specs([p.dict() for p in data.pumps])
+        else:
+            pump = operating_point.PumpCurve.synthetic(results["total_head"], results["flow_rate_m3s"])
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            flow, head, status = operating_point.solve(pump, system, results["flow_rate_m3s"])
+            at_point = system.evaluate(flow, pump_efficiency=results["pump_efficiency"])
+
+        power_kw = at_point["power_kw"]
+        formatted = {
+            "flow_rate": hydraulics.round_half_even(flow * 1000, 1),
+            "flow_rate_m3s": hydraulics.round_half_even(flow, 6),
+            "head": hydraulics.round_half_even(head, 2),
+            "velocity": hydraulics.round_half_even(at_point["velocity"], 2),
+            "friction_head_loss": hydraulics.round_half_even(at_point["friction_head_loss"], 2),
+            "minor_head_loss": hydraulics.round_half_even(at_point["minor_head_loss"], 2),
+            "power_kw": np.where(power_kw < 1,
+                                 hydraulics.round_half_even(power_kw, 4),
+                                 hydraulics.round_half_even(power_kw, 2)),
+        }
+        formatted = {key: hydraulics.finite_or_none(value) for key, value in formatted.items()}
+        formatted["status"] = status.tolist()
+        errors = [
+            {"index": int(i), "error": operating_point.STATUS_ERRORS[status[i]]}
+            for i in np.flatnonzero(status != operating_point.OK)
+        ]
+
+        if data.format == "records":
+            formatted = [dict(zip(formatted, row)) for row in zip(*formatted.values())]
+        # Serializada en el hilo del pool, no con jsonable_encoder en el bucle de eventos
+        return JSONResponse({"count": n, "results": formatted, "errors": errors})
+    except Exception as e:
+        print(f"Error en cálculo del punto de operación: {str(e)}")
+        return {"error": str(e)}
+
 def generate_pump_curve_chart(results):
-    """Generate pump curve chart with multiple flow rate axes and return as base64 encoded image"""
+    """Generate pump curve chart with multiple flow rate axes and return the PNG bytes"""
     try:
-        # Create figure with larger size to accommodate multiple axes
-        fig, ax1 = plt.subplots(figsize=(12, 8))
-        
-        # Generate flow rate range (0 to 150% of design flow)
-        flow_design = results.get('flow_rate_m3s', 0.05)  # Default if not available
-        flow_range = np.linspace(0, flow_design * 1.5, 100)
-        
-        # Calculate head values using pump curve equation
-        # H = a*Q^2 + b*Q + c (typical pump curve)
-        total_head = results.get('total_head', 20)
-        
-        # Simple quadratic pump curve approximation
-        # Assume pump can deliver 120% of required head at zero flow
-        # and drops to 80% at 150% flow
-        a = -0.4 * total_head / (flow_design * 1.5)**2
-        b = 0
-        c = 1.2 * total_head
-        
-        head_values = a * flow_range**2 + b * flow_range + c
-        
-        # Plot pump curve (using m³/s as base unit)
-        ax1.plot(flow_range, head_values, 'b-', linewidth=3, label='Curva de Bomba', zorder=3)
-        
-        # Plot operating point
-        ax1.plot(flow_design, total_head, 'ro', markersize=10, label='Punto de Operación', zorder=4)
-        
-        # Add system curve (simplified)
-        system_head = results.get('geometric_height', 17) + (flow_range / flow_design)**2 * results.get('friction_head_loss', 3)
-        ax1.plot(flow_range, system_head, 'g--', linewidth=2.5, label='Curva del Sistema', zorder=2)
-        
-        # PRIMARY AXIS (m³/s) - Bottom
-        ax1.set_xlabel('Caudal (m³/s)', fontsize=12, fontweight='bold', color='#1B2951')
-        ax1.set_ylabel('Altura (m)', fontsize=12, fontweight='bold', color='#1B2951')
-        ax1.tick_params(axis='x', colors='#1B2951', labelsize=10)
-        ax1.tick_params(axis='y', colors='#1B2951', labelsize=10)
-        
-        # SECONDARY AXIS (l/s) - Top
-        ax2 = ax1.twiny()
-        ax2.set_xlim(ax1.get_xlim())
-        # Convert m³/s to l/s (multiply by 1000)
-        ax2_ticks = ax1.get_xticks()
-        ax2.set_xticks(ax2_ticks)
-        ax2.set_xticklabels([f'{tick*1000:.1f}' for tick in ax2_ticks])
-        ax2.set_xlabel('Caudal (l/s)', fontsize=12, fontweight='bold', color='#00BFFF')
-        ax2.tick_params(axis='x', colors='#00BFFF', labelsize=10)
-        
-        # THIRD AXIS (GPM) - Top right
-        ax3 = ax1.twiny()
-        ax3.spines['top'].set_position(('outward', 40))
-        ax3.set_xlim(ax1.get_xlim())
-        # Convert m³/s to GPM (multiply by 15850.3)
-        ax3_ticks = ax1.get_xticks()
-        ax3.set_xticks(ax3_ticks)
-        ax3.set_xticklabels([f'{tick*15850.3:.0f}' for tick in ax3_ticks])
-        ax3.set_xlabel('Caudal (GPM)', fontsize=12, fontweight='bold', color='#FF6B35')
-        ax3.tick_params(axis='x', colors='#FF6B35', labelsize=10)
-        
-        # Remove title - will be handled by PDF header
-        
-        # Grid and styling
-        ax1.grid(True, alpha=0.4, linestyle='--', color='gray')
-        ax1.set_facecolor('#FAFBFC')
-        
-        # Legend positioned in bottom right corner
-        ax1.legend(loc='lower right', frameon=True, fancybox=True, shadow=True, 
-                  fontsize=11, bbox_to_anchor=(0.98, 0.02))
-        
-        # Enhanced annotations with multiple units
-        flow_ls = flow_design * 1000  # l/s
-        flow_gpm = flow_design * 15850.3  # GPM
-        
-        annotation_text = f'Punto de Operación\n' \
-                         f'Q = {flow_design:.4f} m³/s\n' \
-                         f'Q = {flow_ls:.1f} l/s\n' \
-                         f'Q = {flow_gpm:.0f} GPM\n' \
-                         f'H = {total_head:.1f} m'
-        
-        ax1.annotate(annotation_text,
-                    xy=(flow_design, total_head),
-                    xytext=(flow_design * 0.15, total_head * 0.7),
-                    arrowprops=dict(arrowstyle='->', color='red', lw=2),
-                    fontsize=9, ha='left', va='center',
-                    bbox=dict(boxstyle='round,pad=0.4', facecolor='yellow', 
-                             edgecolor='red', alpha=0.9, linewidth=1.5))
-        
-        # Set limits with some padding
-        ax1.set_xlim(0, flow_design * 1.6)
-        ax1.set_ylim(0, max(head_values) * 1.2)
-        
-        # Save to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        plt.close(fig)
-        
-        return f"data:image/png;base64,{image_base64}"
+        return charts.render_pump_curve_png(results)
     except Exception as e:
         print(f"Error generating chart: {str(e)}")
         return None
 
-@app.post('/generate-report')
-async def generate_report(data: PumpingStationInput):
+def pump_curve_flowable(results, chart=REPORT_CHART_FORMAT):
+    """
+    Pump curve chart as a ReportLab flowable: a native vector drawing, or the
+    150 dpi PNG when chart="raster" or the vector drawing fails.
+    """
+    from reportlab.platypus import Image
+    from reportlab.lib.units import inch
+
+    if chart == "vector":
+        try:
+            return charts.pump_curve_drawing(results, 6*inch, 3.6*inch)
+        except Exception as e:
+            print(f"Error generating vector chart, falling back to PNG: {str(e)}")
+    chart_png = generate_pump_curve_chart(results)
+    if chart_png:
+        return Image(io.BytesIO(chart_png), width=6*inch, height=3.6*inch)
+    return None
+
+def build_report_pdf(data: PumpingStationInput, chart=REPORT_CHART_FORMAT):
+    """
+    Build the PDF report (calculation, chart and ReportLab document) and return its bytes.
+    Runs inside a worker process of the report pool.
+    """
+    import report_builder  # Importación diferida: ReportLab es opcional para el resto de la API
+
+    results = calculate_pumping_station(data)
+    current_date = datetime.now().strftime("%d/%m/%Y")
+    chart_flowable = pump_curve_flowable(results, chart)
+    return report_builder.build_report_pdf(data, results, chart_flowable, current_date)
+
+def build_report_html(data: PumpingStationInput):
+    """
+    Render the HTML version of the report (report.html) with the chart inlined
+    as a data URI. Only used when HTML output is requested.
+    """
+    results = calculate_pumping_station(data)
+    chart_png = generate_pump_curve_chart(results)
+    chart_image = None
+    if chart_png:
+        chart_image = f"data:image/png;base64,{base64.b64encode(chart_png).decode('utf-8')}"
+    return templates.get_template("report.html").render(
+        data=data.dict(),
+        results=results,
+        current_date=datetime.now().strftime("%d/%m/%Y"),
+        chart_image=chart_image
+    )
+
+@app.post('/select-pump')
+def select_pump(data: PumpSelectionInput):
+    """
+    Pick catalog pumps for the design duty point, ranked by efficiency at their
+    intersection with the system curve
+    """
     try:
-        # Calculate results
-        results = calculate_pumping_station(data)
-        
-        # Get current date
-        current_date = datetime.now().strftime("%d/%m/%Y")
-        
-        # Generate pump curve chart
-        chart_image = generate_pump_curve_chart(results)
-        
-        # Render HTML template
-        html_content = templates.get_template("report.html").render(
-            request=Request,
-            data=data.dict(),
-            results=results,
-            current_date=current_date,
-            chart_image=chart_image
+        results = hydraulics.calculate_batch(hydraulics.columns_from_items([data]))
+        duty_flow = float(results["flow_rate_m3s"][0])
+        duty_head = float(results["total_head"][0])
+        if not (np.isfinite(duty_flow) and np.isfinite(duty_head)):
+            return {"error": hydraulics.INVALID_ROW_ERROR}
+
+        return pump_catalog.select_pumps(
+            pump_catalog.load_catalog(),
+            operating_point.SystemCurve.from_batch(results),
+            duty_flow, duty_head,
+            top_n=data.top_n,
+            head_tolerance=data.head_tolerance,
+            npsh_available=data.npsh_available,
         )
-        
-        # Generate Professional PDF using ReportLab
+    except Exception as e:
+        print(f"Error en selección de bomba: {str(e)}")
+        return {"error": str(e)}
+
+def variable_speed_station(data: VariableSpeedInput):
+    """Design results, system curve and nominal unit curve of a VFD station."""
+    if not data.pumps or data.pumps < 1:
+        raise ValueError("Debe haber al menos una bomba")
+    results = hydraulics.calculate_batch(hydraulics.columns_from_items([data]))
+    design_flow = float(results["flow_rate_m3s"][0])
+    design_head = float(results["total_head"][0])
+    if not (np.isfinite(design_flow) and np.isfinite(design_head)) or design_flow <= 0:
+        raise ValueError(hydraulics.INVALID_ROW_ERROR)
+    system = operating_point.SystemCurve.from_batch(results)
+    bep_flow = design_flow / data.pumps
+    pump = operating_point.PumpCurve.synthetic(design_head, bep_flow)
+    return system, pump, bep_flow
+
+@app.post('/vfd/speed')
+def vfd_speed(data: SpeedInput):
+    """
+    Speed ratio at which the duty pumps deliver a target flow on the system
+    curve, with the affinity-scaled station curve at that speed
+    """
+    try:
+        system, pump, bep_flow = variable_speed_station(data)
+        target = data.target_flow if data.target_flow is not None else data.flow_rate
+        flow = float(hydraulics.to_si([target], data.flow_rate_unit, hydraulics.FLOW_UNITS)[0])
+        unit_flow = flow / data.pumps
+        head = float(system.head(np.array([[flow]]))[0, 0])
+        speed = float(vfd.speed_for_flow(pump, unit_flow, head, data.min_speed, data.max_speed))
+        if not math.isfinite(speed):
+            return {"error": f"Ninguna velocidad entre {data.min_speed} y {data.max_speed} entrega ese caudal"}
+        _, efficiency, power_kw = vfd.operating_at_speed(pump, system, data.pumps, unit_flow, speed,
+                                                         bep_flow, data.pump_efficiency)
+
+        # Curva de la estación a esa velocidad (todas las bombas en marcha)
+        q = np.linspace(0, pump.max_flow[0], hydraulics.PUMP_CURVE_STEPS + 1)
+        q, h = vfd.affinity(q * data.pumps, pump.head(q[np.newaxis, :])[0], speed=speed)
+        return {
+            "target_flow": round(flow * 1000, 2),
+            "speed_ratio": round(speed, 4),
+            "head": round(head, 2),
+            "efficiency": round(float(efficiency), 4),
+            "power_kw": round(float(power_kw), 2),
+            "pumps_on": data.pumps,
+            "pump_curve": [{"flow_ls": round(float(qi) * 1000, 1), "head": round(float(hi), 2)}
+                           for qi, hi in zip(q, h)],
+        }
+    except Exception as e:
+        print(f"Error en cálculo de velocidad: {str(e)}")
+        return {"error": str(e)}
+
+@app.post('/vfd/schedule')
+def vfd_schedule(data: SpeedScheduleInput):
+    """
+    Lowest-energy staging and speed for every step of a demand profile
+    (vectorized over all steps)
+    """
+    try:
+        system, pump, bep_flow = variable_speed_station(data)
+        demand = hydraulics.to_si(data.demand, data.flow_rate_unit, hydraulics.FLOW_UNITS)
+        schedule, totals = vfd.speed_schedule(pump, system, demand, data.pumps, bep_flow, data.pump_efficiency,
+                                              data.min_speed, data.max_speed, data.step_hours)
+        totals["energy_kwh"] = round(totals["energy_kwh"], 2)
+        totals["volume_m3"] = round(totals["volume_m3"], 2)
+        if totals["specific_energy_kwh_m3"] is not None:
+            totals["specific_energy_kwh_m3"] = round(totals["specific_energy_kwh_m3"], 4)
+        if data.format == "summary":
+            return totals
+
+        columns = {
+            "pumps_on": schedule["pumps_on"].tolist(),
+            "speed": hydraulics.finite_or_none(hydraulics.round_half_even(schedule["speed"], 4)),
+            "head": hydraulics.finite_or_none(hydraulics.round_half_even(schedule["head"], 2)),
+            "efficiency": hydraulics.finite_or_none(hydraulics.round_half_even(schedule["efficiency"], 4)),
+            "power_kw": hydraulics.finite_or_none(hydraulics.round_half_even(schedule["power_kw"], 2)),
+        }
+        if data.format == "records":
+            columns = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        # Serializada en el hilo del pool, no con jsonable_encoder en el bucle de eventos
+        return JSONResponse({**totals, "schedule": columns})
+    except Exception as e:
+        print(f"Error en programación de velocidad: {str(e)}")
+        return {"error": str(e)}
+
+async def ndjson_lines(request: Request):
+    """Decoded, non-empty lines of a streamed request body."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line.decode("utf-8")
+    if buffer.strip():
+        yield buffer.decode("utf-8")
+
+async def demand_chunks(lines, size=simulation.CHUNK_STEPS):
+    # Un número por línea, o un objeto {"demand": valor}
+    chunk = []
+    async for line in lines:
+        value = json.loads(line)
+        chunk.append(value["demand"] if isinstance(value, dict) else value)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@app.post('/simulate')
+async def simulate(request: Request):
+    """
+    Extended-period simulation with level control, streamed as NDJSON: the
+    per-step results, then a summary line. The body is a SimulationInput, or
+    NDJSON with the SimulationInput on the first line and one demand value per
+    following line, read as it arrives
+    """
+    lines = ndjson_lines(request)
+    try:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            data = SimulationInput(**json.loads(await request.body()))
+            if data.demand is None:
+                return {"error": "Falta la serie 'demand'"}
+        else:
+            data = SimulationInput(**json.loads(await lines.__anext__()))
+
+        results = hydraulics.calculate_batch(hydraulics.columns_from_items([data]))
+        if not (np.isfinite(results["total_head"][0]) and results["flow_rate_m3s"][0] > 0):
+            return {"error": hydraulics.INVALID_ROW_ERROR}
+        pump = operating_point.PumpCurve.synthetic(results["total_head"], results["flow_rate_m3s"])
+        simulator = simulation.Simulator(
+            pump, operating_point.SystemCurve.from_batch(results), data.pump_efficiency,
+            data.mode, data.storage_area, data.max_level, data.initial_level,
+            data.start_level, data.stop_level, data.step_seconds, data.start_hour, data.tariff,
+        )
+    except Exception as e:
+        print(f"Error en simulación: {str(e)}")
+        return {"error": str(e)}
+
+    async def from_list():
+        for start in range(0, len(data.demand), simulation.CHUNK_STEPS):
+            yield data.demand[start:start + simulation.CHUNK_STEPS]
+
+    async def stream():
+        every = data.output_every or 0
         try:
-            from reportlab.lib.pagesizes import legal
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak, BaseDocTemplate, PageTemplate, Frame
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch, mm
-            from reportlab.lib import colors
-            from reportlab.platypus.flowables import HRFlowable
-            from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-            import os
-            
-            buffer = io.BytesIO()
-            
-            # Create custom document with header and footer
-            class HeaderFooterDocTemplate(BaseDocTemplate):
-                def __init__(self, filename, **kwargs):
-                    BaseDocTemplate.__init__(self, filename, **kwargs)
-                    
-                def build_header_footer(self, canvas, doc):
-                    # Header
-                    canvas.saveState()
-                    
-                    # Company name - left aligned with blue line
-                    canvas.setFont('Helvetica-Bold', 20)
-                    canvas.setFillColor(colors.HexColor('#1B2951'))
-                    company_name = 'VMS HYDRAULICS, S.A.'
-                    canvas.drawString(50, legal[1] - 50, company_name)
-                    
-                    # Tagline - left aligned below company name
-                    canvas.setFont('Helvetica-Oblique', 12)
-                    canvas.setFillColor(colors.HexColor('#666666'))
-                    tagline = 'Válvulas, mediciones y soluciones hidráulicas'
-                    canvas.drawString(50, legal[1] - 70, tagline)
-                    
-                    # Date and version info - right aligned
-                    canvas.setFont('Helvetica', 10)
-                    canvas.setFillColor(colors.HexColor('#666666'))
-                    current_date = datetime.now().strftime("%d/%m/%Y")
-                    canvas.drawRightString(legal[0] - 50, legal[1] - 50, current_date)
-                    canvas.drawRightString(legal[0] - 50, legal[1] - 65, 'Sistema v2.0 Pro')
-                    
-                    # Header line - full width
-                    canvas.setStrokeColor(colors.HexColor('#00BFFF'))
-                    canvas.setLineWidth(3)
-                    canvas.line(50, legal[1] - 85, legal[0] - 50, legal[1] - 85)
-                    
-                    # Footer
-                    footer_y = 40
-                    
-                    # Footer line
-                    canvas.setStrokeColor(colors.HexColor('#BDC3C7'))
-                    canvas.setLineWidth(1)
-                    canvas.line(50, footer_y + 25, legal[0] - 50, footer_y + 25)
-                    
-                    # Footer text
-                    canvas.setFont('Helvetica-Bold', 8)
-                    canvas.setFillColor(colors.HexColor('#7F8C8D'))
-                    canvas.drawString(50, footer_y + 10, 'VMS HYDRAULICS, S.A. - Válvulas, mediciones y soluciones hidráulicas')
-                    
-                    canvas.setFont('Helvetica', 8)
-                    canvas.drawString(50, footer_y - 2, f'Reporte generado el {datetime.now().strftime("%d/%m/%Y")} | Sistema de Cálculo Hidráulico v2.0 Pro')
-                    canvas.drawString(50, footer_y - 14, 'Este reporte ha sido generado automáticamente y debe ser revisado por un ingeniero calificado.')
-                    
-                    canvas.setFont('Helvetica-Oblique', 8)
-                    canvas.drawString(50, footer_y - 26, 'Certificado ISO 9001 - Calidad garantizada en soluciones hidráulicas')
-                    
-                    # Page number
-                    canvas.setFont('Helvetica', 8)
-                    canvas.drawRightString(legal[0] - 50, footer_y + 10, f'Página {doc.page}')
-                    
-                    canvas.restoreState()
-            
-            # Create document with custom template
-            doc = HeaderFooterDocTemplate(
-                buffer,
-                pagesize=legal,
-                rightMargin=50,
-                leftMargin=50,
-                topMargin=120,  # Increased to accommodate header
-                bottomMargin=80  # Increased to accommodate footer
-            )
-            
-            # Create frame for content
-            frame = Frame(
-                50, 80, legal[0] - 100, legal[1] - 200,
-                leftPadding=0, bottomPadding=0, rightPadding=0, topPadding=0
-            )
-            
-            # Create page template
-            template = PageTemplate(id='normal', frames=frame, onPage=doc.build_header_footer)
-            doc.addPageTemplates([template])
-            
-            # Custom styles
-            styles = getSampleStyleSheet()
-            
-            # Company header style
-            company_style = ParagraphStyle(
-                'CompanyHeader',
-                parent=styles['Normal'],
-                fontSize=24,
-                textColor=colors.HexColor('#00BFFF'),
-                fontName='Helvetica-Bold',
-                alignment=TA_CENTER,
-                spaceAfter=5
-            )
-            
-            tagline_style = ParagraphStyle(
-                'Tagline',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=colors.HexColor('#666666'),
-                fontName='Helvetica-Oblique',
-                alignment=TA_CENTER,
-                spaceAfter=20
-            )
-            
-            title_style = ParagraphStyle(
-                'ReportTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                textColor=colors.HexColor('#2C3E50'),
-                fontName='Helvetica-Bold',
-                alignment=TA_CENTER,
-                spaceAfter=30,
-                spaceBefore=20
-            )
-            
-            section_style = ParagraphStyle(
-                'SectionHeader',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor('#00BFFF'),
-                fontName='Helvetica-Bold',
-                spaceBefore=20,
-                spaceAfter=15,
-                borderWidth=0,
-                borderColor=colors.HexColor('#00BFFF'),
-                borderPadding=5
-            )
-            
-            subsection_style = ParagraphStyle(
-                'SubsectionHeader',
-                parent=styles['Heading3'],
-                fontSize=12,
-                textColor=colors.HexColor('#34495E'),
-                fontName='Helvetica-Bold',
-                spaceBefore=15,
-                spaceAfter=10
-            )
-            
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=colors.HexColor('#2C3E50'),
-                fontName='Helvetica',
-                alignment=TA_JUSTIFY,
-                spaceAfter=8
-            )
-            
-            # Build PDF content
-            story = []
-            
-            # Enhanced report title
-            story.append(Paragraph("REPORTE TÉCNICO DE ESTACIÓN DE BOMBEO", title_style))
-            
-            # Project information box
-            project_data = [
-                ['INFORMACIÓN DEL PROYECTO', '', ''],
-                ['Proyecto:', data.dict().get('project_name', 'N/A'), ''],
-                ['Ubicación:', data.dict().get('project_location', 'N/A'), ''],
-                ['Fecha de reporte:', current_date, ''],
-                ['Elaborado por:', 'VMS HYDRAULICS', '']
-            ]
-            
-            project_table = Table(project_data, colWidths=[2.5*inch, 3*inch, 1*inch])
-            project_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#00BFFF')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('SPAN', (0, 0), (-1, 0)),
-                ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8F9FA')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8)
-            ]))
-            
-            story.append(project_table)
-            story.append(Spacer(1, 30))
-            
-            # Input parameters section
-            story.append(Paragraph("1. PARÁMETROS DE ENTRADA", section_style))
-            
-            input_data = [
-                ['PARÁMETRO', 'VALOR', 'UNIDAD', 'DESCRIPCIÓN'],
-                ['Altura Geométrica', f"{data.geometric_height:.2f}", data.geometric_height_unit, 'Diferencia de elevación'],
-                ['Caudal de Diseño', f"{data.flow_rate:.2f}", data.flow_rate_unit, 'Flujo volumetrico requerido'],
-                ['Longitud de Tubería', f"{data.pipe_length:.2f}", data.pipe_length_unit, 'Longitud total del sistema'],
-                ['Diámetro de Tubería', f"{data.pipe_diameter:.2f}", data.pipe_diameter_unit, 'Diámetro interno de tubería'],
-                ['Material de Tubería', data.pipe_material.replace('_', ' ').title(), '', 'Material de construcción'],
-                ['Eficiencia de Bomba', f"{data.pump_efficiency * 100:.1f}", '%', 'Eficiencia mecánica de la bomba']
-            ]
-            
-            # Add accessories if any
-            accessories = []
-            if data.valve_gate > 0: accessories.append(f"Válvulas compuerta: {data.valve_gate}")
-            if data.valve_butterfly > 0: accessories.append(f"Válvulas mariposa: {data.valve_butterfly}")
-            if data.valve_check > 0: accessories.append(f"Válvulas check: {data.valve_check}")
-            if data.valve_globe > 0: accessories.append(f"Válvulas globo: {data.valve_globe}")
-            if data.elbow_90 > 0: accessories.append(f"Codos 90°: {data.elbow_90}")
-            if data.elbow_45 > 0: accessories.append(f"Codos 45°: {data.elbow_45}")
-            
-            if accessories:
-                # Format accessories with line breaks for better readability
-                accessories_text = '\n'.join(accessories)
-                input_data.append(['Accesorios', accessories_text, '', 'Elementos adicionales del sistema'])
-            
-            input_table = Table(input_data, colWidths=[1.5*inch, 1.8*inch, 0.8*inch, 2.4*inch])
-            input_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495E')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F9FA')]),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6)
-            ]))
-            
-            story.append(input_table)
-            story.append(Spacer(1, 30))
-            
-            # Results section
-            story.append(Paragraph("2. RESULTADOS DEL CÁLCULO HIDRÁULICO", section_style))
-            
-            # Key results in highlighted boxes
-            key_results = [
-                ['PARÁMETRO', 'VALOR', 'UNIDAD', 'OBSERVACIONES'],
-                ['Altura Total Dinámica (TDH)', f"{results.get('total_head', 0):.2f}", 'm', 'Altura total que debe vencer la bomba'],
-                ['Pérdidas por Fricción', f"{results.get('friction_head_loss', 0):.2f}", 'm', 'Pérdidas en tubería recta'],
-                ['Pérdidas Menores', f"{results.get('minor_head_loss', 0):.2f}", 'm', 'Pérdidas en accesorios'],
-                ['Velocidad del Flujo', f"{results.get('velocity', 0):.2f}", 'm/s', 'Velocidad promedio en tubería'],
-                ['Número de Reynolds', f"{results.get('reynolds', 0):.0f}", '-', 'Caracterización del flujo'],
-                ['Factor de Fricción', f"{results.get('friction_factor', 0):.6f}", '-', 'Coeficiente de Darcy-Weisbach']
-            ]
-            
-            results_table = Table(key_results, colWidths=[1.8*inch, 1.2*inch, 0.8*inch, 2.7*inch])
-            results_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E74C3C')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FADBD8')]),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6)
-            ]))
-            
-            story.append(results_table)
-            story.append(Spacer(1, 20))
-            
-            # Insert page break to move next section to page 2
-            from reportlab.platypus import PageBreak
-            story.append(PageBreak())
-            
-            # Power requirements - highlighted section (now on page 2)
-            story.append(Paragraph("2.1 Requerimientos de Potencia", subsection_style))
-            
-            power_data = [
-                ['TIPO DE POTENCIA', 'VALOR', 'UNIDAD'],
-                ['Potencia Hidráulica', f"{results.get('power_kw', 0):.2f}", 'kW'],
-                ['Potencia Hidráulica', f"{results.get('power_hp', 0):.2f}", 'HP'],
-                ['Eficiencia Considerada', f"{data.pump_efficiency * 100:.1f}", '%']
-            ]
-            
-            power_table = Table(power_data, colWidths=[2.5*inch, 1.5*inch, 1*inch])
-            power_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#27AE60')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#D5F4E6')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8)
-            ]))
-            
-            story.append(power_table)
-            story.append(Spacer(1, 30))
-            
-            # Add pump curve chart if available
-            if chart_image:
-                story.append(Paragraph("3. CURVA CARACTERÍSTICA DE LA BOMBA", section_style))
-                
-                # Chart subtitle with technical information
-                chart_subtitle = Paragraph(
-                    "Gráfico de rendimiento con ejes múltiples (m³/s, l/s, GPM) - Punto de operación y curvas del sistema",
-                    ParagraphStyle(
-                        'ChartSubtitle',
-                        parent=normal_style,
-                        fontSize=9,
-                        textColor=colors.HexColor('#666666'),
-                        fontName='Helvetica-Oblique',
-                        alignment=TA_CENTER,
-                        spaceAfter=15
-                    )
-                )
-                story.append(chart_subtitle)
-                # Convert base64 to image for ReportLab
-                import base64
-                from reportlab.lib.utils import ImageReader
-                
-                try:
-                    # Remove data:image/png;base64, prefix
-                    image_data = chart_image.split(',')[1]
-                    image_bytes = base64.b64decode(image_data)
-                    image_buffer = io.BytesIO(image_bytes)
-                    
-                    # Add image to PDF
-                    img = Image(image_buffer, width=6*inch, height=3.6*inch)
-                    story.append(img)
-                    story.append(Spacer(1, 20))
-                    
-                    # Chart description
-                    chart_desc = Paragraph(
-                        "La gráfica muestra la curva característica de la bomba (línea azul), "
-                        "el punto de operación del sistema (punto rojo) y la curva del sistema hidráulico (línea verde). "
-                        "El punto de intersección indica las condiciones de operación óptimas.",
-                        normal_style
-                    )
-                    story.append(chart_desc)
-                    story.append(Spacer(1, 20))
-                except Exception as e:
-                    print(f"Error adding chart to PDF: {e}")
-            
-            # Technical notes
-            story.append(Paragraph("4. NOTAS TÉCNICAS Y RECOMENDACIONES", section_style))
-            
-            notes_text = f"""
-            <b>Método de Cálculo:</b> Los cálculos se basan en la ecuación de Darcy-Weisbach para pérdidas por fricción 
-            y el método de coeficientes K para pérdidas menores.<br/><br/>
-            
-            <b>Consideraciones de Diseño:</b><br/>
-            • La velocidad de flujo calculada es {results.get('velocity', 0):.2f} m/s<br/>
-            • Se recomienda mantener velocidades entre 1.0 y 3.0 m/s para sistemas de bombeo<br/>
-            • El número de Reynolds indica flujo {'turbulento' if results.get('reynolds', 0) > 4000 else 'laminar'}<br/><br/>
-            
-            <b>Recomendaciones:</b><br/>
-            • Verificar que la bomba seleccionada opere en su rango de eficiencia óptima<br/>
-            • Considerar un factor de seguridad del 10-15% en la potencia calculada<br/>
-            • Instalar válvulas de control y medición según especificaciones del proyecto<br/>
-            • Realizar mantenimiento preventivo según recomendaciones del fabricante
-            """
-            
-            story.append(Paragraph(notes_text, normal_style))
-            story.append(Spacer(1, 30))
-            
-
-            
-            # Build PDF
-            doc.build(story)
-            pdf_content = buffer.getvalue()
-            buffer.close()
-            
-        except ImportError:
-            return {"error": "ReportLab no está instalado. Instale con: pip install reportlab"}
-        except Exception as pdf_error:
-            print(f"Error específico de ReportLab: {str(pdf_error)}")
-            return {"error": f"Error generando PDF: {str(pdf_error)}"}
-        
-        return Response(
-            content=pdf_content,
-            media_type='application/pdf',
-            headers={'Content-Disposition': 'attachment; filename="reporte_bombeo.pdf"'}
+            async for chunk in (from_list() if data.demand is not None else demand_chunks(lines)):
+                columns = simulator.run(hydraulics.to_si(chunk, data.flow_rate_unit, hydraulics.FLOW_UNITS))
+                if every:
+                    yield simulation.step_lines(columns, every)
+        except Exception as e:
+            # La respuesta ya empezó: el error va como última línea
+            print(f"Error en simulación: {str(e)}")
+            yield json.dumps({"error": str(e), "step": simulator.step}) + "\n"
+            return
+        yield simulation.summary_line(simulator.summary())
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post('/import')
+async def import_stations(request: Request, format: str = "csv", sheet: Optional[str] = None):
+    """
+    Bulk calculation of an uploaded CSV or XLSX station list (raw request
+    body), streamed back as CSV or Parquet chunk by chunk. Query parameters
+    named like PumpingStationInput fields fill columns missing from the file
+    """
+    defaults = {k: v for k, v in request.query_params.items() if k not in ("format", "sheet")}
+    try:
+        table = await importer.open_table(request.stream(), defaults, sheet)
+        writer = importer.writer_for(format, table.fields)
+    except Exception as e:
+        print(f"Error en importación: {str(e)}")
+        return {"error": str(e)}
+
+    async def stream():
+        yield writer.start()
+        try:
+            async for numbers, rows in table.chunks():
+                results = await run_blocking(table.calculate, numbers, rows)
+                yield await run_blocking(writer.write, results)
+        except Exception as e:
+            # La respuesta ya empezó: el error va como última fila
+            print(f"Error en importación: {str(e)}")
+            yield writer.write(importer.error_table(table.fields, str(e)))
+        yield writer.close()
+
+    return StreamingResponse(stream(), media_type=writer.media_type, headers={
+        "Content-Disposition": f'attachment; filename="resultados.{writer.extension}"'})
+
+def surge_line(data: SurgeInput):
+    """Characteristic grid of the station's rising main at the design flow."""
+    results = hydraulics.calculate_batch(hydraulics.columns_from_items([data]))
+    flow = float(results["flow_rate_m3s"][0])
+    if not (np.isfinite(flow) and np.isfinite(results["total_head"][0])):
+        raise ValueError(hydraulics.INVALID_ROW_ERROR)
+    if data.segments:
+        keep = results["segment_mask"][0]
+        materials = [segment.material for segment in data.segments]
+    else:
+        keep = slice(None)
+        materials = [data.pipe_material]
+
+    def pipe(key):
+        return np.atleast_1d(results[key][0])[keep]
+
+    wave_speeds = data.wave_speed if data.wave_speed is not None else surge.wave_speeds_for(materials)
+    return surge.SurgeLine(pipe("pipe_length_m"), pipe("diameter_m"), pipe("roughness_mm"), pipe("total_k"),
+                           wave_speeds, flow, float(results["geometric_height"][0]), results["friction_model"],
+                           reaches=data.reaches or surge.DEFAULT_REACHES, profile=data.profile,
+                           kinematic_viscosity=float(results["kinematic_viscosity"][0]),
+                           density=float(results["density"][0]))
+
+def run_surge(data: SurgeInput):
+    """Surge scenario on the station's rising main and its summarized results."""
+    line = surge_line(data)
+    run = surge.simulate(
+        line, data.scenario,
+        pump_efficiency=data.pump_efficiency,
+        inertia=data.pump_inertia,
+        speed_rpm=data.pump_speed_rpm or 1450,
+        closure_time=data.closure_time if data.closure_time is not None else 5.0,
+        closure_exponent=data.closure_exponent or 1.0,
+        duration=data.duration,
+    )
+    return surge.surge_results(line, run)
+
+@app.post('/surge')
+async def surge_analysis(data: SurgeInput):
+    """
+    Water hammer on the rising main after a pump trip or a valve closure
+    (method of characteristics): pressure envelopes and pump history
+    """
+    try:
+        return await run_blocking(run_surge, data)
+    except Exception as e:
+        print(f"Error en análisis de golpe de ariete: {str(e)}")
+        return {"error": str(e)}
+
+@app.post('/uncertainty')
+async def uncertainty_analysis(data: UncertaintyInput):
+    """
+    Monte Carlo propagation of input uncertainty: percentiles of total head
+    and power, and sensitivity indices of each uncertain input
+    """
+    try:
+        spec = data.dict()
+        specs = spec.pop("distributions")
+        for field in ("samples", "seed", "workers", "percentiles"):
+            spec.pop(field)
+        return await run_blocking(
+            uncertainty.analyze, spec, specs,
+            samples=data.samples or uncertainty.DEFAULT_SAMPLES,
+            seed=data.seed,
+            workers=data.workers or 1,
+            percentiles=data.percentiles or uncertainty.PERCENTILES,
         )
+    except Exception as e:
+        print(f"Error en análisis de incertidumbre: {str(e)}")
+        return {"error": str(e)}
+
+def network_pump_curves(data: NetworkInput):
+    """PumpCurve of the network pumps: each its own curve, or the synthetic curve of ``station``."""
+    station_curve = None
+    if data.station is not None:
+        results = hydraulics.calculate_batch(hydraulics.columns_from_items([data.station]))
+        design_flow = float(results["flow_rate_m3s"][0])
+        design_head = float(results["total_head"][0])
+        if not (np.isfinite(design_flow) and np.isfinite(design_head)) or design_flow <= 0:
+            raise ValueError(hydraulics.INVALID_ROW_ERROR)
+        station_curve = operating_point.PumpCurve.synthetic(design_head, design_flow)
+
+    curves = []
+    for pump in data.pumps or []:
+        spec = pump.dict()
+        if spec.get("coefficients") is None and spec.get("points") is None:
+            if station_curve is None:
+                raise ValueError(f"Bomba '{pump.id}': indique su curva o la estación de bombeo ('station')")
+            curves.append(station_curve)
+        else:
+            curves.append(operating_point.pump_curves_from_specs([spec]))
+    if not curves:
+        return None
+    return operating_point.PumpCurve.concat(curves) if len(curves) > 1 else curves[0]
+
+def run_network(data: NetworkInput):
+    """Network built from the request, solved, with its formatted results."""
+    # La red transporta el fluido de la estación (agua a 20 °C sin estación)
+    kinematic_viscosity, density = (hydraulics.fluid_properties(data.station) if data.station is not None
+                                    else hydraulics.LEGACY_FLUID)
+    net = network.network_from_specs(
+        [j.dict() for j in data.junctions],
+        [r.dict() for r in data.reservoirs],
+        [p.dict() for p in data.pipes],
+        [p.dict() for p in data.pumps or []],
+        pump_curves=network_pump_curves(data),
+        demand_unit=data.demand_unit or "l/s",
+        friction_model=data.friction_model or network.FRICTION_MODEL,
+        pump_efficiency=data.station.pump_efficiency if data.station is not None else 1.0,
+        kinematic_viscosity=kinematic_viscosity,
+        density=density,
+    )
+    solution = network.solve(net, data.accuracy or network.ACCURACY,
+                             data.max_iterations or network.MAX_ITERATIONS)
+    return network.network_results(net, solution)
+
+@app.post('/network')
+async def solve_network(data: NetworkInput):
+    """
+    Steady-state flows, heads and pressures of a looped distribution network
+    (global gradient algorithm on sparse matrices)
+    """
+    try:
+        return await run_blocking(run_network, data)
+    except Exception as e:
+        print(f"Error en red de distribución: {str(e)}")
+        return {"error": str(e)}
+
+@app.post('/generate-report')
+async def generate_report(data: PumpingStationInput, format: str = "pdf", chart: str = REPORT_CHART_FORMAT):
+    if format not in ("pdf", "html"):
+        return {"error": "Formato no soportado. Use 'pdf' o 'html'"}
+    if chart not in CHART_FORMATS:
+        return {"error": "Tipo de gráfico no soportado. Use 'vector' o 'raster'"}
+    key = report_cache_key(data, format, chart)
+    content = pdf_cache.get(key)
+    try:
+        if content is None:
+            if format == "html":
+                content = (await report_pool.run(build_report_html, data)).encode('utf-8')
+            else:
+                content = await report_pool.run(build_report_pdf, data, chart)
+            pdf_cache.set(key, content)
+    except PoolSaturatedError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Servidor ocupado generando reportes. Intente de nuevo más tarde."},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ImportError:
+        return {"error": "ReportLab no está instalado. Instale con: pip install reportlab"}
     except Exception as e:
         print(f"Error en generación de reporte: {str(e)}")
         return {"error": f"Error generando reporte: {str(e)}"}
+
+    if format == "html":
+        return HTMLResponse(content=content)
+    return Response(
+        content=content,
+        media_type='application/pdf',
+        headers={'Content-Disposition': 'attachment; filename="reporte_bombeo.pdf"'}
+    )
+
+def build_bundle_cover_pdf(title, rows):
+    """Cover and comparison table of a report bundle (runs in a report pool worker)."""
+    import report_builder
+
+    return report_builder.build_bundle_cover_pdf(title, rows, datetime.now().strftime("%d/%m/%Y"))
+
+async def cached_report_pdf(data: PumpingStationInput, chart=REPORT_CHART_FORMAT):
+    """PDF report from the cache, or rendered on an idle pool worker"""
+    key = report_cache_key(data, chart=chart)
+    content = pdf_cache.get(key)
+    if content is None:
+        content = await report_pool.run(build_report_pdf, data, chart, wait=True)
+        pdf_cache.set(key, content)
+    return content
+
+async def render_in_order(jobs, lookahead):
+    """
+    Await the coroutine factories in ``jobs`` with at most ``lookahead`` of
+    them running ahead, and yield their results in order.
+    """
+    jobs = iter(jobs)
+    pending = deque(asyncio.ensure_future(job()) for _, job in zip(range(lookahead), jobs))
+    try:
+        while pending:
+            result = await pending.popleft()
+            for job in jobs:
+                pending.append(asyncio.ensure_future(job()))
+                break
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
+
+def bundle_entry_name(index, data: PumpingStationInput):
+    # Nombre de archivo seguro dentro del ZIP: 001_nombre_del_proyecto.pdf
+    ascii_name = unicodedata.normalize("NFKD", data.project_name or "").encode("ascii", "ignore").decode()
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", ascii_name).strip("_")[:40]
+    return f"{index:03d}_{slug or 'escenario'}.pdf"
+
+@app.post('/reports/bundle')
+async def report_bundle(data: BundleInput, format: str = "pdf", chart: str = REPORT_CHART_FORMAT):
+    """
+    Many scenarios in one download: a combined PDF (cover, comparison table
+    and one report per scenario, with bookmarks) or a ZIP of the individual
+    reports. Reports render in parallel on the report pool and stream out in
+    input order as soon as each one and all before it are ready
+    """
+    if format not in ("pdf", "zip"):
+        return {"error": "Formato no soportado. Use 'pdf' o 'zip'"}
+    if chart not in CHART_FORMATS:
+        return {"error": "Tipo de gráfico no soportado. Use 'vector' o 'raster'"}
+    if not data.items or len(data.items) > BUNDLE_MAX_ITEMS:
+        return {"error": f"El paquete debe tener entre 1 y {BUNDLE_MAX_ITEMS} escenarios"}
+    try:
+        # Tabla comparativa en una pasada vectorizada; los escenarios inválidos se rechazan antes de empezar
+        formatted, bad = hydraulics.format_results(hydraulics.calculate_batch(hydraulics.columns_from_items(data.items)))
+        if bad.any():
+            return {"error": hydraulics.INVALID_ROW_ERROR, "items": [int(i) for i in np.flatnonzero(bad)]}
+        rows = [
+            {"name": item.project_name, "location": item.project_location, "flow_ls": formatted["flow_rate"][i],
+             "total_head": formatted["total_head"][i], "velocity": formatted["velocity"][i],
+             "power_kw": formatted["power_kw"][i], "power_hp": formatted["power_hp"][i]}
+            for i, item in enumerate(data.items)
+        ]
+    except Exception as e:
+        print(f"Error en paquete de reportes: {str(e)}")
+        return {"error": str(e)}
+
+    container = bundle.PdfConcatenator(data.title or "") if format == "pdf" else bundle.ZipStream()
+    names = ["Comparativo de escenarios" if format == "pdf" else "000_comparativo.pdf"] + [
+        f"{i}. {item.project_name or f'Escenario {i}'}" if format == "pdf" else bundle_entry_name(i, item)
+        for i, item in enumerate(data.items, start=1)
+    ]
+    jobs = [functools.partial(report_pool.run, build_bundle_cover_pdf, data.title, rows, wait=True)] + [
+        functools.partial(cached_report_pdf, item, chart) for item in data.items
+    ]
+
+    async def stream():
+        yield container.start()
+        done = 0
+        try:
+            async for content in render_in_order(jobs, report_pool.max_workers * BUNDLE_LOOKAHEAD):
+                yield container.add(names[done], content)
+                done += 1
+        except Exception as e:
+            # La respuesta ya empezó: el PDF se cierra con los reportes listos; el ZIP lleva el error
+            print(f"Error en paquete de reportes: {str(e)}")
+            if format == "zip":
+                yield container.add("ERROR.txt", f"Error generando {names[done]}: {str(e)}\n".encode("utf-8"))
+        yield container.close()
+
+    return StreamingResponse(stream(), media_type=container.media_type, headers={
+        "Content-Disposition": f'attachment; filename="reportes_bombeo.{container.extension}"'})
+
+async def run_report_job(job_id, data, chart=REPORT_CHART_FORMAT):
+    """Render a queued report on an idle pool worker and store the PDF"""
+    try:
+        key = report_cache_key(data, chart=chart)
+        pdf_content = pdf_cache.get(key)
+        if pdf_content is None:
+            pdf_content = await report_pool.run(
+                build_report_pdf, data, chart, wait=True,
+                on_start=lambda: report_store.update(job_id, status=report_jobs.RUNNING)
+            )
+            pdf_cache.set(key, pdf_content)
+        report_store.save_pdf(job_id, pdf_content)
+    except Exception as e:
+        print(f"Error en trabajo de reporte {job_id}: {str(e)}")
+        report_store.update(job_id, status=report_jobs.FAILED, error=f"Error generando reporte: {str(e)}")
+
+@app.post('/reports', status_code=202)
+async def create_report_job(data: PumpingStationInput, chart: str = REPORT_CHART_FORMAT):
+    if chart not in CHART_FORMATS:
+        return JSONResponse(status_code=422, content={"error": "Tipo de gráfico no soportado. Use 'vector' o 'raster'"})
+    if len(report_tasks) >= REPORT_JOBS_MAX:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Demasiados trabajos de reporte pendientes. Intente de nuevo más tarde."},
+            headers={"Retry-After": str(report_pool.retry_after())}
+        )
+    job = report_store.create(project_name=data.project_name)
+    task = asyncio.create_task(run_report_job(job["id"], data, chart))
+    report_tasks.add(task)
+    task.add_done_callback(report_tasks.discard)
+    return {
+        **job,
+        "status_url": f"/reports/{job['id']}",
+        "pdf_url": f"/reports/{job['id']}/pdf",
+    }
+
+@app.get('/reports/{job_id}')
+async def get_report_job(job_id: str):
+    job = report_store.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Trabajo de reporte no encontrado o expirado"})
+    return job
+
+@app.get('/reports/{job_id}/pdf')
+async def download_report_job(job_id: str):
+    job = report_store.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Trabajo de reporte no encontrado o expirado"})
+    if job["status"] != report_jobs.DONE:
+        return JSONResponse(status_code=409, content={"error": "El reporte aún no está disponible", "status": job["status"]})
+    return FileResponse(
+        report_store.pdf_path(job_id),
+        media_type='application/pdf',
+        filename="reporte_bombeo.pdf"
+    )
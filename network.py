@@ -0,0 +1,322 @@
+"""
+Looped distribution networks solved with the global gradient algorithm.
+
+A network has junctions (unknown head, with demands), fixed-head nodes
+(reservoirs, or tanks at a given level), pipes and pumps. Pipe losses are the
+Darcy-Weisbach and fitting-K formulas of hydraulics.compute_hydraulics, and a
+pump is any operating_point.PumpCurve row, so the synthetic curve of a
+pumping station plugs in as a pump link. Todini and Pilati (1988): every
+iteration solves one sparse symmetric system A12ᵀ·P·A12·H = F for the
+junction heads and updates all link flows from it.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.sparse.linalg import spsolve
+
+import hydraulics
+
+ACCURACY = 1e-6  # Σ|ΔQ| / Σ|Q| para dar por convergido
+MAX_ITERATIONS = 200
+MAX_STATUS_CHANGES = 10  # Cierres o reaperturas de bombas antes de abandonar
+MIN_FLOW = 1e-9  # m³/s; una tubería sin caudal tendría Re = 0
+MIN_PUMP_GRADIENT = 1.0  # m por m³/s; curvas planas darían un sistema mal condicionado
+MIN_PIPE_GRADIENT = 1e-3  # m por m³/s; una tubería sin longitud ni accesorios no tiene pérdida (1/g infinito)
+PUMP_SLOPE_STEP = 1e-6  # m³/s, diferencia centrada para la pendiente de la curva
+CLOSED_RESISTANCE = 1e8  # m por m³/s de un enlace cerrado (como EPANET)
+INITIAL_VELOCITY = 1.0  # m/s, caudal inicial de las tuberías
+# Churchill es continuo entre régimen laminar y turbulento; con el salto de 64/Re
+# a Swamee-Jain en Re 2000 el Newton oscila en las tuberías de poco caudal
+FRICTION_MODEL = 'churchill'
+
+OPEN = "open"
+CLOSED = "closed"
+
+
+class Network:
+    """
+    Topology and SI properties of a network.
+
+    Nodes are numbered junctions first, then fixed-head nodes; links are
+    numbered pipes first, then pumps. ``start``/``end`` give the node of each
+    link (flow is positive from start to end). ``pumps`` is a PumpCurve with
+    one row per pump, or None. ``kinematic_viscosity`` (m²/s) and ``density``
+    (kg/m³) are those of the fluid carried by the whole network.
+    """
+
+    def __init__(self, node_ids, elevation, demand, fixed_head, link_ids, start, end,
+                 pipe_length_m, diameter_m, roughness_mm, total_k, pumps=None, speed_ratio=1.0,
+                 pump_efficiency=1.0, friction_model=FRICTION_MODEL,
+                 kinematic_viscosity=hydraulics.KINEMATIC_VISCOSITY, density=hydraulics.WATER_DENSITY):
+        self.node_ids = list(node_ids)
+        self.link_ids = list(link_ids)
+        self.elevation = np.asarray(elevation, dtype=float)
+        self.demand = np.asarray(demand, dtype=float)
+        self.fixed_head = np.asarray(fixed_head, dtype=float)
+        self.start = np.asarray(start, dtype=int)
+        self.end = np.asarray(end, dtype=int)
+        self.pipe_length_m = np.asarray(pipe_length_m, dtype=float)
+        self.diameter_m = np.asarray(diameter_m, dtype=float)
+        self.roughness_mm = np.asarray(roughness_mm, dtype=float)
+        self.total_k = np.asarray(total_k, dtype=float)
+        self.pumps = pumps
+        n_pumps = len(pumps) if pumps is not None else 0
+        self.speed_ratio = np.broadcast_to(np.asarray(speed_ratio, dtype=float), (n_pumps,))
+        self.pump_efficiency = np.broadcast_to(np.asarray(pump_efficiency, dtype=float), (n_pumps,))
+        self.friction_model = friction_model
+        self.kinematic_viscosity = kinematic_viscosity
+        self.density = density
+
+        if not len(self.fixed_head):
+            raise ValueError("La red necesita al menos un nodo de nivel fijo (reservorio o tanque)")
+        if len(self.start) != self.n_pipes + n_pumps:
+            raise ValueError("Cada enlace debe tener nodo inicial y final")
+        if (self.start == self.end).any():
+            raise ValueError("Un enlace no puede empezar y terminar en el mismo nodo")
+        if (self.diameter_m <= 0).any() or (self.pipe_length_m < 0).any():
+            raise ValueError("Las tuberías deben tener diámetro positivo y longitud no negativa")
+        if (self.speed_ratio <= 0).any():
+            raise ValueError("La relación de velocidad debe ser mayor que cero")
+
+        # Matriz de incidencia enlaces × nodos: +1 en el nodo inicial, -1 en el final
+        n_links = len(self.start)
+        links = np.arange(n_links)
+        incidence = sparse.csr_matrix(
+            (np.r_[np.ones(n_links), -np.ones(n_links)], (np.r_[links, links], np.r_[self.start, self.end])),
+            shape=(n_links, len(self.node_ids)),
+        )
+        self.a12 = incidence[:, :self.n_junctions].tocsr()
+        self.a10 = incidence[:, self.n_junctions:].tocsr()
+        self._check_connected(incidence)
+
+    @property
+    def n_junctions(self):
+        return len(self.elevation)
+
+    @property
+    def n_pipes(self):
+        return len(self.pipe_length_m)
+
+    def _check_connected(self, incidence):
+        # Todo nudo debe llegar a un nivel fijo; si no, la matriz es singular
+        adjacency = incidence.T @ incidence
+        _, labels = csgraph.connected_components(adjacency, directed=False)
+        anchored = np.zeros(labels.max() + 1, dtype=bool)
+        anchored[labels[self.n_junctions:]] = True
+        floating = np.flatnonzero(~anchored[labels[:self.n_junctions]])
+        if floating.size:
+            names = ", ".join(self.node_ids[i] for i in floating[:10])
+            raise ValueError(f"Nudos sin conexión con un nivel fijo: {names}")
+
+    def pipe_losses(self, q):
+        """Head loss of every pipe at flow ``q`` (signed like q), its derivative and the velocity."""
+        flow = np.maximum(np.abs(q), MIN_FLOW)
+        losses = hydraulics.compute_hydraulics(0.0, flow, self.pipe_length_m, self.diameter_m,
+                                               self.roughness_mm, self.total_k, 1.0, self.friction_model,
+                                               self.kinematic_viscosity)
+        loss = losses["friction_head_loss"] + losses["minor_head_loss"]
+        # h ≈ r·Q|Q|: dh/dQ = 2h/|Q| con el factor de fricción fijo en el paso
+        return np.sign(q) * loss, 2 * loss / flow, losses["velocity"]
+
+    def pump_gains(self, q):
+        """Head added by every pump at flow ``q`` (affinity-scaled) and its slope dH/dQ."""
+        r = self.speed_ratio
+        qs = q / r
+        gain = r**2 * self.pumps.head(qs)
+        step = PUMP_SLOPE_STEP
+        slope = r * (self.pumps.head(qs + step) - self.pumps.head(qs - step)) / (2 * step)
+        return gain, slope
+
+    def shutoff_heads(self):
+        return self.speed_ratio**2 * self.pumps.head(np.zeros(len(self.pumps)))
+
+
+def _initial_pump_flow(network, pipe_flows):
+    """Half the curve range of each pump, or the median pipe flow if the curve has no end."""
+    if network.pumps is None:
+        return np.empty(0)
+    end = network.pumps.max_flow * network.speed_ratio
+    fallback = np.median(pipe_flows) if len(pipe_flows) else MIN_FLOW
+    return np.where(np.isfinite(end), end / 2, fallback)
+
+
+def solve(network, accuracy=ACCURACY, max_iterations=MAX_ITERATIONS):
+    """
+    Steady-state flows and heads of ``network`` by the global gradient algorithm.
+
+    Pumps do not run backwards: a pump whose flow turns negative is closed,
+    and a closed pump reopens once the head it must add drops below its
+    shutoff head. Returns a dict of arrays (node ``head``, link ``flow``,
+    ``headloss``, ``velocity``, pump ``gain`` and ``closed``) plus
+    ``iterations``, ``converged`` and ``relative_change``.
+    """
+    n_pipes = network.n_pipes
+    n_pumps = len(network.start) - n_pipes
+    a12, a10 = network.a12, network.a10
+    a12t = a12.T.tocsr()
+    fixed = a10 @ network.fixed_head
+
+    q = np.empty(n_pipes + n_pumps)
+    q[:n_pipes] = INITIAL_VELOCITY * np.pi * network.diameter_m**2 / 4
+    q[n_pipes:] = _initial_pump_flow(network, q[:n_pipes])
+    closed = np.zeros(n_pumps, dtype=bool)
+
+    iterations = status_changes = 0
+    change = np.inf
+    converged = False
+    heads = np.zeros(network.n_junctions)
+    while iterations < max_iterations:
+        iterations += 1
+        h = np.empty_like(q)
+        g = np.empty_like(q)
+        h[:n_pipes], g[:n_pipes], _ = network.pipe_losses(q[:n_pipes])
+        g[:n_pipes] = np.maximum(g[:n_pipes], MIN_PIPE_GRADIENT)
+        if n_pumps:
+            gain, slope = network.pump_gains(q[n_pipes:])
+            h[n_pipes:] = np.where(closed, CLOSED_RESISTANCE * q[n_pipes:], -gain)
+            g[n_pipes:] = np.where(closed, CLOSED_RESISTANCE, np.maximum(-slope, MIN_PUMP_GRADIENT))
+        p = 1 / g
+
+        # A12ᵀ·P·A12·H = -d - A12ᵀ·Q - A12ᵀ·P·(A10·H0 - h)
+        matrix = (a12t @ sparse.diags(p) @ a12).tocsc()
+        rhs = -network.demand - a12t @ q - a12t @ (p * (fixed - h))
+        heads = spsolve(matrix, rhs)
+        if not np.isfinite(heads).all():
+            raise ValueError("El sistema de la red es singular: no se pudieron calcular las alturas")
+        dq = p * (a12 @ heads + fixed - h)
+        q = q + dq
+        change = np.abs(dq).sum() / max(np.abs(q).sum(), MIN_FLOW)
+
+        # Una bomba no gira al revés: se cierra en cuanto su caudal se invierte
+        # (la parábola por debajo de Q = 0 ya no es decreciente y Newton diverge)
+        backwards = ~closed & (q[n_pipes:] < 0)
+        reopen = np.zeros(n_pumps, dtype=bool)
+        if not backwards.any():
+            if not np.isfinite(change) or change > accuracy:
+                continue
+            # Convergido: una bomba cerrada se reabre si su altura de cierre vence la diferencia de niveles
+            if closed.any():
+                all_heads = np.r_[heads, network.fixed_head]
+                required = all_heads[network.end[n_pipes:]] - all_heads[network.start[n_pipes:]]
+                reopen = closed & (network.shutoff_heads() > required)
+            if not reopen.any():
+                converged = True
+                break
+        if status_changes == MAX_STATUS_CHANGES:
+            break
+        status_changes += 1
+        closed = (closed | backwards) & ~reopen
+        q[n_pipes:] = np.where(reopen, _initial_pump_flow(network, q[:n_pipes]), np.where(closed, 0.0, q[n_pipes:]))
+
+    headloss, _, velocity = network.pipe_losses(q[:n_pipes])
+    gain = np.zeros(n_pumps)
+    if n_pumps:
+        gain = np.where(closed, 0.0, network.pump_gains(q[n_pipes:])[0])
+        q[n_pipes:][closed] = 0.0
+    return {
+        "head": np.r_[heads, network.fixed_head],
+        "flow": q,
+        "headloss": headloss,
+        "velocity": velocity,
+        "gain": gain,
+        "closed": closed,
+        "iterations": iterations,
+        "converged": converged,
+        "relative_change": float(change),
+    }
+
+
+def network_from_specs(junctions, reservoirs, pipes, pumps=None, pump_curves=None, demand_unit="l/s",
+                       friction_model=FRICTION_MODEL, pump_efficiency=1.0,
+                       kinematic_viscosity=hydraulics.KINEMATIC_VISCOSITY, density=hydraulics.WATER_DENSITY):
+    """
+    Build a Network from request dicts. Junctions have ``id``, ``elevation``
+    (m) and ``demand`` (in ``demand_unit``); reservoirs ``id`` and ``head``
+    (m); pipes ``id``, ``start``, ``end`` and the PipeSegmentInput fields;
+    pumps ``id``, ``start``, ``end``, ``speed_ratio`` and ``efficiency``, with
+    their curves in ``pump_curves`` (a PumpCurve, one row per pump). The
+    fluid properties are passed on to the Network.
+    """
+    pumps = pumps or []
+    node_ids = [j["id"] for j in junctions] + [r["id"] for r in reservoirs]
+    index = {node: i for i, node in enumerate(node_ids)}
+    if len(index) != len(node_ids):
+        raise ValueError("Hay nudos con el mismo id")
+    links = list(pipes) + list(pumps)
+    link_ids = [link["id"] for link in links]
+    if len(set(link_ids)) != len(link_ids):
+        raise ValueError("Hay enlaces con el mismo id")
+    try:
+        start = [index[link["start"]] for link in links]
+        end = [index[link["end"]] for link in links]
+    except KeyError as e:
+        raise ValueError(f"Enlace conectado a un nudo inexistente: {e.args[0]}")
+
+    def field(items, name, default=None):
+        return [item.get(name) if item.get(name) is not None else default for item in items]
+
+    return Network(
+        node_ids,
+        elevation=field(junctions, "elevation", 0.0),
+        demand=hydraulics.to_si(field(junctions, "demand", 0.0), demand_unit, hydraulics.FLOW_UNITS),
+        fixed_head=field(reservoirs, "head"),
+        link_ids=link_ids,
+        start=start,
+        end=end,
+        pipe_length_m=hydraulics.to_si(field(pipes, "length"), field(pipes, "length_unit", "m"),
+                                       hydraulics.LENGTH_UNITS),
+        diameter_m=hydraulics.to_si(field(pipes, "diameter"), field(pipes, "diameter_unit", "mm"),
+                                    hydraulics.DIAMETER_UNITS),
+        roughness_mm=hydraulics.roughness_for(field(pipes, "material", "")),
+        total_k=hydraulics.fittings_k({f: field(pipes, f, 0) for f in hydraulics.FITTING_FIELDS}, len(pipes)),
+        pumps=pump_curves if pumps else None,
+        speed_ratio=field(pumps, "speed_ratio", 1.0),
+        pump_efficiency=field(pumps, "efficiency", pump_efficiency),
+        friction_model=friction_model,
+        kinematic_viscosity=kinematic_viscosity,
+        density=density,
+    )
+
+
+def network_results(network, solution):
+    """JSON node and link records of a solve() result (flows in l/s)."""
+    n_j, n_pipes = network.n_junctions, network.n_pipes
+    head = solution["head"]
+    flow = solution["flow"]
+    # Caudal que entrega cada nivel fijo a la red
+    supply = network.a10.T @ flow
+
+    def value(x, digits):
+        return round(float(x), digits) if np.isfinite(x) else None
+
+    nodes = []
+    for i, node in enumerate(network.node_ids):
+        if i < n_j:
+            nodes.append({"id": node, "type": "junction", "head": value(head[i], 2),
+                          "pressure": value(head[i] - network.elevation[i], 2),
+                          "demand": value(network.demand[i] * 1000, 2)})
+        else:
+            nodes.append({"id": node, "type": "reservoir", "head": value(head[i], 2),
+                          "supply": value(supply[i - n_j] * 1000, 2)})
+
+    links = []
+    for i, link in enumerate(network.link_ids):
+        if i < n_pipes:
+            links.append({"id": link, "type": "pipe", "flow": value(flow[i] * 1000, 2),
+                          "velocity": value(solution["velocity"][i], 3),
+                          "headloss": value(solution["headloss"][i], 3), "status": OPEN})
+        else:
+            j = i - n_pipes
+            gain = solution["gain"][j]
+            power = (network.density * hydraulics.GRAVITY * flow[i] * gain
+                     / network.pump_efficiency[j] / 1000)
+            links.append({"id": link, "type": "pump", "flow": value(flow[i] * 1000, 2),
+                          "head": value(gain, 2), "power_kw": value(power, 2),
+                          "status": CLOSED if solution["closed"][j] else OPEN})
+    return {
+        "converged": solution["converged"],
+        "iterations": solution["iterations"],
+        "relative_change": solution["relative_change"],
+        "nodes": nodes,
+        "links": links,
+    }
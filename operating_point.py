@@ -0,0 +1,388 @@
+"""
+Operating point solver: intersection of pump and system curves.
+
+A batch of pump curves (polynomial coefficients or tabulated points) is paired
+row by row with a batch of system curves. The system curve is the full
+Darcy-Weisbach calculation of the hydraulics module, re-evaluated at every
+flow, not the design losses scaled with Q². The intersection
+pump(Q) - system(Q) = 0 is found for all rows at once with a bracketed
+Illinois (modified regula falsi) iteration, which only re-evaluates rows
+that have not converged yet.
+"""
+import numpy as np
+
+import friction
+import hydraulics
+
+SOLVER_XTOL = 1e-10  # Tolerancia relativa sobre Q
+SOLVER_MAX_ITER = 100
+BRACKET_MAX_DOUBLINGS = 60
+
+# Estado del punto de operación por fila
+OK = "ok"
+NO_INTERSECTION = "no_intersection"  # La altura a caudal cero no vence la altura estática
+BEYOND_CURVE = "beyond_curve"  # La bomba sigue por encima del sistema al final de su curva
+
+STATUS_ERRORS = {
+    NO_INTERSECTION: "La bomba no vence la altura estática: no hay punto de operación",
+    BEYOND_CURVE: "El sistema no corta la curva de la bomba dentro de su rango de caudal",
+}
+
+
+def _rows(values, rows):
+    return values if rows is None else values[rows]
+
+
+def interpolate_rows(x, xs, ys):
+    """
+    Row-wise linear interpolation: row i of ``x`` (shape (n,) or (n, m)) on the
+    table (xs[i], ys[i]), with xs sorted per row and linear extrapolation at
+    both ends. Repeated xs (zero-width segments) are allowed as padding.
+    """
+    x = np.asarray(x, dtype=float)
+    x2 = x[:, np.newaxis] if x.ndim == 1 else x.reshape(len(x), -1)
+    # Segmento de cada x
+    idx = (xs[:, np.newaxis, :] <= x2[:, :, np.newaxis]).sum(axis=2) - 1
+    idx = np.clip(idx, 0, xs.shape[1] - 2)
+    x0 = np.take_along_axis(xs, idx, axis=1)
+    x1 = np.take_along_axis(xs, idx + 1, axis=1)
+    y0 = np.take_along_axis(ys, idx, axis=1)
+    y1 = np.take_along_axis(ys, idx + 1, axis=1)
+    dx = x1 - x0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(dx > 0, (x2 - x0) / dx, 0.0)
+    return (y0 + t * (y1 - y0)).reshape(x.shape)
+
+
+class PumpCurve:
+    """
+    Head-flow curves of a batch of pumps in SI units (m, m³/s).
+
+    Each row is either a polynomial H = c0 + c1·Q + c2·Q² + ... or a table of
+    (Q, H) points interpolated linearly. ``max_flow`` is the end of the valid
+    range (the last tabulated flow, or the runout flow if known; inf if not).
+    """
+
+    def __init__(self, coefficients, flows, heads, tabulated, max_flow):
+        self.coefficients = coefficients
+        self.flows = flows
+        self.heads = heads
+        self.tabulated = tabulated
+        self.max_flow = max_flow
+
+    def __len__(self):
+        return len(self.max_flow)
+
+    @classmethod
+    def polynomial(cls, coefficients, max_flow=None):
+        coefficients = np.atleast_2d(np.asarray(coefficients, dtype=float))
+        n = len(coefficients)
+        max_flow = np.full(n, np.inf) if max_flow is None else np.broadcast_to(np.asarray(max_flow, dtype=float), (n,)).copy()
+        empty = np.zeros((n, 2))
+        return cls(coefficients, empty, empty, np.zeros(n, dtype=bool), max_flow)
+
+    @classmethod
+    def from_points(cls, points):
+        """One list of (Q, H) points per row; rows may have different lengths."""
+        width = max(len(p) for p in points)
+        if min(len(p) for p in points) < 2:
+            raise ValueError("Una curva tabulada necesita al menos 2 puntos")
+        flows = np.empty((len(points), width))
+        heads = np.empty((len(points), width))
+        for i, row in enumerate(points):
+            row = sorted(row)
+            q, h = zip(*row)
+            # Se rellena repitiendo el último punto (segmentos de ancho cero)
+            flows[i] = q + (q[-1],) * (width - len(q))
+            heads[i] = h + (h[-1],) * (width - len(h))
+        return cls.tabulated_arrays(flows, heads)
+
+    @classmethod
+    def tabulated_arrays(cls, flows, heads):
+        flows = np.atleast_2d(np.asarray(flows, dtype=float))
+        heads = np.atleast_2d(np.asarray(heads, dtype=float))
+        n = len(flows)
+        return cls(np.zeros((n, 1)), flows, heads, np.ones(n, dtype=bool), flows.max(axis=1))
+
+    @classmethod
+    def synthetic(cls, total_head, flow_rate_m3s):
+        """The 3-point parabola of calculate_pumping_station (1.33H shutoff, 2Q runout)."""
+        total_head = np.atleast_1d(np.asarray(total_head, dtype=float))
+        flow_rate_m3s = np.atleast_1d(np.asarray(flow_rate_m3s, dtype=float))
+        A, B, _, _ = hydraulics.pump_curve(total_head, flow_rate_m3s, steps=1)
+        coefficients = np.stack([A, np.zeros_like(A), -B], axis=1)
+        return cls.polynomial(coefficients, flow_rate_m3s * hydraulics.RUNOUT_FACTOR)
+
+    @classmethod
+    def concat(cls, curves):
+        """Stack PumpCurve batches (polynomial and tabulated rows can be mixed)."""
+        k = max(c.coefficients.shape[1] for c in curves)
+        m = max(c.flows.shape[1] for c in curves)
+
+        def pad(array, width):
+            # Repetir la última columna (en coeficientes se rellena con ceros)
+            return np.concatenate([array, np.repeat(array[:, -1:], width - array.shape[1], axis=1)], axis=1)
+
+        return cls(
+            np.concatenate([np.pad(c.coefficients, ((0, 0), (0, k - c.coefficients.shape[1]))) for c in curves]),
+            np.concatenate([pad(c.flows, m) for c in curves]),
+            np.concatenate([pad(c.heads, m) for c in curves]),
+            np.concatenate([c.tabulated for c in curves]),
+            np.concatenate([c.max_flow for c in curves]),
+        )
+
+    def take(self, rows):
+        """A new batch with the curves at index ``rows`` (repeats allowed)."""
+        return PumpCurve(*(a[rows] for a in
+                           (self.coefficients, self.flows, self.heads, self.tabulated, self.max_flow)))
+
+    def head(self, q, rows=None):
+        """Pump head at flow ``q`` for every row (or the subset ``rows``); q may be (n,) or (n, m)."""
+        q = np.asarray(q, dtype=float)
+        coefficients = _rows(self.coefficients, rows)
+        tabulated = _rows(self.tabulated, rows)
+        expand = (slice(None),) + (np.newaxis,) * (q.ndim - 1)
+
+        # Horner
+        h = np.zeros(q.shape)
+        for c in coefficients.T[::-1]:
+            h = h * q + c[expand]
+        if not tabulated.any():
+            return h
+
+        table = interpolate_rows(q, _rows(self.flows, rows), _rows(self.heads, rows))
+        return np.where(tabulated[expand], table, h)
+
+
+class SystemCurve:
+    """Static head plus friction and fitting losses of a batch of pipelines, in SI units"""
+
+    def __init__(self, geometric_height_m, pipe_length_m, diameter_m, roughness_mm, total_k,
+                 friction_model=friction.DEFAULT_METHOD, kinematic_viscosity=hydraulics.KINEMATIC_VISCOSITY,
+                 density=hydraulics.WATER_DENSITY):
+        self.geometric_height_m = np.atleast_1d(np.asarray(geometric_height_m, dtype=float))
+        n = len(self.geometric_height_m)
+        # Tuberías por tramos: arreglos (n, tramos), ver hydraulics.segment_arrays
+        segments = max(np.ndim(v) for v in (pipe_length_m, diameter_m, roughness_mm, total_k)) == 2
+        shape = (n, np.shape(pipe_length_m)[-1]) if segments else (n,)
+        self.pipe_length_m = np.broadcast_to(np.asarray(pipe_length_m, dtype=float), shape)
+        self.diameter_m = np.broadcast_to(np.asarray(diameter_m, dtype=float), shape)
+        self.roughness_mm = np.broadcast_to(np.asarray(roughness_mm, dtype=float), shape)
+        self.total_k = np.broadcast_to(np.asarray(total_k, dtype=float), shape)
+        self.segmented = segments
+        if friction_model is not None and not isinstance(friction_model, str):
+            friction_model = np.broadcast_to(np.asarray(friction_model, dtype=object), (n,))
+        self.friction_model = friction_model
+        # Propiedades del fluido por fila (m2/s y kg/m3), ver fluids.resolve
+        self.kinematic_viscosity = np.broadcast_to(np.asarray(kinematic_viscosity, dtype=float), (n,))
+        self.density = np.broadcast_to(np.asarray(density, dtype=float), (n,))
+
+    def __len__(self):
+        return len(self.geometric_height_m)
+
+    def take(self, rows):
+        """A new batch with the pipelines at index ``rows`` (repeats allowed)."""
+        model = self.friction_model
+        if model is not None and not isinstance(model, str):
+            model = model[rows]
+        return SystemCurve(self.geometric_height_m[rows], self.pipe_length_m[rows], self.diameter_m[rows],
+                           self.roughness_mm[rows], self.total_k[rows], model,
+                           self.kinematic_viscosity[rows], self.density[rows])
+
+    @classmethod
+    def from_batch(cls, results):
+        """System curves of the rows of a hydraulics.calculate_batch result."""
+        return cls(results["geometric_height"], results["pipe_length_m"], results["diameter_m"],
+                   results["roughness_mm"], results["total_k"], results["friction_model"],
+                   results.get("kinematic_viscosity", hydraulics.KINEMATIC_VISCOSITY),
+                   results.get("density", hydraulics.WATER_DENSITY))
+
+    def evaluate(self, q, rows=None, pump_efficiency=1.0):
+        """hydraulics.compute_hydraulics at flow ``q`` (shape (n,) or (n, m)) for every row."""
+        q = np.asarray(q, dtype=float)
+        expand = (slice(None),) + (np.newaxis,) * (q.ndim - 1)
+
+        def column(values):
+            return _rows(values, rows)[expand]
+
+        # El eje de tramos queda al final, detrás de los ejes de q
+        pipe_expand = expand + (slice(None),) if self.segmented else expand
+
+        def pipe(values):
+            return _rows(values, rows)[pipe_expand]
+
+        model = self.friction_model
+        if model is not None and not isinstance(model, str):
+            model = column(model)
+        efficiency = pump_efficiency if np.ndim(pump_efficiency) == 0 else column(np.asarray(pump_efficiency))
+        compute = hydraulics.compute_pipeline if self.segmented else hydraulics.compute_hydraulics
+        return compute(column(self.geometric_height_m), q, pipe(self.pipe_length_m), pipe(self.diameter_m),
+                       pipe(self.roughness_mm), pipe(self.total_k), efficiency, model,
+                       column(self.kinematic_viscosity), column(self.density))
+
+    def head(self, q, rows=None):
+        """System head at flow ``q``; the static head at Q <= 0."""
+        q = np.asarray(q, dtype=float)
+        expand = (slice(None),) + (np.newaxis,) * (q.ndim - 1)
+        static = np.broadcast_to(_rows(self.geometric_height_m, rows)[expand], q.shape)
+        flowing = q > 0
+        if flowing.all():
+            return self.evaluate(q, rows)["total_head"]
+        total = static.copy()
+        if flowing.any():
+            # Q = 0 daría Re = 0 y pérdidas 0·inf
+            total[flowing] = self.evaluate(np.where(flowing, q, 1.0), rows)["total_head"][flowing]
+        return total
+
+
+def solve(pump, system, flow_hint=None, xtol=SOLVER_XTOL, max_iter=SOLVER_MAX_ITER):
+    """
+    Intersect each pump curve with its system curve.
+
+    ``flow_hint`` (m³/s, e.g. the design flow) seeds the upper bracket of
+    polynomial curves with no known runout. Returns (flow, head, status) arrays;
+    rows without an intersection get NaN and a NO_INTERSECTION or BEYOND_CURVE
+    status.
+    """
+    n = len(system)
+    if len(pump) == 1 and n > 1:
+        pump = pump.take(np.zeros(n, dtype=int))
+    if len(pump) != n:
+        raise ValueError("Debe haber una curva de bomba por cada sistema (o una sola para todos)")
+
+    def residual(q, rows):
+        return pump.head(q, rows) - system.head(q, rows)
+
+    all_rows = np.arange(n)
+    lo = np.zeros(n)
+    f_lo = residual(lo, all_rows)
+
+    # Extremo superior: fin de la curva, o se duplica desde el caudal de referencia
+    hi = pump.max_flow.copy()
+    open_ended = ~np.isfinite(hi)
+    if open_ended.any():
+        seed = np.ones(n) if flow_hint is None else np.broadcast_to(np.asarray(flow_hint, dtype=float), (n,))
+        hi[open_ended] = np.where(seed[open_ended] > 0, seed[open_ended], 1.0)
+    f_hi = residual(hi, all_rows)
+    grow = open_ended & (f_hi > 0)
+    for _ in range(BRACKET_MAX_DOUBLINGS):
+        if not grow.any():
+            break
+        rows = np.flatnonzero(grow)
+        hi[rows] *= 2
+        f_hi[rows] = residual(hi[rows], rows)
+        grow[rows] = f_hi[rows] > 0
+
+    # El caudal de referencia suele estar cerca de la raíz: estrecha el intervalo
+    if flow_hint is not None:
+        hint = np.broadcast_to(np.asarray(flow_hint, dtype=float), (n,))
+        rows = np.flatnonzero((f_lo > 0) & (f_hi < 0) & (hint > lo) & (hint < hi))
+        if rows.size:
+            f_hint = residual(hint[rows], rows)
+            below = f_hint > 0
+            lo[rows[below]], f_lo[rows[below]] = hint[rows[below]], f_hint[below]
+            hi[rows[~below]], f_hi[rows[~below]] = hint[rows[~below]], f_hint[~below]
+
+    flow = np.full(n, np.nan)
+    status = np.full(n, OK, dtype=object)
+    status[~(f_lo >= 0)] = NO_INTERSECTION
+    status[(f_lo >= 0) & ~(f_hi <= 0)] = BEYOND_CURVE
+    exact_lo = (status == OK) & (f_lo == 0)
+    exact_hi = (status == OK) & (f_hi == 0)
+    flow[exact_lo] = lo[exact_lo]
+    flow[exact_hi] = hi[exact_hi]
+
+    # Illinois sobre las filas con cambio de signo estricto
+    active = np.flatnonzero((f_lo > 0) & (f_hi < 0))
+    a, fa, b, fb = lo[active], f_lo[active], hi[active], f_hi[active]
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        with np.errstate(divide='ignore', invalid='ignore'):
+            c = b - fb * (b - a) / (fb - fa)
+        outside = ~((c > np.minimum(a, b)) & (c < np.maximum(a, b)))
+        c[outside] = 0.5 * (a + b)[outside]
+        fc = residual(c, active)
+
+        flip = fc * fb < 0
+        a = np.where(flip, b, a)
+        fa = np.where(flip, fb, fa / 2)
+        step = np.abs(c - b)
+        b, fb = c, fc
+
+        done = (fc == 0) | (step <= xtol * np.maximum(np.abs(c), xtol))
+        flow[active[done]] = c[done]
+        keep = ~done
+        active, a, fa, b, fb = active[keep], a[keep], fa[keep], b[keep], fb[keep]
+    flow[active] = b  # Sin converger tras max_iter: mejor estimación
+
+    head = np.full(n, np.nan)
+    solved = np.flatnonzero(status == OK)
+    head[solved] = pump.head(flow[solved], solved)
+    return flow, head, status
+
+
+def pump_curves_from_specs(specs):
+    """
+    Build a PumpCurve batch from request dicts, one per row. Each spec has
+    either ``coefficients`` [c0, c1, c2, ...] (H = c0 + c1·Q + c2·Q² + ...) or
+    ``points`` [[Q, H], ...], in ``flow_unit``/``head_unit``, and an optional
+    ``max_flow`` limiting a polynomial curve.
+    """
+    kinds = {"coefficients": [], "points": []}
+    for i, spec in enumerate(specs):
+        if (spec.get("coefficients") is None) == (spec.get("points") is None):
+            raise ValueError(f"Bomba {i}: indique 'coefficients' o 'points' (solo uno)")
+        kinds["points" if spec.get("points") is not None else "coefficients"].append(i)
+
+    def scales(spec):
+        # Caudal SI de una unidad de caudal, y altura SI de una unidad de altura
+        flow = hydraulics.to_si([1.0], spec.get("flow_unit") or "l/s", hydraulics.FLOW_UNITS)[0]
+        head = hydraulics.to_si([1.0], spec.get("head_unit") or "m", hydraulics.HEIGHT_UNITS)[0]
+        return flow, head
+
+    batches, order = [], []
+    if kinds["coefficients"]:
+        rows = [specs[i] for i in kinds["coefficients"]]
+        width = max(len(spec["coefficients"]) for spec in rows)
+        coefficients = np.zeros((len(rows), width))
+        max_flow = np.full(len(rows), np.inf)
+        for r, spec in enumerate(rows):
+            flow, head = scales(spec)
+            c = np.asarray(spec["coefficients"], dtype=float)
+            # H_si = head · Σ c_i (Q_si / flow)^i
+            coefficients[r, :len(c)] = c * head / flow ** np.arange(len(c))
+            if spec.get("max_flow") is not None:
+                max_flow[r] = spec["max_flow"] * flow
+        batches.append(PumpCurve.polynomial(coefficients, max_flow))
+        order += kinds["coefficients"]
+    if kinds["points"]:
+        points = []
+        for i in kinds["points"]:
+            flow, head = scales(specs[i])
+            points.append([(q * flow, h * head) for q, h in specs[i]["points"]])
+        batches.append(PumpCurve.from_points(points))
+        order += kinds["points"]
+
+    pumps = batches[0] if len(batches) == 1 else PumpCurve.concat(batches)
+    return pumps.take(np.argsort(order, kind="stable"))
+
+
+def with_design_points(results):
+    """
+    Add the true operating point and the system curve to a
+    hydraulics.calculate_batch result, for the synthetic pump curve built from
+    each design point. The system curve is evaluated at the pump curve flows.
+    """
+    system = SystemCurve.from_batch(results)
+    pump = PumpCurve.synthetic(results["total_head"], results["flow_rate_m3s"])
+    with np.errstate(invalid='ignore', over='ignore'):
+        flow, head, status = solve(pump, system, results["flow_rate_m3s"])
+        system_head = system.head(results["curve_flow"])
+    results.update({
+        "operating_flow": flow,
+        "operating_head": head,
+        "operating_status": status,
+        "system_curve_head": system_head,
+    })
+    return results
@@ -0,0 +1,118 @@
+"""
+Life-cycle-cost pipe diameter optimizer.
+
+Searches a catalog of commercial diameters for the one with the lowest pipe
+capital cost plus pumping energy cost over the analysis period, using the
+Darcy-Weisbach math in the hydraulics module. Velocity limits are turned into
+a diameter window first, so only the feasible slice of the catalog is evaluated.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+import hydraulics
+
+CATALOG_PATH = Path(__file__).parent / "data" / "pipe_catalog.json"
+
+
+class PipeCatalog:
+    """Commercial diameters of one material, sorted by internal diameter"""
+
+    def __init__(self, items):
+        items = sorted(items, key=lambda item: item["internal_diameter_mm"])
+        self.nominal = [item["nominal"] for item in items]
+        self.diameter_mm = np.array([item["internal_diameter_mm"] for item in items], dtype=float)
+        self.cost_per_m = np.array([item["cost_per_m"] for item in items], dtype=float)
+
+    def __len__(self):
+        return len(self.nominal)
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=CATALOG_PATH):
+    """Load the pipe catalog once and index it by lowercase material name."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return {
+        material.lower(): PipeCatalog(items)
+        for material, items in raw.items()
+        if not material.startswith("_")
+    }
+
+
+def diameter_window(flow_rate_m3s, velocity_min, velocity_max):
+    """Internal diameter range (m) that keeps velocity within [velocity_min, velocity_max]."""
+    d_min = np.sqrt(4 * flow_rate_m3s / (np.pi * velocity_max)) if velocity_max else 0.0
+    d_max = np.sqrt(4 * flow_rate_m3s / (np.pi * velocity_min)) if velocity_min else np.inf
+    return d_min, d_max
+
+
+def optimize_diameter(params, catalog, years, energy_tariff, operating_hours,
+                      velocity_min, velocity_max, top_n=5):
+    """
+    Rank catalog diameters by total life-cycle cost.
+
+    ``params`` holds the PumpingStationInput fields except the diameter. Returns a
+    dict with the optimum, the ranked feasible candidates and pruning counters.
+    """
+    geometric_height_m = hydraulics.to_si([params['geometric_height']], params['geometric_height_unit'], hydraulics.HEIGHT_UNITS)[0]
+    flow_rate_m3s = hydraulics.to_si([params['flow_rate']], params['flow_rate_unit'], hydraulics.FLOW_UNITS)[0]
+    pipe_length_m = hydraulics.to_si([params['pipe_length']], params['pipe_length_unit'], hydraulics.LENGTH_UNITS)[0]
+    roughness_mm = hydraulics.roughness_for([params['pipe_material']])[0]
+    total_k = hydraulics.fittings_k({f: [params[f]] for f in hydraulics.FITTING_FIELDS
+                                     if params.get(f) is not None}, 1)[0]
+    if flow_rate_m3s <= 0:
+        raise ValueError("El caudal debe ser mayor que cero")
+
+    # Poda: solo el tramo del catálogo (ordenado) que cumple los límites de velocidad
+    d_min, d_max = diameter_window(flow_rate_m3s, velocity_min, velocity_max)
+    lo = np.searchsorted(catalog.diameter_mm, d_min * 1000, side='left')
+    hi = np.searchsorted(catalog.diameter_mm, d_max * 1000, side='right')
+
+    diameter_m = catalog.diameter_mm[lo:hi] / 1000
+    results = hydraulics.compute_hydraulics(geometric_height_m, flow_rate_m3s, pipe_length_m, diameter_m,
+                                            roughness_mm, total_k, params['pump_efficiency'],
+                                            params.get('friction_model'), *hydraulics.fluid_properties(params))
+
+    # Verificación exacta de la restricción sobre la velocidad calculada
+    velocity = results["velocity"]
+    feasible = np.ones(velocity.shape, dtype=bool)
+    if velocity_min:
+        feasible &= velocity >= velocity_min
+    if velocity_max:
+        feasible &= velocity <= velocity_max
+    feasible &= np.isfinite(results["power_kw"])
+
+    capital_cost = catalog.cost_per_m[lo:hi] * pipe_length_m
+    annual_energy_kwh = results["power_kw"] * operating_hours
+    energy_cost = annual_energy_kwh * energy_tariff * years
+    total_cost = capital_cost + energy_cost
+
+    index = np.flatnonzero(feasible)
+    order = index[np.argsort(total_cost[index], kind='stable')][:top_n]
+
+    candidates = [
+        {
+            "nominal": catalog.nominal[lo + i],
+            "internal_diameter_mm": float(catalog.diameter_mm[lo + i]),
+            "velocity": round(float(velocity[i]), 2),
+            "total_head": round(float(results["total_head"][i]), 2),
+            "power_kw": round(float(results["power_kw"][i]), 2),
+            "annual_energy_kwh": round(float(annual_energy_kwh[i]), 0),
+            "capital_cost": round(float(capital_cost[i]), 2),
+            "energy_cost": round(float(energy_cost[i]), 2),
+            "total_cost": round(float(total_cost[i]), 2),
+        }
+        for i in order
+    ]
+    return {
+        "optimum": candidates[0] if candidates else None,
+        "candidates": candidates,
+        "catalog_size": len(catalog),
+        "evaluated": int(hi - lo),
+        "feasible": int(index.size),
+        "velocity_window_mm": [round(float(d_min) * 1000, 1),
+                               round(float(d_max) * 1000, 1) if np.isfinite(d_max) else None],
+    }
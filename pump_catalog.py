@@ -0,0 +1,204 @@
+"""
+Commercial pump catalog and best-fit pump selection.
+
+Each pump carries tabulated H-Q, efficiency and NPSHr curves, loaded from
+JSON or CSV files. The catalog is sorted by best-efficiency-point (BEP) flow,
+so a duty point only has to look at the slice of pumps whose allowable
+operating region can contain it (a searchsorted window), narrowed further by
+BEP head. Only the survivors are intersected with the real system curve, in
+one vectorized operating_point.solve call, and ranked by efficiency there.
+"""
+import csv
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+import hydraulics
+import operating_point
+
+CATALOG_PATH = Path(os.environ.get("PUMP_CATALOG_PATH", Path(__file__).parent / "data" / "pump_catalog.json"))
+
+CURVE_FIELDS = ("flow_ls", "head_m", "efficiency", "npshr_m")
+# Región de operación admisible: fracción del caudal del BEP
+AOR_MIN = 0.5
+AOR_MAX = 1.3
+# Rango de (altura de diseño / altura del BEP) que puede cruzar una curva dentro de la AOR
+BEP_HEAD_RATIO_MIN = 0.6
+BEP_HEAD_RATIO_MAX = 1.6
+
+
+class PumpCatalog:
+    """Pump curves in SI units, padded to a common width and sorted by BEP flow"""
+
+    def __init__(self, pumps):
+        if not pumps:
+            raise ValueError("El catálogo de bombas está vacío")
+        width = max(len(p["flow_ls"]) for p in pumps)
+        n = len(pumps)
+        curves = {field: np.empty((n, width)) for field in CURVE_FIELDS}
+        for i, pump in enumerate(pumps):
+            order = np.argsort(pump["flow_ls"], kind='stable')
+            if len(order) < 2:
+                raise ValueError(f"La bomba '{pump['model']}' necesita al menos 2 puntos de curva")
+            for field in CURVE_FIELDS:
+                values = np.asarray(pump[field], dtype=float)[order]
+                # Se rellena repitiendo el último punto (segmentos de ancho cero)
+                curves[field][i, :len(values)] = values
+                curves[field][i, len(values):] = values[-1]
+
+        flow_m3s = curves["flow_ls"] / 1000
+        best = np.argmax(curves["efficiency"], axis=1)
+        bep_flow = flow_m3s[np.arange(n), best]
+        order = np.argsort(bep_flow, kind='stable')
+
+        self.model = [pumps[i]["model"] for i in order]
+        self.manufacturer = [pumps[i].get("manufacturer", "") for i in order]
+        self.speed_rpm = [pumps[i].get("speed_rpm") for i in order]
+        self.flow_m3s = flow_m3s[order]
+        self.head_m = curves["head_m"][order]
+        self.efficiency = curves["efficiency"][order]
+        self.npshr_m = curves["npshr_m"][order]
+        self.bep_flow = bep_flow[order]
+        self.bep_head = self.head_m[np.arange(n), best[order]]
+        self.bep_efficiency = self.efficiency[np.arange(n), best[order]]
+
+    def __len__(self):
+        return len(self.model)
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return raw["pumps"] if isinstance(raw, dict) else raw
+
+
+def _read_csv(path):
+    # Una fila por punto de curva; las filas de un mismo modelo se agrupan en orden
+    pumps = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            pump = pumps.get(row["model"])
+            if pump is None:
+                speed = row.get("speed_rpm")
+                pump = pumps[row["model"]] = {
+                    "model": row["model"],
+                    "manufacturer": row.get("manufacturer", ""),
+                    "speed_rpm": int(float(speed)) if speed else None,
+                    **{field: [] for field in CURVE_FIELDS},
+                }
+            for field in CURVE_FIELDS:
+                pump[field].append(float(row[field]))
+    return list(pumps.values())
+
+
+READERS = {".json": _read_json, ".csv": _read_csv}
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=CATALOG_PATH):
+    """
+    Load and index the pump catalog once. ``path`` is a .json or .csv file, or
+    a directory whose .json and .csv files are merged into one catalog.
+    """
+    path = Path(path)
+    files = sorted(p for p in path.iterdir() if p.suffix.lower() in READERS) if path.is_dir() else [path]
+    pumps = []
+    for file in files:
+        reader = READERS.get(file.suffix.lower())
+        if reader is None:
+            raise ValueError(f"Formato de catálogo no soportado: '{file.suffix}' (use .json o .csv)")
+        pumps.extend(reader(file))
+    return PumpCatalog(pumps)
+
+
+def candidate_window(catalog, duty_flow, duty_head):
+    """
+    Indices of the pumps whose AOR contains ``duty_flow`` and whose BEP head is
+    compatible with ``duty_head``, plus the size of the flow window.
+    """
+    lo = np.searchsorted(catalog.bep_flow, duty_flow / AOR_MAX, side='left')
+    hi = np.searchsorted(catalog.bep_flow, duty_flow / AOR_MIN, side='right')
+    bep_head = catalog.bep_head[lo:hi]
+    keep = (bep_head >= duty_head / BEP_HEAD_RATIO_MAX) & (bep_head <= duty_head / BEP_HEAD_RATIO_MIN)
+    return lo + np.flatnonzero(keep), int(hi - lo)
+
+
+def _intersect(catalog, system, rows, duty_flow):
+    """Operating point of the pumps at ``rows`` on the system curve, with efficiency and NPSHr there."""
+    flows = catalog.flow_m3s[rows]
+    pump = operating_point.PumpCurve.tabulated_arrays(flows, catalog.head_m[rows])
+    with np.errstate(invalid='ignore', over='ignore'):
+        flow, head, status = operating_point.solve(pump, system.take(np.zeros(len(rows), dtype=int)),
+                                                   np.full(len(rows), duty_flow))
+    efficiency = operating_point.interpolate_rows(flow, flows, catalog.efficiency[rows])
+    npshr = operating_point.interpolate_rows(flow, flows, catalog.npshr_m[rows])
+    bep_ratio = flow / catalog.bep_flow[rows]
+    return flow, head, efficiency, npshr, bep_ratio, status
+
+
+def select_pumps(catalog, system, duty_flow, duty_head, top_n=5, head_tolerance=0.1,
+                 npsh_available=None, indexed=True):
+    """
+    Rank catalog pumps for a duty point by efficiency at their real operating point.
+
+    ``system`` is a one-row operating_point.SystemCurve and the duty point is in
+    m³/s and m. A pump qualifies if its head at the duty flow is within
+    ``head_tolerance`` (fraction) of the duty head, its intersection with the
+    system curve lies inside its AOR and, if ``npsh_available`` (m) is given,
+    its NPSHr there does not exceed it. ``indexed=False`` skips the BEP window
+    and checks the whole catalog (to verify the index).
+    """
+    if duty_flow <= 0 or not np.isfinite(duty_head):
+        raise ValueError("El punto de diseño debe tener caudal positivo y altura finita")
+    if indexed:
+        rows, window = candidate_window(catalog, duty_flow, duty_head)
+    else:
+        rows, window = np.arange(len(catalog)), len(catalog)
+
+    # La curva debe pasar cerca del punto de diseño
+    flows = catalog.flow_m3s[rows]
+    head_at_duty = operating_point.interpolate_rows(np.full(len(rows), duty_flow), flows, catalog.head_m[rows])
+    near = (np.abs(head_at_duty - duty_head) <= head_tolerance * abs(duty_head)) & (flows[:, -1] >= duty_flow)
+    rows, head_at_duty = rows[near], head_at_duty[near]
+
+    if not len(rows):
+        flow = head = efficiency = npshr = bep_ratio = np.empty(0)
+        status = np.empty(0, dtype=object)
+    else:
+        flow, head, efficiency, npshr, bep_ratio, status = _intersect(catalog, system, rows, duty_flow)
+
+    feasible = (status == operating_point.OK) & (bep_ratio >= AOR_MIN) & (bep_ratio <= AOR_MAX) & (efficiency > 0)
+    if npsh_available is not None:
+        feasible &= npshr <= npsh_available
+    index = np.flatnonzero(feasible)
+    order = index[np.argsort(-efficiency[index], kind='stable')][:top_n]
+
+    power_kw = system.density[0] * hydraulics.GRAVITY * flow * head / np.where(efficiency > 0, efficiency, np.nan) / 1000
+    candidates = []
+    for i in order:
+        r = rows[i]
+        candidates.append({
+            "model": catalog.model[r],
+            "manufacturer": catalog.manufacturer[r],
+            "speed_rpm": catalog.speed_rpm[r],
+            "flow_rate": round(float(flow[i]) * 1000, 2),
+            "head": round(float(head[i]), 2),
+            "efficiency": round(float(efficiency[i]), 4),
+            "power_kw": round(float(power_kw[i]), 2),
+            "npshr": round(float(npshr[i]), 2),
+            "bep_flow_rate": round(float(catalog.bep_flow[r]) * 1000, 2),
+            "bep_ratio": round(float(bep_ratio[i]), 3),
+            "head_at_duty": round(float(head_at_duty[i]), 2),
+        })
+    return {
+        "duty_point": {"flow_rate": round(float(duty_flow) * 1000, 2), "head": round(float(duty_head), 2)},
+        "best": candidates[0] if candidates else None,
+        "candidates": candidates,
+        "catalog_size": len(catalog),
+        "window": window,
+        "evaluated": int(len(rows)),
+        "feasible": int(index.size),
+    }
@@ -0,0 +1,259 @@
+"""
+Multi-pump stations: parallel or series groups with duty/standby staging.
+
+A group is a handful of pump types (curve, number of identical units, VFD
+speed ratio and efficiency). Every type is sampled once on a common grid, as
+flow versus head for parallel groups or head versus flow for series groups.
+The combined curve of any set of running pumps is then a matrix product:
+``counts @ samples`` adds the flows (parallel) or heads (series) of the
+running units. Every staging combination is intersected with the system
+curve in one operating_point.solve call.
+"""
+import numpy as np
+
+import hydraulics
+import operating_point
+
+PARALLEL = "parallel"
+SERIES = "series"
+ARRANGEMENTS = (PARALLEL, SERIES)
+
+GROUP_CURVE_POINTS = 200  # Puntos de muestreo de la curva de cada tipo
+MAX_STAGING_COMBINATIONS = 4096
+# La parábola sintética (cierre 1.33H, embalamiento 2Q) pasa 0.25% por debajo del punto de diseño
+DESIGN_FLOW_TOLERANCE = 0.01
+
+
+class PumpGroup:
+    """Pump types of a station, in SI units; ``curves`` has one row per type"""
+
+    def __init__(self, curves, counts, speed_ratio=1.0, efficiency=1.0, arrangement=PARALLEL,
+                 standby=0, names=None):
+        if arrangement not in ARRANGEMENTS:
+            raise ValueError(f"Disposición '{arrangement}' no soportada (use {' o '.join(ARRANGEMENTS)})")
+        n = len(curves)
+        self.curves = curves
+        self.counts = np.asarray(counts, dtype=int)
+        self.speed_ratio = np.broadcast_to(np.asarray(speed_ratio, dtype=float), (n,))
+        self.efficiency = np.broadcast_to(np.asarray(efficiency, dtype=float), (n,))
+        self.arrangement = arrangement
+        self.standby = int(standby or 0)
+        self.names = list(names) if names is not None else [f"Bomba {i + 1}" for i in range(n)]
+        if (self.counts < 1).any():
+            raise ValueError("Cada tipo de bomba debe tener al menos una unidad")
+        if (self.speed_ratio <= 0).any():
+            raise ValueError("La relación de velocidad debe ser mayor que cero")
+        if not 0 <= self.standby < self.counts.sum():
+            raise ValueError("Las bombas de reserva deben ser menos que el total de bombas")
+
+    def __len__(self):
+        return len(self.counts)
+
+
+def group_from_specs(specs, arrangement=PARALLEL, standby=0, total_head=None, flow_rate_m3s=None,
+                     pump_efficiency=1.0):
+    """
+    Build a PumpGroup from request dicts (PumpCurveInput fields plus ``name``,
+    ``count``, ``speed_ratio`` and ``efficiency``). A type without curve gets
+    the synthetic curve of an equal share of the design point among the duty
+    pumps: the design flow split in parallel, the design head split in series.
+    """
+    counts = [spec.get("count") or 1 for spec in specs]
+    duty = sum(counts) - (standby or 0)
+    curves = []
+    for spec in specs:
+        if spec.get("coefficients") is None and spec.get("points") is None:
+            if total_head is None or flow_rate_m3s is None or duty < 1:
+                raise ValueError("Sin curva de bomba se necesita un punto de diseño y al menos una bomba en servicio")
+            if arrangement == SERIES:
+                curves.append(operating_point.PumpCurve.synthetic(total_head / duty, flow_rate_m3s))
+            else:
+                curves.append(operating_point.PumpCurve.synthetic(total_head, flow_rate_m3s / duty))
+        else:
+            curves.append(operating_point.pump_curves_from_specs([spec]))
+    return PumpGroup(
+        operating_point.PumpCurve.concat(curves) if len(curves) > 1 else curves[0],
+        counts,
+        speed_ratio=[spec.get("speed_ratio") or 1.0 for spec in specs],
+        efficiency=[spec.get("efficiency") or pump_efficiency for spec in specs],
+        arrangement=arrangement,
+        standby=standby,
+        names=[spec.get("name") or f"Bomba {i + 1}" for i, spec in enumerate(specs)],
+    )
+
+
+def staging_combinations(counts, standby=0):
+    """
+    Every set of running pumps as a (combinations, types) matrix of running
+    units per type, ordered by number of pumps on. Identical units are not
+    told apart, and at most ``sum(counts) - standby`` pumps run at once.
+    """
+    counts = np.asarray(counts, dtype=int)
+    total = int(np.prod(counts + 1))
+    if total > MAX_STAGING_COMBINATIONS:
+        raise ValueError(f"Demasiadas combinaciones de bombas ({total}); el máximo es {MAX_STAGING_COMBINATIONS}")
+    grid = np.indices(counts + 1).reshape(len(counts), -1).T
+    running = grid.sum(axis=1)
+    keep = (running > 0) & (running <= counts.sum() - standby)
+    grid, running = grid[keep], running[keep]
+    return grid[np.argsort(running, kind='stable')]
+
+
+def sample_curves(group, flow_hint=None):
+    """
+    Each pump type at its own speed, sampled on GROUP_CURVE_POINTS flows from
+    zero to the end of its curve (the runout at H = 0 if open-ended). Returns
+    (flows, heads) of shape (types, points). Heads are made non-increasing, so
+    a rising low-flow branch is flattened and H(Q) can be inverted.
+    """
+    curves = group.curves
+    q_end = curves.max_flow.copy()
+    open_ended = ~np.isfinite(q_end)
+    if open_ended.any():
+        # Caudal de embalamiento por duplicación, como el intervalo de operating_point.solve
+        seed = 1.0 if flow_hint is None else float(flow_hint)
+        rows = np.flatnonzero(open_ended)
+        q_end[rows] = seed if seed > 0 else 1.0
+        for _ in range(operating_point.BRACKET_MAX_DOUBLINGS):
+            positive = curves.head(q_end[rows], rows) > 0
+            if not positive.any():
+                break
+            q_end[rows[positive]] *= 2
+
+    base = q_end[:, np.newaxis] * np.linspace(0, 1, GROUP_CURVE_POINTS)
+    heads = np.minimum.accumulate(curves.head(base), axis=1)
+    # Leyes de afinidad: Q ∝ n, H ∝ n²
+    r = group.speed_ratio[:, np.newaxis]
+    return base * r, heads * r**2
+
+
+def _flow_at_head(flows, heads, grid):
+    """Inverse of each sampled curve on the heads ``grid``: 0 above the shutoff, NaN below the curve end."""
+    out = np.empty((len(flows), len(grid)))
+    for j in range(len(flows)):
+        # np.interp necesita abscisas crecientes: se recorre la curva al revés
+        out[j] = np.interp(grid, heads[j, ::-1], flows[j, ::-1], left=np.nan, right=0.0)
+    return out
+
+
+def _head_at_flow(flows, heads, grid):
+    """Each sampled curve on the flows ``grid``: NaN beyond the end of the curve."""
+    out = np.empty((len(flows), len(grid)))
+    for j in range(len(flows)):
+        out[j] = np.interp(grid, flows[j], heads[j], right=np.nan)
+    return out
+
+
+def combined_curves(group, combos, flows, heads):
+    """
+    Tabulated PumpCurve of each staging combination: flows of the running
+    units added at equal head (parallel) or heads added at equal flow (series).
+    A combination's curve ends where the first of its running units does.
+    """
+    # La grilla es la unión de los puntos de todos los tipos: la suma de las
+    # poligonales es exacta (en alturas decrecientes si es en paralelo)
+    if group.arrangement == PARALLEL:
+        grid = np.unique(heads)[::-1]
+        samples = _flow_at_head(flows, heads, grid)
+    else:
+        grid = np.unique(flows)
+        samples = _head_at_flow(flows, heads, grid)
+
+    missing = np.isnan(samples)
+    values = combos @ np.where(missing, 0.0, samples)
+    invalid = (combos > 0) @ missing > 0
+    # La parte válida es un prefijo: se rellena repitiendo su último punto
+    last = (~invalid).sum(axis=1) - 1
+    rows = np.arange(len(combos))
+    axis = np.broadcast_to(grid, values.shape)
+    values = np.where(invalid, values[rows, last][:, np.newaxis], values)
+    axis = np.where(invalid, axis[rows, last][:, np.newaxis], axis)
+    if group.arrangement == PARALLEL:
+        return operating_point.PumpCurve.tabulated_arrays(values, axis)
+    return operating_point.PumpCurve.tabulated_arrays(axis, values)
+
+
+def solve_staging(group, system, flow_hint=None):
+    """
+    Operating point of every staging combination of ``group`` on a one-row
+    SystemCurve. Returns a dict of arrays: ``combos`` (combinations, types),
+    station flow, head and status, per-type ``unit_flow``/``unit_head`` of one
+    running unit (NaN for types that are off) and total ``power_kw``.
+    """
+    combos = staging_combinations(group.counts, group.standby)
+    flows, heads = sample_curves(group, flow_hint)
+    curve = combined_curves(group, combos, flows, heads)
+    n = len(combos)
+    hint = None if flow_hint is None else np.full(n, flow_hint)
+    with np.errstate(invalid='ignore', over='ignore'):
+        flow, head, status = operating_point.solve(curve, system.take(np.zeros(n, dtype=int)), hint)
+
+    if group.arrangement == PARALLEL:
+        unit_head = np.repeat(head[:, np.newaxis], len(group), axis=1)
+        unit_flow = np.stack([np.interp(head, heads[j, ::-1], flows[j, ::-1], left=np.nan, right=0.0)
+                              for j in range(len(group))], axis=1)
+    else:
+        unit_flow = np.repeat(flow[:, np.newaxis], len(group), axis=1)
+        unit_head = np.stack([np.interp(flow, flows[j], heads[j], right=np.nan)
+                              for j in range(len(group))], axis=1)
+    off = combos == 0
+    unit_flow[off] = np.nan
+    unit_head[off] = np.nan
+
+    unit_power = system.density[0] * hydraulics.GRAVITY * unit_flow * unit_head / group.efficiency / 1000
+    power_kw = np.where(off, 0.0, unit_power * combos).sum(axis=1)
+    power_kw[status != operating_point.OK] = np.nan
+    return {
+        "combos": combos,
+        "flow": flow,
+        "head": head,
+        "status": status,
+        "unit_flow": unit_flow,
+        "unit_head": unit_head,
+        "power_kw": power_kw,
+    }
+
+
+def staging_table(group, staged, design_flow=None):
+    """
+    JSON rows of a solve_staging result, plus the index of the recommended
+    combination: the fewest pumps that deliver ``design_flow`` (within
+    DESIGN_FLOW_TOLERANCE), then the lowest power. ``per_pump`` gives one
+    running unit of each type.
+    """
+    rows = []
+    for i, combo in enumerate(staged["combos"]):
+        solved = staged["status"][i] == operating_point.OK
+        flow = float(staged["flow"][i])
+        row = {
+            "running": {name: int(k) for name, k in zip(group.names, combo) if k},
+            "pumps_on": int(combo.sum()),
+            "flow_rate": round(flow * 1000, 2) if solved else None,
+            "head": round(float(staged["head"][i]), 2) if solved else None,
+            "power_kw": round(float(staged["power_kw"][i]), 2) if solved else None,
+            "status": staged["status"][i],
+            "per_pump": [
+                {
+                    "name": name,
+                    "flow_rate": round(float(staged["unit_flow"][i, j]) * 1000, 2),
+                    "head": round(float(staged["unit_head"][i, j]), 2),
+                }
+                for j, name in enumerate(group.names) if combo[j] and solved
+            ],
+        }
+        if design_flow is not None:
+            row["meets_design"] = bool(solved and flow >= design_flow * (1 - DESIGN_FLOW_TOLERANCE))
+        rows.append(row)
+
+    candidates = [i for i, row in enumerate(rows) if row.get("meets_design")]
+    best = min(candidates, key=lambda i: (rows[i]["pumps_on"], rows[i]["power_kw"])) if candidates else None
+    return {
+        "arrangement": group.arrangement,
+        "pumps": [
+            {"name": name, "count": int(count), "speed_ratio": float(r), "efficiency": float(eta)}
+            for name, count, r, eta in zip(group.names, group.counts, group.speed_ratio, group.efficiency)
+        ],
+        "standby": group.standby,
+        "combinations": rows,
+        "recommended": best,
+    }
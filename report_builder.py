@@ -0,0 +1,485 @@
+"""
+ReportLab layout for the pumping station PDF report.
+
+Everything that does not depend on the request is built once at import time:
+paragraph and table styles, the page template class and the static
+header/footer text. The static page artwork is drawn once per document into
+a form XObject and stamped on every page; only the date, page number, data
+tables, notes and chart are produced per report.
+"""
+import io
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import legal
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import BaseDocTemplate, Frame, PageBreak, PageTemplate, Paragraph, Spacer, Table, TableStyle
+
+PAGE_WIDTH, PAGE_HEIGHT = legal
+MARGIN = 50
+FOOTER_Y = 40
+
+COMPANY_NAME = 'VMS HYDRAULICS, S.A.'
+TAGLINE = 'Válvulas, mediciones y soluciones hidráulicas'
+STATIC_FORM = 'static_page'
+
+# Paragraph styles
+_sample = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'ReportTitle',
+    parent=_sample['Heading1'],
+    fontSize=20,
+    textColor=colors.HexColor('#2C3E50'),
+    fontName='Helvetica-Bold',
+    alignment=TA_CENTER,
+    spaceAfter=30,
+    spaceBefore=20
+)
+
+SECTION_STYLE = ParagraphStyle(
+    'SectionHeader',
+    parent=_sample['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#00BFFF'),
+    fontName='Helvetica-Bold',
+    spaceBefore=20,
+    spaceAfter=15,
+    borderWidth=0,
+    borderColor=colors.HexColor('#00BFFF'),
+    borderPadding=5
+)
+
+SUBSECTION_STYLE = ParagraphStyle(
+    'SubsectionHeader',
+    parent=_sample['Heading3'],
+    fontSize=12,
+    textColor=colors.HexColor('#34495E'),
+    fontName='Helvetica-Bold',
+    spaceBefore=15,
+    spaceAfter=10
+)
+
+NORMAL_STYLE = ParagraphStyle(
+    'CustomNormal',
+    parent=_sample['Normal'],
+    fontSize=10,
+    textColor=colors.HexColor('#2C3E50'),
+    fontName='Helvetica',
+    alignment=TA_JUSTIFY,
+    spaceAfter=8
+)
+
+CHART_SUBTITLE_STYLE = ParagraphStyle(
+    'ChartSubtitle',
+    parent=NORMAL_STYLE,
+    fontSize=9,
+    textColor=colors.HexColor('#666666'),
+    fontName='Helvetica-Oblique',
+    alignment=TA_CENTER,
+    spaceAfter=15
+)
+
+# Table styles
+PROJECT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#00BFFF')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('SPAN', (0, 0), (-1, 0)),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8F9FA')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8)
+])
+
+INPUT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495E')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F9FA')]),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6)
+])
+
+RESULTS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E74C3C')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FADBD8')]),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6)
+])
+
+POWER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#27AE60')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#D5F4E6')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8)
+])
+
+SEGMENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2980B9')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#EBF5FB')]),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D6EAF8')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5)
+])
+
+COMPARISON_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495E')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F9FA')]),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
+])
+
+CELL_STYLE = ParagraphStyle(
+    'TableCell',
+    parent=NORMAL_STYLE,
+    fontSize=8,
+    leading=10,
+    alignment=0,
+    spaceAfter=0
+)
+
+# Static texts, identical in every report (flowables are per document: wrap() mutates them)
+REPORT_TITLE_TEXT = "REPORTE TÉCNICO DE ESTACIÓN DE BOMBEO"
+CHART_SUBTITLE_TEXT = "Gráfico de rendimiento con ejes múltiples (m³/s, l/s, GPM) - Punto de operación y curvas del sistema"
+CHART_DESCRIPTION_TEXT = (
+    "La gráfica muestra la curva característica de la bomba (línea azul), "
+    "el punto de operación del sistema (punto rojo) y la curva del sistema hidráulico (línea verde). "
+    "El punto de intersección indica las condiciones de operación óptimas."
+)
+
+BUNDLE_TITLE_TEXT = "COMPARATIVO DE ESCENARIOS DE BOMBEO"
+BUNDLE_NOTE_TEXT = (
+    "Cada escenario se desarrolla a continuación en su propio reporte técnico, con numeración de "
+    "páginas propia; los marcadores del documento llevan a cada uno."
+)
+
+ACCESSORY_LABELS = (
+    ('valve_gate', 'Válvulas compuerta'),
+    ('valve_butterfly', 'Válvulas mariposa'),
+    ('valve_check', 'Válvulas check'),
+    ('valve_globe', 'Válvulas globo'),
+    ('elbow_90', 'Codos 90°'),
+    ('elbow_45', 'Codos 45°'),
+)
+
+
+def draw_static_page(canvas):
+    """Header and footer artwork shared by every page (no date or page number)."""
+    # Company name - left aligned with blue line
+    canvas.setFont('Helvetica-Bold', 20)
+    canvas.setFillColor(colors.HexColor('#1B2951'))
+    canvas.drawString(MARGIN, PAGE_HEIGHT - 50, COMPANY_NAME)
+
+    # Tagline - left aligned below company name
+    canvas.setFont('Helvetica-Oblique', 12)
+    canvas.setFillColor(colors.HexColor('#666666'))
+    canvas.drawString(MARGIN, PAGE_HEIGHT - 70, TAGLINE)
+
+    # Version info - right aligned
+    canvas.setFont('Helvetica', 10)
+    canvas.drawRightString(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 65, 'Sistema v2.0 Pro')
+
+    # Header line - full width
+    canvas.setStrokeColor(colors.HexColor('#00BFFF'))
+    canvas.setLineWidth(3)
+    canvas.line(MARGIN, PAGE_HEIGHT - 85, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 85)
+
+    # Footer line
+    canvas.setStrokeColor(colors.HexColor('#BDC3C7'))
+    canvas.setLineWidth(1)
+    canvas.line(MARGIN, FOOTER_Y + 25, PAGE_WIDTH - MARGIN, FOOTER_Y + 25)
+
+    # Footer text
+    canvas.setFont('Helvetica-Bold', 8)
+    canvas.setFillColor(colors.HexColor('#7F8C8D'))
+    canvas.drawString(MARGIN, FOOTER_Y + 10, f'{COMPANY_NAME} - {TAGLINE}')
+
+    canvas.setFont('Helvetica', 8)
+    canvas.drawString(MARGIN, FOOTER_Y - 14, 'Este reporte ha sido generado automáticamente y debe ser revisado por un ingeniero calificado.')
+
+    canvas.setFont('Helvetica-Oblique', 8)
+    canvas.drawString(MARGIN, FOOTER_Y - 26, 'Certificado ISO 9001 - Calidad garantizada en soluciones hidráulicas')
+
+
+class HeaderFooterDocTemplate(BaseDocTemplate):
+    """Legal-size document with the company header and footer on every page"""
+
+    def __init__(self, filename, current_date, **kwargs):
+        BaseDocTemplate.__init__(
+            self, filename,
+            pagesize=legal,
+            rightMargin=MARGIN,
+            leftMargin=MARGIN,
+            topMargin=120,  # Increased to accommodate header
+            bottomMargin=80,  # Increased to accommodate footer
+            **kwargs
+        )
+        self.current_date = current_date
+        frame = Frame(
+            MARGIN, 80, PAGE_WIDTH - 2 * MARGIN, PAGE_HEIGHT - 200,
+            leftPadding=0, bottomPadding=0, rightPadding=0, topPadding=0
+        )
+        self.addPageTemplates([PageTemplate(id='normal', frames=frame, onPage=self.build_header_footer)])
+
+    def build_header_footer(self, canvas, doc):
+        canvas.saveState()
+
+        # El arte estático se dibuja una vez por documento y se reutiliza en cada página
+        if not canvas.hasForm(STATIC_FORM):
+            canvas.beginForm(STATIC_FORM)
+            draw_static_page(canvas)
+            canvas.endForm()
+        canvas.doForm(STATIC_FORM)
+
+        canvas.setFont('Helvetica', 10)
+        canvas.setFillColor(colors.HexColor('#666666'))
+        canvas.drawRightString(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 50, self.current_date)
+
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.HexColor('#7F8C8D'))
+        canvas.drawString(MARGIN, FOOTER_Y - 2, f'Reporte generado el {self.current_date} | Sistema de Cálculo Hidráulico v2.0 Pro')
+
+        # Page number
+        canvas.drawRightString(PAGE_WIDTH - MARGIN, FOOTER_Y + 10, f'Página {doc.page}')
+
+        canvas.restoreState()
+
+
+def _table(rows, col_widths, style):
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(style)
+    return table
+
+
+def build_report_pdf(data, results, chart_flowable, current_date):
+    """
+    Lay out the report for one calculation and return the PDF bytes.
+    ``chart_flowable`` is the pump curve drawing or image, or None to omit it.
+    """
+    buffer = io.BytesIO()
+    doc = HeaderFooterDocTemplate(buffer, current_date)
+    params = data.dict()
+
+    story = [Paragraph(REPORT_TITLE_TEXT, TITLE_STYLE)]
+
+    # Project information box
+    project_data = [
+        ['INFORMACIÓN DEL PROYECTO', '', ''],
+        ['Proyecto:', params.get('project_name', 'N/A'), ''],
+        ['Ubicación:', params.get('project_location', 'N/A'), ''],
+        ['Fecha de reporte:', current_date, ''],
+        ['Elaborado por:', 'VMS HYDRAULICS', '']
+    ]
+    story.append(_table(project_data, [2.5*inch, 3*inch, 1*inch], PROJECT_TABLE_STYLE))
+    story.append(Spacer(1, 30))
+
+    # Input parameters section
+    story.append(Paragraph("1. PARÁMETROS DE ENTRADA", SECTION_STYLE))
+
+    input_data = [
+        ['PARÁMETRO', 'VALOR', 'UNIDAD', 'DESCRIPCIÓN'],
+        ['Altura Geométrica', f"{data.geometric_height:.2f}", data.geometric_height_unit, 'Diferencia de elevación'],
+        ['Caudal de Diseño', f"{data.flow_rate:.2f}", data.flow_rate_unit, 'Flujo volumetrico requerido'],
+    ]
+    segments = results.get('segments')
+    if segments:
+        # La tubería única se reemplaza por los tramos (detalle en la sección 2.2)
+        input_data += [
+            ['Tramos de Tubería', f"{len(segments)}", '-', 'Detalle por tramo en la sección 2.2'],
+            ['Longitud Total', f"{sum(s['length_m'] for s in segments):.2f}", 'm', 'Suma de las longitudes de los tramos'],
+        ]
+    else:
+        input_data += [
+            ['Longitud de Tubería', f"{data.pipe_length:.2f}", data.pipe_length_unit, 'Longitud total del sistema'],
+            ['Diámetro de Tubería', f"{data.pipe_diameter:.2f}", data.pipe_diameter_unit, 'Diámetro interno de tubería'],
+            ['Material de Tubería', data.pipe_material.replace('_', ' ').title(), '', 'Material de construcción'],
+        ]
+    input_data.append(['Eficiencia de Bomba', f"{data.pump_efficiency * 100:.1f}", '%', 'Eficiencia mecánica de la bomba'])
+
+    # Add accessories if any, one per line for readability
+    accessories = [f"{label}: {params[field]}" for field, label in ACCESSORY_LABELS if (params.get(field) or 0) > 0]
+    if accessories:
+        input_data.append(['Accesorios', '\n'.join(accessories), '', 'Elementos adicionales del sistema'])
+
+    story.append(_table(input_data, [1.5*inch, 1.8*inch, 0.8*inch, 2.4*inch], INPUT_TABLE_STYLE))
+    story.append(Spacer(1, 30))
+
+    # Results section
+    story.append(Paragraph("2. RESULTADOS DEL CÁLCULO HIDRÁULICO", SECTION_STYLE))
+
+    key_results = [
+        ['PARÁMETRO', 'VALOR', 'UNIDAD', 'OBSERVACIONES'],
+        ['Altura Total Dinámica (TDH)', f"{results.get('total_head', 0):.2f}", 'm', 'Altura total que debe vencer la bomba'],
+        ['Pérdidas por Fricción', f"{results.get('friction_head_loss', 0):.2f}", 'm', 'Pérdidas en tubería recta'],
+        ['Pérdidas Menores', f"{results.get('minor_head_loss', 0):.2f}", 'm', 'Pérdidas en accesorios'],
+        ['Velocidad del Flujo', f"{results.get('velocity', 0):.2f}", 'm/s', 'Velocidad promedio en tubería'],
+        ['Número de Reynolds', f"{results.get('reynolds', 0):.0f}", '-', 'Caracterización del flujo'],
+        ['Factor de Fricción', f"{results.get('friction_factor', 0):.6f}", '-', 'Coeficiente de Darcy-Weisbach']
+    ]
+    story.append(_table(key_results, [1.8*inch, 1.2*inch, 0.8*inch, 2.7*inch], RESULTS_TABLE_STYLE))
+    story.append(Spacer(1, 20))
+
+    # Power requirements start page 2
+    story.append(PageBreak())
+    story.append(Paragraph("2.1 Requerimientos de Potencia", SUBSECTION_STYLE))
+
+    power_data = [
+        ['TIPO DE POTENCIA', 'VALOR', 'UNIDAD'],
+        ['Potencia Hidráulica', f"{results.get('power_kw', 0):.2f}", 'kW'],
+        ['Potencia Hidráulica', f"{results.get('power_hp', 0):.2f}", 'HP'],
+        ['Eficiencia Considerada', f"{data.pump_efficiency * 100:.1f}", '%']
+    ]
+    story.append(_table(power_data, [2.5*inch, 1.5*inch, 1*inch], POWER_TABLE_STYLE))
+    story.append(Spacer(1, 30))
+
+    if segments:
+        story.append(Paragraph("2.2 Pérdidas por Tramo", SUBSECTION_STYLE))
+        segment_data = [['TRAMO', 'MATERIAL', 'L (m)', 'D (mm)', 'K', 'V (m/s)', 'hf (m)', 'hm (m)', 'TOTAL (m)']]
+        for s in segments:
+            segment_data.append([
+                s['label'], s['material'].replace('_', ' ').title(), f"{s['length_m']:.1f}", f"{s['diameter_mm']:.1f}",
+                f"{s['total_k']:.2f}", f"{s['velocity']:.2f}", f"{s['friction_head_loss']:.2f}",
+                f"{s['minor_head_loss']:.2f}", f"{s['head_loss']:.2f}",
+            ])
+        segment_data.append([
+            'Total', '', f"{sum(s['length_m'] for s in segments):.1f}", '', '', '',
+            f"{results.get('friction_head_loss', 0):.2f}", f"{results.get('minor_head_loss', 0):.2f}",
+            f"{results.get('friction_head_loss', 0) + results.get('minor_head_loss', 0):.2f}",
+        ])
+        story.append(_table(segment_data, [1.0*inch, 0.8*inch] + [0.65*inch] * 2 + [0.5*inch] + [0.65*inch] * 3 + [0.8*inch], SEGMENT_TABLE_STYLE))
+        story.append(Spacer(1, 30))
+
+    # Pump curve chart if available
+    if chart_flowable is not None:
+        story.append(Paragraph("3. CURVA CARACTERÍSTICA DE LA BOMBA", SECTION_STYLE))
+        story.append(Paragraph(CHART_SUBTITLE_TEXT, CHART_SUBTITLE_STYLE))
+        story.append(chart_flowable)
+        story.append(Spacer(1, 20))
+        story.append(Paragraph(CHART_DESCRIPTION_TEXT, NORMAL_STYLE))
+        story.append(Spacer(1, 20))
+
+    # Technical notes
+    story.append(Paragraph("4. NOTAS TÉCNICAS Y RECOMENDACIONES", SECTION_STYLE))
+
+    notes_text = f"""
+    <b>Método de Cálculo:</b> Los cálculos se basan en la ecuación de Darcy-Weisbach para pérdidas por fricción
+    y el método de coeficientes K para pérdidas menores.<br/><br/>
+
+    <b>Consideraciones de Diseño:</b><br/>
+    • La velocidad de flujo calculada es {results.get('velocity', 0):.2f} m/s<br/>
+    • Se recomienda mantener velocidades entre 1.0 y 3.0 m/s para sistemas de bombeo<br/>
+    • El número de Reynolds indica flujo {'turbulento' if results.get('reynolds', 0) > 4000 else 'laminar'}<br/><br/>
+
+    <b>Recomendaciones:</b><br/>
+    • Verificar que la bomba seleccionada opere en su rango de eficiencia óptima<br/>
+    • Considerar un factor de seguridad del 10-15% en la potencia calculada<br/>
+    • Instalar válvulas de control y medición según especificaciones del proyecto<br/>
+    • Realizar mantenimiento preventivo según recomendaciones del fabricante
+    """
+    story.append(Paragraph(notes_text, NORMAL_STYLE))
+    story.append(Spacer(1, 30))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def build_bundle_cover_pdf(title, rows, current_date):
+    """
+    Cover and comparison table of a report bundle, as PDF bytes. ``rows`` has
+    one dict per scenario: name, location, flow_ls, total_head, velocity,
+    power_kw and power_hp.
+    """
+    buffer = io.BytesIO()
+    doc = HeaderFooterDocTemplate(buffer, current_date)
+
+    story = [Paragraph(BUNDLE_TITLE_TEXT, TITLE_STYLE)]
+    project_data = [
+        ['INFORMACIÓN DEL PAQUETE', '', ''],
+        ['Proyecto:', title or 'N/A', ''],
+        ['Escenarios:', f"{len(rows)}", ''],
+        ['Fecha de reporte:', current_date, ''],
+        ['Elaborado por:', 'VMS HYDRAULICS', '']
+    ]
+    story.append(_table(project_data, [2.5*inch, 3*inch, 1*inch], PROJECT_TABLE_STYLE))
+    story.append(Spacer(1, 30))
+
+    story.append(Paragraph("RESUMEN DE RESULTADOS", SECTION_STYLE))
+    comparison = [['N°', 'ESCENARIO', 'UBICACIÓN', 'Q (l/s)', 'TDH (m)', 'V (m/s)', 'P (kW)', 'P (HP)']]
+    for i, row in enumerate(rows, start=1):
+        comparison.append([
+            f"{i}", Paragraph(escape(row['name'] or f"Escenario {i}"), CELL_STYLE),
+            Paragraph(escape(row['location'] or '-'), CELL_STYLE),
+            f"{row['flow_ls']:.1f}", f"{row['total_head']:.2f}", f"{row['velocity']:.2f}",
+            f"{row['power_kw']:.2f}", f"{row['power_hp']:.2f}",
+        ])
+    # La tabla sigue en las páginas siguientes con el encabezado repetido
+    table = Table(comparison, colWidths=[0.4*inch, 2.0*inch, 1.4*inch] + [0.65*inch] * 5, repeatRows=1)
+    table.setStyle(COMPARISON_TABLE_STYLE)
+    story.append(table)
+    story.append(Spacer(1, 20))
+    story.append(Paragraph(BUNDLE_NOTE_TEXT, NORMAL_STYLE))
+
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,108 @@
+"""
+Filesystem store for asynchronous report jobs.
+
+Each job is a ``<id>.json`` metadata file plus, once rendered, a ``<id>.pdf``
+file in the store directory. Jobs expire ``ttl`` seconds after creation and
+are removed by purge_expired(), which the app runs periodically.
+"""
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ReportJobStore:
+    def __init__(self, directory=None, ttl=None):
+        self.directory = Path(directory or os.environ.get("REPORT_STORE_DIR", "report_jobs"))
+        self.ttl = ttl if ttl is not None else int(os.environ.get("REPORT_JOB_TTL", 3600))
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _meta_path(self, job_id):
+        return self.directory / f"{job_id}.json"
+
+    def pdf_path(self, job_id):
+        return self.directory / f"{job_id}.pdf"
+
+    def _write_atomic(self, path, content):
+        # Escribir y renombrar para que un lector nunca vea un archivo a medias
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+
+    def create(self, project_name=""):
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "project_name": project_name,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + self.ttl,
+            "error": None,
+            "size": None,
+        }
+        self._write_atomic(self._meta_path(job["id"]), json.dumps(job).encode("utf-8"))
+        return job
+
+    def get(self, job_id):
+        """Job metadata, or None if the id is unknown, malformed or expired."""
+        if not job_id.isalnum():
+            return None
+        try:
+            job = json.loads(self._meta_path(job_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if job["expires_at"] < time.time():
+            self.delete(job_id)
+            return None
+        return job
+
+    def update(self, job_id, **fields):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=time.time())
+        self._write_atomic(self._meta_path(job_id), json.dumps(job).encode("utf-8"))
+        return job
+
+    def save_pdf(self, job_id, content):
+        self._write_atomic(self.pdf_path(job_id), content)
+        return self.update(job_id, status=DONE, size=len(content))
+
+    def delete(self, job_id):
+        for path in (self._meta_path(job_id), self.pdf_path(job_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self):
+        """Delete expired jobs and orphaned files; return the number of jobs removed."""
+        now = time.time()
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                job = json.loads(path.read_text(encoding="utf-8"))
+                expired = job["expires_at"] < now
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if expired:
+                self.delete(path.stem)
+                removed += 1
+        for path in self.directory.glob("*.pdf"):
+            if not self._meta_path(path.stem).exists():
+                path.unlink(missing_ok=True)
+        return removed
+
+    def fail_interrupted(self):
+        """Mark jobs left queued/running by a previous process as failed."""
+        for path in self.directory.glob("*.json"):
+            job = self.get(path.stem)
+            if job and job["status"] in (QUEUED, RUNNING):
+                self.update(job["id"], status=FAILED, error="Trabajo interrumpido por reinicio del servidor")
@@ -0,0 +1,81 @@
+"""
+Bounded process pool for CPU-heavy report rendering.
+
+matplotlib and ReportLab hold the GIL for the whole build, so reports run in
+worker processes and the event loop stays free for cheap requests like
+/calculate. At most ``max_workers + queue_limit`` reports are accepted at a
+time; beyond that run() raises PoolSaturatedError so the caller can answer 503.
+Background jobs call run(..., wait=True) and wait for an idle worker instead,
+leaving the waiting queue to interactive requests.
+"""
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+class PoolSaturatedError(Exception):
+    """Raised when every worker is busy and the waiting queue is full"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Pool de reportes saturado, reintentar en {retry_after} s")
+        self.retry_after = retry_after
+
+
+class ReportPool:
+    def __init__(self, max_workers=None, queue_limit=None, initializer=None):
+        self.max_workers = max_workers or int(os.environ.get("REPORT_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+        self.queue_limit = queue_limit if queue_limit is not None else int(os.environ.get("REPORT_QUEUE_LIMIT", 8))
+        self.initializer = initializer  # Se ejecuta una vez al arrancar cada proceso
+        self.in_flight = 0
+        self._avg_seconds = 1.0  # Media móvil del tiempo de un reporte
+        self._executor = None
+        self._slot_freed = None
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.queue_limit
+
+    def _get_executor(self):
+        # Se crea al primer uso para no lanzar procesos al importar el módulo
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+        return self._executor
+
+    def retry_after(self):
+        """Seconds until a slot is likely free, based on the observed render time."""
+        waves = math.ceil((self.in_flight - self.max_workers + 1) / self.max_workers)
+        return max(1, math.ceil(max(waves, 1) * self._avg_seconds))
+
+    async def run(self, fn, *args, wait=False, on_start=None):
+        """
+        Run fn(*args) in a worker process. If the pool is full, raise
+        PoolSaturatedError, or with wait=True wait until a worker is idle.
+        ``on_start`` is called once the task has been given a slot.
+        """
+        if self._slot_freed is None:
+            self._slot_freed = asyncio.Condition()
+        if wait:
+            async with self._slot_freed:
+                await self._slot_freed.wait_for(lambda: self.in_flight < self.max_workers)
+        elif self.in_flight >= self.capacity:
+            raise PoolSaturatedError(self.retry_after())
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            if on_start is not None:
+                on_start()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - start)
+            return result
+        finally:
+            self.in_flight -= 1
+            async with self._slot_freed:
+                self._slot_freed.notify()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
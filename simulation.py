@@ -0,0 +1,238 @@
+"""
+Extended-period simulation of a pumping station with level control.
+
+The pump either fills a tank that supplies the demand ("tank") or empties a
+wet well that receives it as inflow ("wet_well"). It starts and stops at set
+levels, and the static head moves with the level. The operating point is
+solved once for a grid of levels (one vectorized operating_point.solve
+call), so each time step is a table lookup plus the level balance. Steps are
+processed in chunks from any iterable of demands, so a series of any length
+runs in constant memory and the per-step results can be streamed as they
+are produced.
+"""
+import json
+import math
+
+import numpy as np
+
+import hydraulics
+import operating_point
+
+TANK = "tank"  # La bomba llena un tanque del que sale la demanda
+WET_WELL = "wet_well"  # La bomba vacía un pozo al que entra la demanda
+MODES = (TANK, WET_WELL)
+
+LEVEL_TABLE_POINTS = 257
+CHUNK_STEPS = 8192
+STEP_FIELDS = ("step", "time_h", "demand", "level", "pump_on", "flow", "head", "power_kw", "cost")
+
+
+class Simulator:
+    """
+    Level-controlled pump run one chunk of demand values (m³/s) at a time.
+
+    ``system`` is the one-row SystemCurve with the static head at level zero
+    (the tank bottom, or the wet-well floor) and ``pump`` the pump curve.
+    ``tariff`` is a price per kWh or 24 hourly prices by hour of day.
+    """
+
+    def __init__(self, pump, system, pump_efficiency, mode, storage_area, max_level, initial_level,
+                 start_level, stop_level, step_seconds=60.0, start_hour=0.0, tariff=0.0):
+        if mode not in MODES:
+            raise ValueError(f"Modo '{mode}' no soportado (use {' o '.join(MODES)})")
+        if storage_area <= 0 or max_level <= 0 or step_seconds <= 0:
+            raise ValueError("El área, la altura máxima y el paso de tiempo deben ser mayores que cero")
+        if not 0 <= initial_level <= max_level:
+            raise ValueError("El nivel inicial debe estar entre 0 y la altura máxima")
+        # En un tanque se arranca con nivel bajo; en un pozo, con nivel alto
+        if (mode == TANK and start_level >= stop_level) or (mode == WET_WELL and start_level <= stop_level):
+            raise ValueError("Los niveles de arranque y parada no son coherentes con el modo")
+        prices = [float(tariff)] * 24 if np.ndim(tariff) == 0 else [float(p) for p in tariff]
+        if len(prices) != 24:
+            raise ValueError("La tarifa debe ser un valor o 24 precios horarios")
+
+        self.mode = mode
+        self.area = float(storage_area)
+        self.max_level = float(max_level)
+        self.start_level = float(start_level)
+        self.stop_level = float(stop_level)
+        self.dt = float(step_seconds)
+        self.start_hour = float(start_hour)
+        self.prices = prices
+        self._build_table(pump, system, pump_efficiency)
+
+        self.level = float(initial_level)
+        self.on = self._should_start(self.level)
+        self.step = 0
+        self.starts = int(self.on)
+        self.energy_kwh = 0.0
+        self.cost = 0.0
+        self.pumped_m3 = 0.0
+        self.pump_hours = 0.0
+        self.min_level = self.max_level_seen = self.level
+        self.overflow_steps = 0
+        self.dry_steps = 0
+        self.unsolved_steps = 0
+
+    def _build_table(self, pump, system, pump_efficiency):
+        # Punto de operación para niveles equiespaciados entre 0 y la altura máxima
+        levels = np.linspace(0, self.max_level, LEVEL_TABLE_POINTS)
+        sign = 1.0 if self.mode == TANK else -1.0
+        static = system.geometric_height_m[0] + sign * levels
+        n = len(levels)
+        systems = system.take(np.zeros(n, dtype=int))
+        systems.geometric_height_m = static
+        hint = np.full(n, pump.max_flow[0] / hydraulics.RUNOUT_FACTOR) if np.isfinite(pump.max_flow[0]) else None
+        with np.errstate(invalid='ignore', over='ignore'):
+            flow, head, status = operating_point.solve(pump.take(np.zeros(n, dtype=int)), systems, hint)
+            power = systems.evaluate(np.where(status == operating_point.OK, flow, 1.0),
+                                     pump_efficiency=pump_efficiency)["power_kw"]
+        solved = status == operating_point.OK
+        self.table_flow = np.where(solved, flow, 0.0).tolist()
+        self.table_head = np.where(solved, head, np.nan).tolist()
+        self.table_power = np.where(solved, power, 0.0).tolist()
+        self.table_solved = solved.tolist()
+        self.table_step = self.max_level / (n - 1)
+
+    def _should_start(self, level):
+        return level <= self.start_level if self.mode == TANK else level >= self.start_level
+
+    def _should_stop(self, level):
+        return level >= self.stop_level if self.mode == TANK else level <= self.stop_level
+
+    def run(self, demand):
+        """
+        Step through ``demand`` (m³/s per step). Returns per-step columns
+        (STEP_FIELDS; level at the end of the step, head NaN with the pump off).
+        """
+        columns = {key: [] for key in STEP_FIELDS}
+        dt, area, max_level = self.dt, self.area, self.max_level
+        hours = dt / 3600
+        sign = 1.0 if self.mode == TANK else -1.0
+        table_step, last = self.table_step, LEVEL_TABLE_POINTS - 1
+        flows, heads, powers, solved = self.table_flow, self.table_head, self.table_power, self.table_solved
+        level, on = self.level, self.on
+
+        for q_demand in demand.tolist():
+            time_h = self.step * hours
+            flow = power = cost = 0.0
+            head = math.nan
+            if on:
+                # Interpolación lineal en la tabla de niveles
+                x = min(max(level / table_step, 0.0), last)
+                i = min(int(x), last - 1)
+                t = x - i
+                if solved[i] and solved[i + 1]:
+                    flow = flows[i] + t * (flows[i + 1] - flows[i])
+                    head = heads[i] + t * (heads[i + 1] - heads[i])
+                    power = powers[i] + t * (powers[i + 1] - powers[i])
+                else:
+                    self.unsolved_steps += 1
+                price = self.prices[int(self.start_hour + time_h) % 24]
+                cost = power * hours * price
+                self.energy_kwh += power * hours
+                self.cost += cost
+                self.pumped_m3 += flow * dt
+                self.pump_hours += hours
+
+            # Balance de volumen: la bomba entra al tanque o sale del pozo
+            level += sign * (flow - q_demand) * dt / area
+            if level > max_level:
+                level = max_level
+                self.overflow_steps += 1
+            elif level < 0:
+                level = 0.0
+                self.dry_steps += 1
+            self.min_level = min(self.min_level, level)
+            self.max_level_seen = max(self.max_level_seen, level)
+
+            columns["step"].append(self.step)
+            columns["time_h"].append(time_h)
+            columns["demand"].append(q_demand)
+            columns["level"].append(level)
+            columns["pump_on"].append(on)
+            columns["flow"].append(flow)
+            columns["head"].append(head)
+            columns["power_kw"].append(power)
+            columns["cost"].append(cost)
+
+            if on and self._should_stop(level):
+                on = False
+            elif not on and self._should_start(level):
+                on = True
+                self.starts += 1
+            self.step += 1
+
+        self.level, self.on = level, on
+        return columns
+
+    def summary(self):
+        hours = self.step * self.dt / 3600
+        return {
+            "steps": self.step,
+            "hours": hours,
+            "energy_kwh": self.energy_kwh,
+            "cost": self.cost,
+            "starts": self.starts,
+            "pump_hours": self.pump_hours,
+            "pumped_m3": self.pumped_m3,
+            "specific_energy_kwh_m3": self.energy_kwh / self.pumped_m3 if self.pumped_m3 > 0 else None,
+            "final_level": self.level,
+            "min_level": self.min_level,
+            "max_level": self.max_level_seen,
+            "overflow_steps": self.overflow_steps,
+            "dry_steps": self.dry_steps,
+            "unsolved_steps": self.unsolved_steps,
+        }
+
+
+def chunks(values, size=CHUNK_STEPS):
+    """Group an iterable of numbers into float arrays of at most ``size`` values."""
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) == size:
+            yield np.asarray(chunk, dtype=float)
+            chunk = []
+    if chunk:
+        yield np.asarray(chunk, dtype=float)
+
+
+def simulate(simulator, demand):
+    """
+    Run ``simulator`` over an iterable of demands (m³/s), yielding the
+    per-step columns of each chunk, then the summary dict.
+    """
+    for chunk in chunks(demand):
+        yield simulator.run(chunk)
+    yield simulator.summary()
+
+
+def step_lines(columns, every=1):
+    """NDJSON lines (flows in l/s) for every ``every``-th step of a run() result."""
+    # Formato directo: json.dumps por paso dominaba el tiempo de la simulación.
+    # repr() de un float finito ya es JSON válido
+    lines = []
+    for i, step in enumerate(columns["step"]):
+        if step % every:
+            continue
+        head = columns["head"][i]
+        head = repr(round(head, 2)) if math.isfinite(head) else "null"
+        lines.append(
+            f'{{"step": {step}, "time_h": {round(columns["time_h"][i], 4)!r}, '
+            f'"demand": {round(columns["demand"][i] * 1000, 2)!r}, "level": {round(columns["level"][i], 3)!r}, '
+            f'"pump_on": {"true" if columns["pump_on"][i] else "false"}, '
+            f'"flow": {round(columns["flow"][i] * 1000, 2)!r}, '
+            f'"head": {head}, '
+            f'"power_kw": {round(columns["power_kw"][i], 2)!r}, "cost": {round(columns["cost"][i], 4)!r}}}\n'
+        )
+    return "".join(lines)
+
+
+def summary_line(summary):
+    """The final NDJSON line of a simulation."""
+    digits = {"hours": 4, "energy_kwh": 2, "cost": 2, "pump_hours": 4, "pumped_m3": 2,
+              "specific_energy_kwh_m3": 4, "final_level": 3, "min_level": 3, "max_level": 3}
+    rounded = {key: round(value, digits[key]) if key in digits and value is not None else value
+               for key, value in summary.items()}
+    return json.dumps({"summary": rounded}) + "\n"
@@ -0,0 +1,31 @@
+"""
+Write-only sinks shared by the streaming writers.
+
+ByteDrain collects what a writer (zipfile, pyarrow) produces and hands it back
+on each drain(), so the caller can yield the bytes of every step as soon as
+they exist instead of building the whole file in memory.
+"""
+import io
+
+
+class ByteDrain(io.RawIOBase):
+    # Archivo de solo escritura (sin seek) que entrega lo escrito en cada drain()
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
@@ -0,0 +1,302 @@
+"""
+Transient (water hammer) analysis of a rising main by the method of characteristics.
+
+The main (one pipe, or the segments of hydraulics.segment_arrays) is split
+into reaches of equal travel time Δx/a = Δt; each segment's wave speed is
+adjusted slightly so that its length is a whole number of reaches. Every
+time step updates all interior nodes at once from the C+ and C-
+characteristics of their neighbours (NumPy slices). The boundaries are the
+pump with a check valve at the upstream end and the discharge reservoir,
+optionally behind a closing valve, at the downstream end. Only the maximum
+and minimum head of each node and a decimated history are kept, so memory
+does not grow with the duration.
+"""
+import math
+
+import numpy as np
+
+import friction
+import hydraulics
+
+PUMP_TRIP = "pump_trip"  # Corte de energía: la bomba se detiene por inercia
+VALVE_CLOSURE = "valve_closure"  # Cierre de la válvula de descarga con la bomba en marcha
+SCENARIOS = (PUMP_TRIP, VALVE_CLOSURE)
+
+# Celeridad típica por material (m/s)
+WAVE_SPEEDS = {
+    "steel": 1200,
+    "ductile_iron": 1150,
+    "copper": 1250,
+    "concrete": 1050,
+    "pvc": 400,
+    "hdpe": 300,
+}
+DEFAULT_WAVE_SPEED = 1000
+
+DEFAULT_REACHES = 200
+DURATION_PERIODS = 10  # Duración por defecto, en periodos 2L/a
+MIN_DURATION = 10.0  # s
+MAX_NODE_STEPS = 1_000_000_000  # Nudos × pasos de una corrida
+VALVE_OPEN_K = hydraulics.K_VALUES['valve_gate']  # Pérdida de la válvula de descarga abierta
+VAPOR_PRESSURE_HEAD = -10.09  # m, presión de vapor a 20 °C relativa a la atmosférica
+MIN_SPEED_RATIO = 0.01  # Piso de la velocidad en la ecuación de inercia
+ENVELOPE_POINTS = 101
+HISTORY_POINTS = 501
+
+
+def wave_speeds_for(materials):
+    """Typical wave speed (m/s) of each pipe material."""
+    return np.array([WAVE_SPEEDS.get(str(m).lower(), DEFAULT_WAVE_SPEED) for m in materials], dtype=float)
+
+
+def estimate_inertia(power_kw, speed_rpm):
+    """Pump plus motor moment of inertia (kg·m²) from Thorley's empirical fits."""
+    n = speed_rpm / 1000
+    pump = 0.03768 * (power_kw / n**3) ** 0.9556
+    motor = 0.0043 * (power_kw / n) ** 1.48
+    return pump + motor
+
+
+class SurgeLine:
+    """
+    Characteristic grid of a rising main carrying ``flow`` (m³/s) from the
+    pump (chainage 0, suction level as head datum) to a reservoir at
+    ``static_head``. Segment arrays are in SI units; ``profile`` is a list of
+    (chainage m, elevation m) points, by default a straight rise from 0 to
+    ``static_head``. ``kinematic_viscosity`` and ``density`` are those of the
+    pumped fluid (the wave speeds are given by the caller).
+    """
+
+    def __init__(self, lengths, diameters, roughness_mm, total_k, wave_speeds, flow, static_head,
+                 friction_model=friction.DEFAULT_METHOD, reaches=DEFAULT_REACHES, profile=None,
+                 kinematic_viscosity=hydraulics.KINEMATIC_VISCOSITY, density=hydraulics.WATER_DENSITY):
+        lengths = np.asarray(lengths, dtype=float)
+        diameters = np.asarray(diameters, dtype=float)
+        wave_speeds = np.broadcast_to(np.asarray(wave_speeds, dtype=float), lengths.shape)
+        if (lengths <= 0).any() or (diameters <= 0).any() or (wave_speeds <= 0).any():
+            raise ValueError("Longitudes, diámetros y celeridades deben ser mayores que cero")
+        if flow <= 0:
+            raise ValueError("El caudal de régimen debe ser mayor que cero")
+        if reaches < len(lengths):
+            raise ValueError("Debe haber al menos un tramo de cálculo por segmento de tubería")
+
+        # Δt común; cada segmento con un número entero de tramos y su celeridad ajustada
+        travel = lengths / wave_speeds
+        self.dt = float(travel.sum() / reaches)
+        counts = np.maximum(1, np.rint(travel / self.dt)).astype(int)
+        self.wave_speeds = lengths / (counts * self.dt)
+        self.period = float(2 * travel.sum())
+
+        area = np.pi * diameters**2 / 4
+        velocity = flow / area
+        reynolds = velocity * diameters / kinematic_viscosity
+        f = friction.friction_factor(reynolds, np.asarray(roughness_mm, dtype=float), diameters, friction_model)
+        dx = lengths / counts
+        # Por tramo: impedancia B = a/(gA) y resistencia R (fricción y accesorios repartidos)
+        self.B = np.repeat(self.wave_speeds / (hydraulics.GRAVITY * area), counts)
+        self.R = np.repeat((f * dx / diameters + np.asarray(total_k, dtype=float) / counts)
+                           / (2 * hydraulics.GRAVITY * area**2), counts)
+        self.x = np.r_[0.0, np.cumsum(np.repeat(dx, counts))]
+        self.flow = float(flow)
+        self.static_head = float(static_head)
+        self.velocity = velocity
+        self.area = area
+        self.density = float(density)
+
+        if profile:
+            chainage, elevation = np.asarray(sorted(profile), dtype=float).T
+            self.elevation = np.interp(self.x, chainage, elevation)
+        else:
+            self.elevation = self.static_head * self.x / self.x[-1]
+
+    def __len__(self):
+        return len(self.x)
+
+    def steady_heads(self, end_head):
+        """Steady heads with ``end_head`` at the downstream node (losses R·Q² per reach)."""
+        losses = self.R * self.flow**2
+        return end_head + np.r_[np.cumsum(losses[::-1])[::-1], 0.0]
+
+
+def simulate(line, scenario=PUMP_TRIP, pump_efficiency=0.75, inertia=None, speed_rpm=1450,
+             closure_time=5.0, closure_exponent=1.0, duration=None):
+    """
+    Run a surge scenario on ``line``. The pump curve is the station's
+    synthetic parabola (shutoff at SHUTOFF_FACTOR times the head) fitted
+    through the steady duty point, and its check valve shuts whenever the pump
+    cannot deliver forward flow. ``inertia`` (kg·m²) defaults to
+    estimate_inertia of the steady shaft power. For VALVE_CLOSURE the
+    discharge valve (open loss VALVE_OPEN_K·V²/2g) closes as
+    (1 - t/closure_time)**closure_exponent.
+
+    Returns a dict with the node arrays (``steady_head``, ``max_head``,
+    ``min_head``), the decimated ``history`` columns and scalar results.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Escenario '{scenario}' no soportado (use {' o '.join(SCENARIOS)})")
+    if scenario == VALVE_CLOSURE and closure_time < 0:
+        raise ValueError("El tiempo de cierre no puede ser negativo")
+    n = len(line)
+    B, R = line.B, line.R
+    q0 = line.flow
+    valve = scenario == VALVE_CLOSURE
+    valve_loss = VALVE_OPEN_K * line.velocity[-1]**2 / (2 * hydraulics.GRAVITY) if valve else 0.0
+    steady = line.steady_heads(line.static_head + valve_loss)
+
+    # Parábola de la bomba por el punto de régimen (altura de aspiración = 0)
+    pump_head = steady[0]
+    shutoff = hydraulics.SHUTOFF_FACTOR * pump_head
+    curve_b = (shutoff - pump_head) / q0**2
+    power_w = line.density * hydraulics.GRAVITY * q0 * pump_head / pump_efficiency
+    if inertia is None:
+        inertia = estimate_inertia(power_w / 1000, speed_rpm)
+    if inertia <= 0 or speed_rpm <= 0 or pump_efficiency <= 0:
+        raise ValueError("La inercia, la velocidad y la eficiencia de la bomba deben ser mayores que cero")
+    omega0 = speed_rpm * 2 * math.pi / 60
+    # dα/dt = -ρ g Q H / (η I ω0² α)
+    decel = line.density * hydraulics.GRAVITY / (pump_efficiency * inertia * omega0**2)
+
+    if duration is None:
+        duration = max(DURATION_PERIODS * line.period, MIN_DURATION)
+    dt = line.dt
+    steps = int(math.ceil(duration / dt))
+    if steps * n > MAX_NODE_STEPS:
+        raise ValueError(f"Corrida demasiado grande ({steps} pasos × {n} nudos); reduzca tramos o duración")
+
+    H = steady.copy()
+    Q = np.full(n, q0)
+    h_max = steady.copy()
+    h_min = steady.copy()
+    inv_b = 1 / (B[:-1] + B[1:])
+    b_left = B[:-1]
+    B0, BM = float(B[0]), float(B[-1])
+    cp = np.empty(n - 1)
+    cm = np.empty(n - 1)
+    qa = np.empty(n)
+
+    stride = max(1, steps // (HISTORY_POINTS - 1))
+    history = {key: [] for key in ("time", "pump_head", "pump_flow", "speed_ratio", "end_head", "end_flow")}
+    mid = n // 2
+    history["mid_head"] = []
+
+    def record(t, alpha):
+        history["time"].append(t)
+        history["pump_head"].append(float(H[0]))
+        history["pump_flow"].append(float(Q[0]))
+        history["speed_ratio"].append(alpha)
+        history["mid_head"].append(float(H[mid]))
+        history["end_head"].append(float(H[-1]))
+        history["end_flow"].append(float(Q[-1]))
+
+    alpha = 1.0
+    check_closed_at = None
+    record(0.0, alpha)
+    for step in range(1, steps + 1):
+        t = step * dt
+        # Características desde el paso anterior: C+ llega al nudo i+1, C- al nudo i
+        np.multiply(Q, np.abs(Q), out=qa)
+        np.subtract(H[:-1] + B * Q[:-1], R * qa[:-1], out=cp)
+        np.add(H[1:] - B * Q[1:], R * qa[1:], out=cm)
+        cp_end, cm_start = float(cp[-1]), float(cm[0])
+
+        # Nudos interiores
+        Q[1:-1] = (cp[:-1] - cm[1:]) * inv_b
+        H[1:-1] = cp[:-1] - b_left * Q[1:-1]
+
+        # Bomba: α²·A - b·Q² = CM + B·Q; la válvula de retención cierra si no hay caudal positivo
+        c = cm_start - alpha**2 * shutoff
+        disc = B0**2 - 4 * curve_b * c
+        q = (-B0 + math.sqrt(disc)) / (2 * curve_b) if disc >= 0 else 0.0
+        if q > 0:
+            Q[0] = q
+            H[0] = cm_start + B0 * q
+            if scenario == PUMP_TRIP:
+                alpha = max(alpha - dt * decel * q * H[0] / max(alpha, MIN_SPEED_RATIO), 0.0)
+        else:
+            Q[0] = 0.0
+            H[0] = cm_start
+            if check_closed_at is None:
+                check_closed_at = t
+
+        # Extremo aguas abajo: reservorio, o válvula que cierra
+        if valve:
+            tau = (1 - t / closure_time) ** closure_exponent if t < closure_time else 0.0
+            if tau > 0:
+                cv = (tau * q0)**2 / valve_loss
+                drive = cp_end - line.static_head
+                root = math.sqrt((cv * BM)**2 + 4 * cv * abs(drive))
+                Q[-1] = math.copysign(0.5 * (root - cv * BM), drive)
+            else:
+                Q[-1] = 0.0
+            H[-1] = cp_end - BM * Q[-1]
+        else:
+            H[-1] = line.static_head
+            Q[-1] = (cp_end - line.static_head) / BM
+
+        np.maximum(h_max, H, out=h_max)
+        np.minimum(h_min, H, out=h_min)
+        if step % stride == 0:
+            record(t, alpha)
+
+    return {
+        "scenario": scenario,
+        "steady_head": steady,
+        "max_head": h_max,
+        "min_head": h_min,
+        "history": history,
+        "steps": steps,
+        "duration": steps * dt,
+        "inertia": float(inertia),
+        "check_valve_closed_at": check_closed_at,
+        "final_speed_ratio": alpha,
+        "joukowsky": float(line.wave_speeds[0] * line.velocity[0] / hydraulics.GRAVITY),
+    }
+
+
+def surge_results(line, run):
+    """JSON summary, envelope (at most ENVELOPE_POINTS nodes) and history (flows in l/s)."""
+    max_pressure = run["max_head"] - line.elevation
+    min_pressure = run["min_head"] - line.elevation
+    i_max, i_min = int(np.argmax(max_pressure)), int(np.argmin(min_pressure))
+    closed_at = run["check_valve_closed_at"]
+    summary = {
+        "scenario": run["scenario"],
+        "reaches": len(line) - 1,
+        "time_step": round(line.dt, 6),
+        "steps": run["steps"],
+        "duration": round(run["duration"], 3),
+        "wave_speeds": [round(float(a), 1) for a in line.wave_speeds],
+        "period": round(line.period, 3),
+        "joukowsky_head": round(run["joukowsky"], 2),
+        "steady_pump_head": round(float(run["steady_head"][0]), 2),
+        "inertia": round(run["inertia"], 3),
+        "check_valve_closed_at": round(closed_at, 3) if closed_at is not None else None,
+        "final_speed_ratio": round(run["final_speed_ratio"], 4),
+        "max_head": round(float(run["max_head"].max()), 2),
+        "min_head": round(float(run["min_head"].min()), 2),
+        "max_pressure": round(float(max_pressure[i_max]), 2),
+        "max_pressure_chainage": round(float(line.x[i_max]), 1),
+        "min_pressure": round(float(min_pressure[i_min]), 2),
+        "min_pressure_chainage": round(float(line.x[i_min]), 1),
+        # Sin modelo de separación de columna: por debajo de la presión de vapor el resultado es indicativo
+        "cavitation": bool(min_pressure[i_min] < VAPOR_PRESSURE_HEAD),
+    }
+
+    nodes = np.unique(np.rint(np.linspace(0, len(line) - 1, min(ENVELOPE_POINTS, len(line)))).astype(int))
+    envelope = {
+        "chainage": hydraulics.round_half_even(line.x[nodes], 1).tolist(),
+        "elevation": hydraulics.round_half_even(line.elevation[nodes], 2).tolist(),
+        "steady_head": hydraulics.round_half_even(run["steady_head"][nodes], 2).tolist(),
+        "max_head": hydraulics.round_half_even(run["max_head"][nodes], 2).tolist(),
+        "min_head": hydraulics.round_half_even(run["min_head"][nodes], 2).tolist(),
+        "max_pressure": hydraulics.round_half_even(max_pressure[nodes], 2).tolist(),
+        "min_pressure": hydraulics.round_half_even(min_pressure[nodes], 2).tolist(),
+    }
+
+    history = run["history"]
+    digits = {"time": 3, "pump_head": 2, "speed_ratio": 4, "mid_head": 2, "end_head": 2}
+    columns = {key: hydraulics.round_half_even(np.asarray(values), digits[key]).tolist()
+               for key, values in history.items() if key in digits}
+    columns["pump_flow"] = hydraulics.round_half_even(np.asarray(history["pump_flow"]) * 1000, 2).tolist()
+    columns["end_flow"] = hydraulics.round_half_even(np.asarray(history["end_flow"]) * 1000, 2).tolist()
+    return {"summary": summary, "envelope": envelope, "history": columns}
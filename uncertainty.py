@@ -0,0 +1,227 @@
+"""
+Monte Carlo uncertainty analysis of the pumping-station calculation.
+
+Uncertain inputs (flow, pump efficiency, pipe roughness, ...) are given as
+probability distributions around the nominal PumpingStationInput values. All
+samples go through hydraulics.compute_hydraulics in one vectorized pass, or
+in one pass per worker process with independent random streams. The result
+gives percentiles of total head and power and two sensitivity indices per
+input: Spearman rank correlation and the first-order (variance-based) index
+Var(E[Y|X])/Var(Y), estimated by binning the samples on each input.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import friction
+import hydraulics
+
+NORMAL = "normal"
+LOGNORMAL = "lognormal"
+UNIFORM = "uniform"
+TRIANGULAR = "triangular"
+DISTRIBUTIONS = (NORMAL, LOGNORMAL, UNIFORM, TRIANGULAR)
+
+# Entradas con incertidumbre (en las unidades de la petición) y su rango físico:
+# (mínimo, máximo, mínimo incluido). Las muestras fuera de rango se descartan.
+FIELDS = {
+    "flow_rate": (0.0, np.inf, False),
+    "pump_efficiency": (0.0, 1.0, False),
+    "roughness": (0.0, np.inf, True),  # mm, por defecto la del material
+    "geometric_height": (-np.inf, np.inf, True),
+    "pipe_length": (0.0, np.inf, True),
+    "pipe_diameter": (0.0, np.inf, False),
+}
+OUTPUTS = ("total_head", "power_kw")
+
+DEFAULT_SAMPLES = 10_000
+MAX_SAMPLES = 5_000_000
+PERCENTILES = (5, 25, 50, 75, 95)
+SENSITIVITY_BINS = 50
+MIN_SAMPLES_PER_BIN = 20
+# Procesos del pool de muestreo (UNCERTAINTY_WORKERS), acotado como el de reportes
+MAX_WORKERS = int(os.environ.get("UNCERTAINTY_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+
+_executor = None
+
+
+def nominal_values(base):
+    """Nominal value of each uncertain field in its request unit (roughness from the material)."""
+    values = {field: base[field] for field in FIELDS if field in base}
+    values["roughness"] = float(hydraulics.roughness_for([base["pipe_material"]])[0])
+    return values
+
+
+def draw(spec, nominal, n, rng):
+    """``n`` samples of one distribution spec; ``mean`` and ``mode`` default to ``nominal``."""
+    kind = spec.get("distribution") or NORMAL
+    mean = spec.get("mean") if spec.get("mean") is not None else nominal
+    std = spec.get("std")
+    if std is None and spec.get("cv") is not None:
+        std = spec["cv"] * abs(mean)
+
+    if kind in (NORMAL, LOGNORMAL):
+        if std is None or std < 0:
+            raise ValueError(f"La distribución {kind} necesita 'std' o 'cv' no negativos")
+        if kind == NORMAL:
+            return rng.normal(mean, std, n)
+        if mean <= 0:
+            raise ValueError("La distribución lognormal necesita una media positiva")
+        # Parámetros de la normal subyacente a partir de la media y la desviación de la variable
+        sigma2 = np.log1p((std / mean) ** 2)
+        return rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), n)
+    if kind in (UNIFORM, TRIANGULAR):
+        low, high = spec.get("low"), spec.get("high")
+        if low is None or high is None or not low < high:
+            raise ValueError(f"La distribución {kind} necesita 'low' < 'high'")
+        if kind == UNIFORM:
+            return rng.uniform(low, high, n)
+        mode = spec.get("mode") if spec.get("mode") is not None else nominal
+        if not low <= mode <= high:
+            raise ValueError("La moda de la distribución triangular debe estar entre 'low' y 'high'")
+        return rng.triangular(low, mode, high, n)
+    raise ValueError(f"Distribución '{kind}' no soportada (use {', '.join(DISTRIBUTIONS)})")
+
+
+def evaluate(base, samples, n):
+    """Hydraulics of ``n`` rows: sampled fields from ``samples``, the rest at their nominal value."""
+    nominal = nominal_values(base)
+
+    def value(field):
+        return samples[field] if field in samples else np.full(n, float(nominal[field]))
+
+    return hydraulics.compute_hydraulics(
+        hydraulics.to_si(value("geometric_height"), base["geometric_height_unit"], hydraulics.HEIGHT_UNITS),
+        hydraulics.to_si(value("flow_rate"), base["flow_rate_unit"], hydraulics.FLOW_UNITS),
+        hydraulics.to_si(value("pipe_length"), base["pipe_length_unit"], hydraulics.LENGTH_UNITS),
+        hydraulics.to_si(value("pipe_diameter"), base["pipe_diameter_unit"], hydraulics.DIAMETER_UNITS),
+        value("roughness"),
+        hydraulics.fittings_k({f: [base[f]] for f in hydraulics.FITTING_FIELDS if base.get(f) is not None}, 1)[0],
+        value("pump_efficiency"),
+        base.get("friction_model") or friction.DEFAULT_METHOD,
+        *hydraulics.fluid_properties(base),
+    )
+
+
+def run_chunk(base, specs, n, seed):
+    """
+    Sample ``n`` input sets and evaluate them. Returns the sampled fields
+    (request units) and outputs of the physically valid samples, plus the
+    number discarded. Top-level so worker processes can run it.
+    """
+    rng = np.random.default_rng(seed)
+    nominal = nominal_values(base)
+    samples = {field: draw(spec, nominal[field], n, rng) for field, spec in specs.items()}
+
+    valid = np.ones(n, dtype=bool)
+    for field, values in samples.items():
+        low, high, closed = FIELDS[field]
+        valid &= ((values >= low) if closed else (values > low)) & (values <= high)
+    samples = {field: values[valid] for field, values in samples.items()}
+    m = int(valid.sum())
+
+    results = evaluate(base, samples, m)
+    outputs = {key: results[key] for key in OUTPUTS}
+    finite = np.logical_and.reduce([np.isfinite(v) for v in outputs.values()])
+    return ({field: v[finite] for field, v in samples.items()},
+            {key: v[finite] for key, v in outputs.items()},
+            n - int(finite.sum()))
+
+
+def _pool():
+    global _executor
+    # Se crea al primer uso para no lanzar procesos al importar el módulo
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def shutdown():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def ranks(values):
+    """Ranks 0..n-1 along the last axis (ties broken by order)."""
+    order = np.argsort(values, axis=-1, kind='stable')
+    out = np.empty(values.shape, dtype=float)
+    np.put_along_axis(out, order, np.arange(values.shape[-1], dtype=float)[(np.newaxis,) * (values.ndim - 1)],
+                      axis=-1)
+    return out
+
+
+def sensitivity(inputs, output):
+    """Spearman correlation and binned first-order index of ``output`` for each input field."""
+    n = len(output)
+    variance = output.var()
+    bins = max(2, min(SENSITIVITY_BINS, n // MIN_SAMPLES_PER_BIN))
+    y_rank = ranks(output)
+    y_rank -= y_rank.mean()
+    indices = {}
+    for field, x in inputs.items():
+        x_rank = ranks(x)
+        if x.std() == 0 or variance == 0:
+            indices[field] = {"spearman": 0.0, "first_order": 0.0}
+            continue
+        x_centered = x_rank - x_rank.mean()
+        spearman = float((x_centered @ y_rank) / np.sqrt((x_centered @ x_centered) * (y_rank @ y_rank)))
+        # Var(E[Y|X]): medias de Y en bins de igual número de muestras de X
+        group = (x_rank * bins // n).astype(int)
+        counts = np.bincount(group, minlength=bins)
+        means = np.bincount(group, weights=output, minlength=bins) / np.maximum(counts, 1)
+        first_order = float((counts * (means - output.mean()) ** 2).sum() / n / variance)
+        indices[field] = {"spearman": spearman, "first_order": min(first_order, 1.0)}
+    return indices
+
+
+def analyze(base, specs, samples=DEFAULT_SAMPLES, seed=None, workers=1, percentiles=PERCENTILES):
+    """
+    Monte Carlo over the distributions in ``specs`` (field name -> spec dict)
+    for the PumpingStationInput dict ``base``. With ``workers`` > 1 the
+    samples are split across processes, each with its own random stream
+    spawned from ``seed``, so a given (seed, workers) pair is reproducible.
+    """
+    if not specs:
+        raise ValueError("Indique al menos una distribución")
+    unknown = sorted(set(specs) - set(FIELDS))
+    if unknown:
+        raise ValueError(f"Entradas sin incertidumbre soportada: {', '.join(unknown)} (use {', '.join(FIELDS)})")
+    if base.get("segments"):
+        raise ValueError("El análisis de incertidumbre usa la tubería única (sin 'segments')")
+    if not 1 <= samples <= MAX_SAMPLES:
+        raise ValueError(f"El número de muestras debe estar entre 1 y {MAX_SAMPLES}")
+    workers = max(1, min(int(workers or 1), MAX_WORKERS, samples))
+
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    sizes = [samples // workers + (i < samples % workers) for i in range(workers)]
+    if workers == 1:
+        chunks = [run_chunk(base, specs, sizes[0], seeds[0])]
+    else:
+        chunks = list(_pool().map(run_chunk, [base] * workers, [specs] * workers, sizes, seeds))
+
+    inputs = {field: np.concatenate([c[0][field] for c in chunks]) for field in specs}
+    outputs = {key: np.concatenate([c[1][key] for c in chunks]) for key in OUTPUTS}
+    discarded = sum(c[2] for c in chunks)
+    if not len(outputs["total_head"]):
+        raise ValueError("Ninguna muestra es físicamente válida; revise las distribuciones")
+
+    nominal = evaluate(base, {}, 1)
+    summary = {}
+    for key, values in outputs.items():
+        summary[key] = {
+            "nominal": float(nominal[key][0]),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "percentiles": {f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))},
+            "sensitivity": sensitivity(inputs, values),
+        }
+    return {
+        "samples": samples,
+        "valid": samples - discarded,
+        "discarded": discarded,
+        "workers": workers,
+        **summary,
+    }
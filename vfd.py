@@ -0,0 +1,123 @@
+"""
+Variable-speed (VFD) operation of identical pumps in parallel.
+
+By the affinity laws a pump at speed ratio r = n/n0 delivers Q·r at H·r² with
+shaft power P·r³, so its curve becomes r²·H(Q/r) and its efficiency at flow Q
+is the nominal efficiency at Q/r. The speed that puts a given flow on the
+system curve is found by vectorized bisection, and a demand profile is
+scheduled by solving every (pumps on, time step) pair at once and keeping the
+lowest-power staging at each step.
+"""
+import numpy as np
+
+import hydraulics
+
+MIN_SPEED = 0.5  # Relación de velocidad mínima habitual de un variador
+MAX_SPEED = 1.0
+SPEED_BISECTIONS = 40  # Intervalo inicial < 1, error < 1e-12
+MIN_EFFICIENCY = 0.05  # Piso para puntos muy alejados del BEP
+
+
+def affinity(flow, head, power=None, speed=1.0):
+    """Scale a pump curve (flows, heads and optionally powers) to speed ratio ``speed``."""
+    flow, head = np.asarray(flow, dtype=float), np.asarray(head, dtype=float)
+    if power is None:
+        return flow * speed, head * speed**2
+    return flow * speed, head * speed**2, np.asarray(power, dtype=float) * speed**3
+
+
+def efficiency_at(flow, speed, bep_flow, bep_efficiency):
+    """
+    Pump efficiency at ``flow`` and ``speed``: a parabola through zero flow
+    and the BEP (peak ``bep_efficiency`` at ``bep_flow``), evaluated at the
+    nominal-speed homologous flow Q/r.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = flow / (speed * bep_flow)
+    return np.maximum(bep_efficiency * (2 * x - x**2), MIN_EFFICIENCY)
+
+
+def speed_for_flow(pump, unit_flow, head, min_speed=MIN_SPEED, max_speed=MAX_SPEED):
+    """
+    Speed ratio at which one pump (row 0 of ``pump``) delivers ``unit_flow``
+    (m³/s) at ``head`` (m): the root of r²·H(Q/r) = head, which grows with r.
+    NaN where no speed in [min_speed, max_speed] (or within the pump curve)
+    can do it.
+    """
+    unit_flow, head = np.broadcast_arrays(np.asarray(unit_flow, dtype=float), np.asarray(head, dtype=float))
+    shape = unit_flow.shape
+    q, h = unit_flow.ravel(), head.ravel()
+
+    def residual(r):
+        return r**2 * pump.head((q / r)[np.newaxis, :])[0] - h
+
+    # Por debajo de Q/max_flow el caudal homólogo queda fuera de la curva
+    lo = np.maximum(min_speed, q / pump.max_flow[0])
+    hi = np.full(q.shape, float(max_speed))
+    with np.errstate(invalid='ignore', over='ignore'):
+        feasible = (lo <= hi) & (residual(lo) <= 0) & (residual(hi) >= 0)
+        for _ in range(SPEED_BISECTIONS):
+            mid = 0.5 * (lo + hi)
+            above = residual(mid) > 0
+            hi = np.where(above, mid, hi)
+            lo = np.where(above, lo, mid)
+    return np.where(feasible, 0.5 * (lo + hi), np.nan).reshape(shape)
+
+
+def operating_at_speed(pump, system, pumps, unit_flow, speed, bep_flow, bep_efficiency):
+    """Station head, efficiency and input power (kW) for ``pumps`` units each at ``unit_flow`` and ``speed``."""
+    flow = np.asarray(unit_flow, dtype=float) * pumps
+    head = system.head(np.atleast_1d(flow)[np.newaxis, :])[0].reshape(np.shape(flow))
+    efficiency = efficiency_at(unit_flow, speed, bep_flow, bep_efficiency)
+    power_kw = system.density[0] * hydraulics.GRAVITY * flow * head / efficiency / 1000
+    return head, efficiency, power_kw
+
+
+def speed_schedule(pump, system, demand, pumps, bep_flow, bep_efficiency,
+                   min_speed=MIN_SPEED, max_speed=MAX_SPEED, step_hours=1.0):
+    """
+    Lowest-power staging and speed for every step of a demand profile.
+
+    ``pump`` is the nominal curve of one of ``pumps`` identical units in
+    parallel, all running at the same speed, ``system`` a one-row SystemCurve
+    and ``demand`` the station flow per step (m³/s). Every number of pumps on
+    is solved for every step in one pass. Returns per-step arrays (pumps_on,
+    speed, head, efficiency, power_kw; NaN speed where the demand cannot be
+    met) and the energy totals.
+    """
+    demand = np.asarray(demand, dtype=float)
+    on = np.arange(1, pumps + 1)[:, np.newaxis]
+    unit_flow = demand[np.newaxis, :] / on
+    station_head = system.head(demand[np.newaxis, :])[0]
+
+    speed = speed_for_flow(pump, unit_flow, station_head[np.newaxis, :], min_speed, max_speed)
+    efficiency = efficiency_at(unit_flow, speed, bep_flow, bep_efficiency)
+    with np.errstate(invalid='ignore'):
+        power = system.density[0] * hydraulics.GRAVITY * demand * station_head / efficiency / 1000
+    power = np.where(np.isfinite(speed), power, np.inf)
+
+    best = np.argmin(power, axis=0)
+    steps = np.arange(len(demand))
+    idle = demand <= 0
+    met = np.isfinite(power[best, steps]) | idle
+    pumps_on = np.where(idle | ~met, 0, best + 1)
+    schedule = {
+        "pumps_on": pumps_on,
+        "speed": np.where(idle | ~met, np.nan, speed[best, steps]),
+        "head": np.where(idle, np.nan, station_head),
+        "efficiency": np.where(idle | ~met, np.nan, efficiency[best, steps]),
+        "power_kw": np.where(idle, 0.0, np.where(met, power[best, steps], np.nan)),
+    }
+
+    energy = np.where(met, schedule["power_kw"], 0.0) * step_hours
+    volume_m3 = float((demand[met & ~idle] * 3600 * step_hours).sum())
+    total_kwh = float(energy.sum())
+    return schedule, {
+        "steps": int(len(demand)),
+        "energy_kwh": total_kwh,
+        "volume_m3": volume_m3,
+        "specific_energy_kwh_m3": total_kwh / volume_m3 if volume_m3 > 0 else None,
+        "unmet_steps": int((~met).sum()),
+        "staging_changes": int(np.count_nonzero(np.diff(pumps_on))),
+        "hours_by_pumps_on": {int(k): float((pumps_on == k).sum() * step_hours) for k in range(pumps + 1)},
+    }